@@ -1,7 +1,7 @@
 'use client';
 
 import { useState } from 'react';
-import { api, type Intent } from '@/lib/api';
+import { api } from '@/lib/api';
 
 export default function ChatInterface() {
     const [input, setInput] = useState('');
@@ -20,16 +20,16 @@ export default function ChatInterface() {
         setIsLoading(true);
 
         try {
-            // Derive intent from user input
-            const intent = await api.deriveIntent(userMessage);
-
-            // Generate plan
-            const plan = await api.generatePlan(intent);
+            // Intent and plan in one request; show the intent while the plan is generated
+            const understood = (description: string) => `I understand you want to: ${description}`;
+            const { intent, plan } = await api.reason(userMessage, (intent) => {
+                setMessages(prev => [...prev, { role: 'assistant', content: understood(intent.description) }]);
+            });
 
             // Format response
-            const response = `I understand you want to: ${intent.description}\n\nHere's my plan:\n${plan.steps.map((s, i) => `${i + 1}. ${s.description}`).join('\n')}`;
+            const response = `${understood(intent.description)}\n\nHere's my plan:\n${plan.steps.map((s, i) => `${i + 1}. ${s.description}`).join('\n')}`;
 
-            setMessages(prev => [...prev, { role: 'assistant', content: response }]);
+            setMessages(prev => [...prev.slice(0, -1), { role: 'assistant', content: response }]);
         } catch (error) {
             setMessages(prev => [...prev, {
                 role: 'assistant',
@@ -17,6 +17,7 @@ export default function MemoryBrowser() {
     const [filteredType, setFilteredType] = useState<string>();
     const [searchQuery, setSearchQuery] = useState('');
     const [isLoading, setIsLoading] = useState(true);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
 
     useEffect(() => {
         loadMemories();
@@ -25,8 +26,9 @@ export default function MemoryBrowser() {
     const loadMemories = async () => {
         setIsLoading(true);
         try {
-            const data = await api.getMemories(filteredType);
-            setMemories(data);
+            const page = await api.getMemories(filteredType);
+            setMemories(page.items);
+            setNextCursor(page.next_cursor ?? null);
         } catch (error) {
             console.error('Failed to load memories:', error);
         } finally {
@@ -34,6 +36,17 @@ export default function MemoryBrowser() {
         }
     };
 
+    const loadMore = async () => {
+        if (!nextCursor) return;
+        try {
+            const page = await api.getMemories(filteredType, nextCursor);
+            setMemories(prev => [...prev, ...page.items]);
+            setNextCursor(page.next_cursor ?? null);
+        } catch (error) {
+            console.error('Failed to load more memories:', error);
+        }
+    };
+
     const handleSearch = async () => {
         if (!searchQuery.trim()) {
             loadMemories();
@@ -51,6 +64,7 @@ export default function MemoryBrowser() {
                 timestamp: r.timestamp,
                 confidence: r.confidence,
             })));
+            setNextCursor(null);
         } catch (error) {
             console.error('Search failed:', error);
         } finally {
@@ -136,6 +150,14 @@ export default function MemoryBrowser() {
                                 </div>
                             </div>
                         ))}
+                        {nextCursor && (
+                            <button
+                                onClick={loadMore}
+                                className="px-4 py-2 rounded-lg text-sm font-medium bg-slate-200 dark:bg-slate-700 text-slate-700 dark:text-slate-300 hover:bg-slate-300 transition-colors"
+                            >
+                                Load more
+                            </button>
+                        )}
                     </div>
                 )}
             </div>
@@ -31,11 +31,44 @@ export interface Plan {
     estimated_duration_seconds?: number;
 }
 
+export interface ChatMessage {
+    role: 'system' | 'user' | 'assistant';
+    content: string;
+}
+
+export interface MemoryPage {
+    items: Memory[];
+    next_cursor?: string | null;
+    prev_cursor?: string | null;
+}
+
+// Parse server-sent events: blocks of "event: x" / "data: {...}" lines
+async function readEvents(res: Response, onEvent: (event: string, data: any) => void): Promise<void> {
+    const reader = res.body!.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const blocks = buffer.split('\n\n');
+        buffer = blocks.pop() ?? '';
+        for (const block of blocks) {
+            const event = block.match(/^event: (.*)$/m)?.[1] ?? '';
+            const data = JSON.parse(block.match(/^data: (.*)$/m)?.[1] ?? '{}');
+            if (event === 'error') throw new Error(data.detail);
+            onEvent(event, data);
+        }
+    }
+}
+
 export const api = {
     // Memory operations
-    async getMemories(type?: string): Promise<Memory[]> {
-        const url = type ? `${API_BASE}/memory?memory_type=${type}` : `${API_BASE}/memory`;
-        const res = await fetch(url);
+    async getMemories(type?: string, before?: string, limit = 50): Promise<MemoryPage> {
+        const params = new URLSearchParams({ limit: String(limit) });
+        if (type) params.set('memory_type', type);
+        if (before) params.set('before', before);
+        const res = await fetch(`${API_BASE}/memory?${params}`);
         if (!res.ok) throw new Error('Failed to fetch memories');
         return res.json();
     },
@@ -71,6 +104,58 @@ export const api = {
         return res.json();
     },
 
+    // Intent and plan in one request; the intent arrives before the plan
+    async reason(
+        userInput: string,
+        onIntent: (intent: Intent) => void,
+        signal?: AbortSignal,
+    ): Promise<{ intent: Intent; plan: Plan }> {
+        const res = await fetch(`${API_BASE}/reason`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ user_input: userInput }),
+            signal,
+        });
+        if (!res.ok || !res.body) throw new Error('Failed to start reasoning');
+
+        let intent: Intent | undefined;
+        let plan: Plan | undefined;
+        await readEvents(res, (event, data) => {
+            if (event === 'intent') {
+                intent = data;
+                onIntent(data);
+            } else if (event === 'plan') {
+                plan = data;
+            }
+        });
+        if (!intent || !plan) throw new Error('Reasoning ended early');
+        return { intent, plan };
+    },
+
+    // Chat operations
+    async streamChat(
+        messages: ChatMessage[],
+        onToken: (text: string) => void,
+        signal?: AbortSignal,
+    ): Promise<string> {
+        const res = await fetch(`${API_BASE}/chat/stream`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ messages }),
+            signal,
+        });
+        if (!res.ok || !res.body) throw new Error('Failed to start chat stream');
+
+        let full = '';
+        await readEvents(res, (event, data) => {
+            if (event === 'token') {
+                full += data.text;
+                onToken(data.text);
+            }
+        });
+        return full;
+    },
+
     // Search operations
     async searchMemories(query: string, limit = 10) {
         const res = await fetch(`${API_BASE}/search/semantic`, {
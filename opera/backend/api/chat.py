@@ -0,0 +1,101 @@
+"""Chat completion endpoints, including server-sent-event token streaming."""
+import json
+from typing import Iterator, List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from opera.backend.services.model_manager import ModelNotReady, get_model_manager
+
+router = APIRouter(prefix="/chat", tags=["chat"])
+
+
+class ChatMessage(BaseModel):
+    role: Literal["system", "user", "assistant"]
+    content: str
+
+
+class ChatRequest(BaseModel):
+    messages: List[ChatMessage]
+    temperature: float = 0.7
+    max_tokens: Optional[int] = 512
+
+
+class ChatResponse(BaseModel):
+    content: str
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _get_llm():
+    """Return the LLM client, or raise 503 while it loads or if it is unavailable."""
+    try:
+        return get_model_manager().get("llm")
+    except ModelNotReady as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"LLM unavailable: {e}")
+
+
+@router.post("", response_model=ChatResponse)
+def chat(request: ChatRequest) -> ChatResponse:
+    """Generate a complete chat reply in one response."""
+    llm = _get_llm()
+
+    content = llm.complete(
+        [m.model_dump() for m in request.messages],
+        temperature=request.temperature,
+        max_tokens=request.max_tokens
+    )
+    return ChatResponse(content=content)
+
+
+@router.post("/stream")
+def chat_stream(request: ChatRequest) -> StreamingResponse:
+    """
+    Stream a chat reply as server-sent events.
+
+    Emits a ``token`` event (``{"text": ...}``) per generated chunk, then a
+    single ``done`` event, or an ``error`` event if generation fails
+    part-way. Works with both the local and the OpenAI client.
+    """
+    llm = _get_llm()
+
+    messages = [m.model_dump() for m in request.messages]
+
+    def events() -> Iterator[str]:
+        tokens = llm.stream(
+            messages,
+            temperature=request.temperature,
+            max_tokens=request.max_tokens
+        )
+        try:
+            for text in tokens:
+                yield _sse("token", {"text": text})
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+            return
+        finally:
+            # Stops local generation if the client disconnected mid-stream
+            tokens.close()
+        yield _sse("done", {})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/cache/stats")
+def cache_stats() -> dict:
+    """Hit-rate statistics of the LLM completion cache."""
+    llm = _get_llm()
+    stats = getattr(llm, "stats", None)
+    if stats is None:
+        return {"enabled": False}
+    return {"enabled": True, **stats()}
@@ -4,11 +4,10 @@ from pydantic import BaseModel
 from typing import List, Optional
 
 from opera.backend.models.reasoning import Plan
-from opera.backend.services.executor import PlanExecutor, PlanExecutionResult
+from opera.backend.services.executor import PlanExecutionResult, get_plan_executor
 from opera.backend.tools.registry import ToolPermission, get_registry
 
 router = APIRouter(prefix="/execute", tags=["execution"])
-executor = PlanExecutor()
 
 
 class ExecutePlanRequest(BaseModel):
@@ -35,7 +34,7 @@ def execute_plan(request: ExecutePlanRequest):
         except ValueError as e:
             raise HTTPException(status_code=400, detail=f"Invalid permission: {e}")
     
-    result = executor.execute_plan(request.plan, allowed_perms)
+    result = get_plan_executor().execute_plan(request.plan, allowed_perms)
     return result
 
 
@@ -4,65 +4,267 @@ This router exposes endpoints to create and retrieve memory items. It uses
 FastAPI and depends on the memory store service.
 """
 
-from fastapi import APIRouter, Depends
+import threading
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 from sqlmodel import Session
 
+from ..config import config
 from ..models.memory import MemoryItem
-from ..services.memory_store import add_memory, get_session, list_memories, init_db
+from ..services.embedding_store import migrate_json_embeddings, save_embeddings
+from ..services.dedup import queue_dedupe
+from ..services.job_queue import get_job_worker_pool, notify_workers
+from ..services.memory_indexing import (
+    enqueue_embedding, enqueue_unindexed, indexing_status, queue_reindex,
+    sync_vector_index, vector_metadata
+)
+from ..services.memory_store import (
+    add_memories, add_memory, get_memories as get_memories_by_id, get_session,
+    init_db, list_memories_page, stream_memories
+)
 
 
 router = APIRouter()
 
 
-@router.on_event("startup")
+class MemoryPage(BaseModel):
+    items: List[MemoryItem]
+    next_cursor: Optional[str] = None  # pass as 'before' for older items
+    prev_cursor: Optional[str] = None  # pass as 'after' for newer items
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: str  # 'indexed', 'queued' (saved, embedding retried in the background), 'merged' or 'failed'
+    error: Optional[str] = None
+
+
+class BulkMemoryResult(BaseModel):
+    stored: int
+    indexed: int
+    failed: int
+    merged: int = 0
+    results: List[BulkItemResult]
+
+
+class IndexingStatus(BaseModel):
+    memory_id: int
+    status: str  # 'pending', 'running', 'indexed', 'failed' or 'unindexed'
+    attempts: int = 0
+    error: Optional[str] = None
+
+
+def _start_job_workers() -> None:
+    """Fill an empty vector index, then start the job workers."""
+    try:
+        restored, queued = sync_vector_index()
+        if restored:
+            print(f"Restored {restored} stored embeddings into the new vector index")
+        if queued:
+            print(f"Queued {queued} memories for embedding into the new vector index")
+    except Exception as e:
+        print(f"Warning: Failed to check the vector index: {e}")
+    get_job_worker_pool().start()
+
+
 def on_startup() -> None:
-    """Ensure database tables exist on application startup."""
+    """Ensure database tables exist and start the background job workers.
+
+    Called from the application lifespan in ``main``. Opening the vector
+    index to check it is empty happens on a background thread, so startup
+    doesn't wait for it; the workers start once the check is done.
+    """
     init_db()
+    migrated = migrate_json_embeddings()
+    if migrated:
+        print(f"Migrated {migrated} JSON embeddings to binary storage")
+    queued = enqueue_unindexed()
+    if queued:
+        print(f"Queued {queued} unindexed memories for embedding")
+    if config.JOB_WORKERS > 0:
+        threading.Thread(target=_start_job_workers, name="job-startup", daemon=True).start()
 
 
 @router.post("/memory", response_model=MemoryItem)
 def create_memory(item: MemoryItem) -> MemoryItem:
-    """Create and persist a new memory item with embedding generation."""
-    from ..services.embeddings import EmbeddingService
-    from ..services.vector_store import VectorStore
-    import json
+    """
+    Create and persist a new memory item.
+    
+    The memory and its embedding job are committed together and the
+    response returns immediately; embedding and the vector store write
+    happen on the job workers. Poll ``/memory/{id}/status`` for progress.
+    In ``merge`` dedup mode a near-duplicate of an existing memory is
+    merged into it and the existing memory is returned instead (see
+    ``DEDUP_MODE``).
+    """
+    memory = add_memory(item, on_insert=enqueue_embedding)
+    notify_workers()
+    return memory
+
+
+@router.post("/memory/bulk", response_model=BulkMemoryResult)
+def create_memories_bulk(items: List[MemoryItem]) -> BulkMemoryResult:
+    """
+    Create many memory items at once.
+    
+    Items are inserted in one transaction, embedded in chunks of
+    ``EMBEDDING_BULK_CHUNK_SIZE`` through the batch embedding API and
+    upserted into the vector store in batches of
+    ``VECTOR_UPSERT_BATCH_SIZE``. Failures are reported per item and don't
+    abort the batch; items that were stored but couldn't be embedded are
+    queued for background retry. In ``merge`` dedup mode near-duplicates of
+    existing memories are reported as 'merged' with the id of the memory
+    they were merged into.
+    """
+    from ..services.model_manager import get_model_manager
+    from ..services.vector_store import get_vector_store
+    
+    stored, failures, merged = add_memories(items)
     
-    # Add to database
-    memory = add_memory(item)
+    results = {
+        index: BulkItemResult(index=index, status="failed", error=error)
+        for index, error in failures
+    }
+    for index, memory in merged:
+        results[index] = BulkItemResult(index=index, id=memory.id, status="merged")
+    handled = set(results)
+    pending = [
+        (index, item) for index, item in enumerate(items)
+        if index not in handled
+    ]
+    for index, item in pending:
+        results[index] = BulkItemResult(index=index, id=item.id, status="queued")
+    
+    unindexed: List[int] = []
+    
+    def defer(entries, error: str) -> None:
+        for index, item in entries:
+            results[index].error = error
+            unindexed.append(item.id)
     
-    # Generate and store embedding
     try:
-        embedding_service = EmbeddingService()
-        vector_store = VectorStore()
+        embedding_service = get_model_manager().get("embeddings")
+        vector_store = get_vector_store()
+    except Exception as e:
+        defer(pending, f"Embedding unavailable: {e}")
+        pending = []
+    
+    # Embed in chunks sized for the embedding API, then write up to
+    # VECTOR_UPSERT_BATCH_SIZE vectors with one upsert and one SQL transaction
+    chunk_size = config.EMBEDDING_BULK_CHUNK_SIZE
+    upsert_size = max(chunk_size, config.VECTOR_UPSERT_BATCH_SIZE)
+    for group_start in range(0, len(pending), upsert_size):
+        group = pending[group_start:group_start + upsert_size]
+        embedded = []
+        for start in range(0, len(group), chunk_size):
+            chunk = group[start:start + chunk_size]
+            try:
+                embeddings = embedding_service.generate_embeddings_batch(
+                    [item.content for _, item in chunk]
+                )
+            except Exception as e:
+                print(f"Warning: Failed to embed bulk chunk at {group_start + start}: {e}")
+                defer(chunk, f"Embedding failed: {e}")
+                continue
+            embedded.extend(zip(chunk, embeddings))
+        if not embedded:
+            continue
         
-        # Generate embedding
-        embedding = embedding_service.generate_embedding(memory.content)
+        memories = [item for (_, item), _ in embedded]
+        embeddings = [embedding for _, embedding in embedded]
+        try:
+            vector_store.add_memories(
+                memory_ids=[memory.id for memory in memories],
+                contents=[memory.content for memory in memories],
+                embeddings=embeddings,
+                metadatas=[vector_metadata(memory) for memory in memories]
+            )
+            save_embeddings([
+                (memory.id, embedding) for memory, embedding in zip(memories, embeddings)
+            ])
+        except Exception as e:
+            print(f"Warning: Failed to index bulk batch at {group_start}: {e}")
+            defer([entry for entry, _ in embedded], f"Indexing failed: {e}")
+            continue
         
-        # Store in vector database
-        vector_store.add_memory(
-            memory_id=memory.id,
-            content=memory.content,
-            embedding=embedding,
-            metadata={
-                "type": memory.type,
-                "source": memory.source,
-                "timestamp": memory.timestamp.isoformat(),
-                "confidence": memory.confidence
-            }
+        for (index, _), _ in embedded:
+            results[index].status = "indexed"
+    
+    if unindexed:
+        queue_reindex(unindexed)
+    
+    ordered = [results[index] for index in sorted(results)]
+    return BulkMemoryResult(
+        stored=len(stored),
+        indexed=sum(1 for r in ordered if r.status == "indexed"),
+        failed=len(failures),
+        merged=len(merged),
+        results=ordered
+    )
+
+
+@router.get("/memory", response_model=MemoryPage)
+def get_memories(
+    memory_type: str | None = None,
+    source: str | None = None,
+    min_confidence: float | None = Query(None, ge=0.0, le=1.0),
+    limit: int = Query(50, ge=1, le=1000),
+    before: str | None = None,
+    after: str | None = None,
+) -> MemoryPage:
+    """List memories newest first, one keyset-paginated page at a time."""
+    try:
+        items, next_cursor, prev_cursor = list_memories_page(
+            limit=limit,
+            before=before,
+            after=after,
+            memory_type=memory_type,
+            source=source,
+            min_confidence=min_confidence
         )
-        
-        # Store embedding in SQL database as JSON
-        memory.embedding = json.dumps(embedding)
-        from ..services.memory_store import update_memory
-        update_memory(memory)
-        
-    except Exception as e:
-        print(f"Warning: Failed to generate embedding: {e}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return memory
+    return MemoryPage(items=items, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+
+@router.get("/memory/export")
+def export_memories(
+    memory_type: str | None = None,
+    source: str | None = None,
+    min_confidence: float | None = Query(None, ge=0.0, le=1.0),
+) -> StreamingResponse:
+    """Stream every matching memory as newline-delimited JSON."""
+    def rows():
+        for memory in stream_memories(memory_type, source, min_confidence):
+            yield memory.model_dump_json() + "\n"
+    
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+
+@router.get("/memory/{memory_id}/status", response_model=IndexingStatus)
+def get_indexing_status(memory_id: int) -> IndexingStatus:
+    """Report whether a memory's embedding has been generated yet."""
+    if not get_memories_by_id([memory_id]):
+        raise HTTPException(status_code=404, detail="Memory not found")
+    return IndexingStatus(memory_id=memory_id, **indexing_status([memory_id])[memory_id])
+
+
+@router.post("/memory/{memory_id}/reindex", response_model=IndexingStatus)
+def reindex_memory(memory_id: int) -> IndexingStatus:
+    """Queue a memory to be embedded again, e.g. after a model change."""
+    if not get_memories_by_id([memory_id]):
+        raise HTTPException(status_code=404, detail="Memory not found")
+    queue_reindex([memory_id])
+    return IndexingStatus(memory_id=memory_id, **indexing_status([memory_id])[memory_id])
 
 
-@router.get("/memory", response_model=list[MemoryItem])
-def get_memories(memory_type: str | None = None) -> list[MemoryItem]:
-    """List memories, optionally filtered by type."""
-    return list_memories(memory_type)
\ No newline at end of file
+@router.post("/memory/dedupe")
+def dedupe_memories() -> dict:
+    """Queue a one-off deduplication of the existing corpus, one id range per job."""
+    job = queue_dedupe()
+    return {"job_id": job.id, "status": job.status}
@@ -1,5 +1,8 @@
 from fastapi import APIRouter
-from typing import List
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import Iterator, List, Optional
+import json
 import uuid
 
 from opera.backend.models.reasoning import (
@@ -7,28 +10,90 @@ from opera.backend.models.reasoning import (
     PlanRequest, Plan, PlanStep,
     ActionPreviewRequest, ActionPreview
 )
-from opera.backend.services.reasoning_service import ReasoningService
+from opera.backend.services.executor import get_plan_executor
+from opera.backend.services.plan_templates import get_plan_template_store
+from opera.backend.services.reasoning_service import get_reasoning_service
 
 router = APIRouter(tags=["reasoning"])
-service = ReasoningService()
+
+
+class ReasonRequest(BaseModel):
+    user_input: str
+    context: Optional[dict] = None
+    # Run the plan's read-only steps as soon as the plan is known
+    execute_read_only: bool = False
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/reason")
+def reason(request: ReasonRequest) -> StreamingResponse:
+    """
+    Derives intent and plan in one request, as server-sent events.
+    
+    Emits ``intent`` as soon as it is known, then ``plan``. With
+    ``execute_read_only``, a ``step`` event follows for each read-only
+    step run speculatively (other steps still go through
+    ``/execute/plan``). Ends with ``done``, or ``error`` on failure.
+    """
+    def events() -> Iterator[str]:
+        try:
+            for event, value in get_reasoning_service().reason(request.user_input, request.context):
+                yield _sse(event, value.model_dump())
+                if event == "plan" and request.execute_read_only:
+                    for result in get_plan_executor().execute_read_only(value):
+                        yield _sse("step", result.model_dump())
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+            return
+        yield _sse("done", {})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.post("/intent/derive", response_model=Intent)
 def derive_intent(request: IntentRequest):
     """
     Derives structured intent from user input using the reasoning service.
     """
-    return service.derive_intent(request.user_input, request.context)
+    return get_reasoning_service().derive_intent(request.user_input, request.context)
+
+@router.get("/intent/classifier/stats")
+def intent_classifier_stats() -> dict:
+    """
+    How often the embedding classifier answered without the LLM.
+    """
+    classifier = get_reasoning_service().intent_classifier
+    if classifier is None:
+        return {"enabled": False}
+    return {"enabled": True, **classifier.stats()}
 
 @router.post("/plan/generate", response_model=Plan)
 def generate_plan(request: PlanRequest):
     """
     Generates a plan based on the provided intent.
     """
-    return service.generate_plan(request.intent)
+    return get_reasoning_service().generate_plan(request.intent)
+
+@router.get("/plan/templates/stats")
+def plan_template_stats() -> dict:
+    """
+    How often plans were instantiated from learned templates.
+    """
+    templates = get_plan_template_store()
+    if templates is None:
+        return {"enabled": False}
+    return {"enabled": True, **templates.stats()}
 
 @router.post("/action/preview", response_model=ActionPreview)
 def preview_action(request: ActionPreviewRequest):
     """
     Previews the side effects of a plan step.
     """
-    return service.preview_action(request.plan_step)
+    return get_reasoning_service().preview_action(request.plan_step)
@@ -3,20 +3,12 @@ from typing import List, Optional
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-from opera.backend.services.embeddings import EmbeddingService
-from opera.backend.services.vector_store import VectorStore
+from opera.backend.services.memory_query import hybrid_search as run_hybrid_search
+from opera.backend.services.model_manager import ModelNotReady, get_model_manager
+from opera.backend.services.vector_store import get_vector_store
 
 router = APIRouter(prefix="/search", tags=["search"])
 
-# Initialize services
-try:
-    embedding_service = EmbeddingService()
-    vector_store = VectorStore()
-except ValueError as e:
-    embedding_service = None
-    vector_store = None
-    print(f"Warning: Search services not initialized: {e}")
-
 
 class SearchRequest(BaseModel):
     query: str
@@ -34,6 +26,12 @@ class SearchResult(BaseModel):
     similarity_score: float
 
 
+class HybridSearchResult(SearchResult):
+    fused_score: float
+    lexical_rank: Optional[int] = None
+    vector_rank: Optional[int] = None
+
+
 @router.post("/semantic", response_model=List[SearchResult])
 def semantic_search(request: SearchRequest):
     """
@@ -45,10 +43,15 @@ def semantic_search(request: SearchRequest):
     Returns:
         List of similar memories ranked by relevance
     """
-    if not embedding_service or not vector_store:
+    try:
+        embedding_service = get_model_manager().get("embeddings")
+        vector_store = get_vector_store()
+    except ModelNotReady as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except ValueError as e:
         raise HTTPException(
             status_code=503,
-            detail="Search service not available. Please configure OPENAI_API_KEY."
+            detail=f"Search service not available: {e}"
         )
     
     # Generate embedding for the query
@@ -60,11 +63,15 @@ def semantic_search(request: SearchRequest):
         filter_dict = {"type": request.memory_type}
     
     # Search vector store
-    results = vector_store.search_similar(
-        query_embedding=query_embedding,
-        n_results=request.limit,
-        filter_dict=filter_dict
-    )
+    try:
+        results = vector_store.search_similar(
+            query_embedding=query_embedding,
+            n_results=request.limit,
+            filter_dict=filter_dict
+        )
+    except Exception as e:
+        # e.g. an index built with another embedding model's dimension
+        raise HTTPException(status_code=503, detail=f"Vector search failed: {e}")
     
     # Format results
     formatted_results = []
@@ -81,3 +88,46 @@ def semantic_search(request: SearchRequest):
         ))
     
     return formatted_results
+
+
+@router.post("/hybrid", response_model=List[HybridSearchResult])
+def hybrid_search(request: SearchRequest):
+    """
+    Search memories with full-text keyword matching and semantic similarity combined.
+    
+    Both searches run in parallel and are merged with reciprocal rank
+    fusion, so exact names and rare terms surface alongside semantically
+    related memories. Falls back to keyword-only results when the
+    embedding service is unavailable.
+    """
+    try:
+        embedding_service = get_model_manager().get("embeddings")
+        vector_store = get_vector_store()
+    except Exception as e:
+        print(f"Warning: hybrid search running lexical-only: {e}")
+        embedding_service = None
+        vector_store = None
+    
+    results = run_hybrid_search(
+        request.query,
+        embedding_service,
+        vector_store,
+        memory_type=request.memory_type,
+        limit=request.limit
+    )
+    
+    return [
+        HybridSearchResult(
+            id=result['memory'].id,
+            content=result['memory'].content,
+            memory_type=result['memory'].type,
+            source=result['memory'].source,
+            timestamp=result['memory'].timestamp.isoformat(),
+            confidence=result['memory'].confidence,
+            similarity_score=result['similarity'] or 0.0,
+            fused_score=result['score'],
+            lexical_rank=result['lexical_rank'],
+            vector_rank=result['vector_rank']
+        )
+        for result in results
+    ]
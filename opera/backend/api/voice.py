@@ -4,7 +4,6 @@ from fastapi.responses import Response
 from pydantic import BaseModel
 from opera.backend.services.llm_client import get_llm_client
 from opera.backend.config import config
-from openai import OpenAI
 
 router = APIRouter(prefix="/voice", tags=["voice"])
 
@@ -25,6 +24,8 @@ async def speak(request: SpeakRequest):
     if not config.OPENAI_API_KEY:
         raise HTTPException(status_code=503, detail="OpenAI API key not configured")
     
+    from openai import OpenAI
+    
     try:
         client = OpenAI(api_key=config.OPENAI_API_KEY)
         
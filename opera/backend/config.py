@@ -19,12 +19,109 @@ class Config:
     LOCAL_MODEL_NAME = os.getenv("LOCAL_MODEL_NAME", "meta-llama/Llama-3.2-1B")
     LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
     MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "./models")
+    # Max seconds to wait for the next streamed token from a local model
+    LLM_STREAM_TIMEOUT_SECONDS = float(os.getenv("LLM_STREAM_TIMEOUT_SECONDS", "120"))
+    # Threads running local generations for async callers (0 = one per batch slot, or 1 unbatched)
+    LLM_OFFLOAD_WORKERS = int(os.getenv("LLM_OFFLOAD_WORKERS", "0"))
+    # Load models in the background at startup; requests wait at most this long for one
+    MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "true").lower() == "true"
+    MODEL_WAIT_TIMEOUT_SECONDS = float(os.getenv("MODEL_WAIT_TIMEOUT_SECONDS", "2"))
+    # Backoff before a request retries a failed model load (doubles per failure up to the max)
+    MODEL_RETRY_BASE_SECONDS = float(os.getenv("MODEL_RETRY_BASE_SECONDS", "30"))
+    MODEL_RETRY_MAX_SECONDS = float(os.getenv("MODEL_RETRY_MAX_SECONDS", "900"))
+    # Local model load profile: auto, fp32, bf16, int8 or onnx (see services/model_profiles.py);
+    # auto loads fp32 unless the startup benchmark picks a faster profile
+    LOCAL_MODEL_PROFILE = os.getenv("LOCAL_MODEL_PROFILE", "auto").lower()
+    # Torch intra-op / inter-op threads for local inference (0 = torch default)
+    LOCAL_TORCH_THREADS = int(os.getenv("LOCAL_TORCH_THREADS", "0"))
+    LOCAL_TORCH_INTEROP_THREADS = int(os.getenv("LOCAL_TORCH_INTEROP_THREADS", "0"))
+    # Time each profile at startup and report tokens/s (auto then picks the fastest, changing output)
+    LOCAL_MODEL_BENCHMARK = os.getenv("LOCAL_MODEL_BENCHMARK", "false").lower() == "true"
+    LOCAL_MODEL_BENCHMARK_PROFILES = os.getenv("LOCAL_MODEL_BENCHMARK_PROFILES", "fp32,bf16,int8")
+    LOCAL_MODEL_BENCHMARK_TOKENS = int(os.getenv("LOCAL_MODEL_BENCHMARK_TOKENS", "32"))
+    # Continuous batching of concurrent local completions
+    LOCAL_BATCH_ENABLED = os.getenv("LOCAL_BATCH_ENABLED", "true").lower() == "true"
+    LOCAL_BATCH_MAX_SIZE = int(os.getenv("LOCAL_BATCH_MAX_SIZE", "8"))
+    LOCAL_BATCH_MAX_WAIT_MS = float(os.getenv("LOCAL_BATCH_MAX_WAIT_MS", "10"))
+    # KV cache reuse for fixed system prompts in local generation
+    LOCAL_PREFIX_CACHE_ENABLED = os.getenv("LOCAL_PREFIX_CACHE_ENABLED", "true").lower() == "true"
+    LOCAL_PREFIX_CACHE_MAX_MB = float(os.getenv("LOCAL_PREFIX_CACHE_MAX_MB", "256"))
+    
+    # Embedding intent classifier answering confident intents without the LLM
+    INTENT_CLASSIFIER_ENABLED = os.getenv("INTENT_CLASSIFIER_ENABLED", "true").lower() == "true"
+    INTENT_CLASSIFIER_MIN_CONFIDENCE = float(os.getenv("INTENT_CLASSIFIER_MIN_CONFIDENCE", "0.8"))
+    INTENT_CLASSIFIER_MIN_SIMILARITY = float(os.getenv("INTENT_CLASSIFIER_MIN_SIMILARITY", "0.4"))
+    # LLM-labeled inputs at or above this confidence are learned by the classifier
+    INTENT_CLASSIFIER_LEARN_MIN_CONFIDENCE = float(os.getenv("INTENT_CLASSIFIER_LEARN_MIN_CONFIDENCE", "0.7"))
+    INTENT_CLASSIFIER_PATH = os.getenv("INTENT_CLASSIFIER_PATH", "./intent_classifier.npz")
+    
+    # Plan templates learned from LLM plans, keyed by intent category and parameter names
+    PLAN_TEMPLATES_ENABLED = os.getenv("PLAN_TEMPLATES_ENABLED", "true").lower() == "true"
+    PLAN_TEMPLATE_MAX_ENTRIES = int(os.getenv("PLAN_TEMPLATE_MAX_ENTRIES", "512"))
+    # Matching LLM plans needed before a template replaces the LLM call
+    PLAN_TEMPLATE_MIN_OBSERVATIONS = int(os.getenv("PLAN_TEMPLATE_MIN_OBSERVATIONS", "2"))
+    PLAN_TEMPLATE_MIN_CONFIDENCE = float(os.getenv("PLAN_TEMPLATE_MIN_CONFIDENCE", "0.8"))
+    
+    # LLM completion cache (calls above the max temperature are never cached)
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./llm_cache.db")
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+    LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "1024"))
+    LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+    LLM_CACHE_MAX_TEMPERATURE = float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0.5"))
+    
+    # Storage precision for embeddings kept in SQL: float32 or float16
+    EMBEDDING_STORAGE_DTYPE = os.getenv("EMBEDDING_STORAGE_DTYPE", "float32")
+    
+    # Embedding cache
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./embedding_cache.db")
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
+    
+    # Embedding micro-batching
+    EMBEDDING_BATCH_ENABLED = os.getenv("EMBEDDING_BATCH_ENABLED", "true").lower() == "true"
+    EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "64"))
+    EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5"))
+    
+    # Bulk ingestion
+    EMBEDDING_BULK_CHUNK_SIZE = int(os.getenv("EMBEDDING_BULK_CHUNK_SIZE", "256"))
+    VECTOR_UPSERT_BATCH_SIZE = int(os.getenv("VECTOR_UPSERT_BATCH_SIZE", "2000"))
     
     # Database
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./opera.db")
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    
+    # Near-duplicate detection at ingest
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_MODE = os.getenv("DEDUP_MODE", "flag").lower()  # "flag" or "merge"
+    DEDUP_SIMILARITY_THRESHOLD = float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", "0.8"))
+    DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+    DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", "16"))
+    
+    # Background job queue
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_POLL_INTERVAL_MS = int(os.getenv("JOB_POLL_INTERVAL_MS", "1000"))
+    JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+    JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "2"))
+    JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "600"))
+    # Hours to keep finished jobs for status lookups before deleting them (0 = keep forever)
+    JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "24"))
+    
+    # Vector index backend: "chroma" or "numpy" (in-process flat index)
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
+    # Holds one flat index folder per embedding model
+    FLAT_INDEX_DIR = os.getenv("FLAT_INDEX_DIR", "./vector_index")
     
     # ChromaDB
     CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
+    CHROMA_HOST = os.getenv("CHROMA_HOST", "")  # Set to use a Chroma server instead of local files
+    CHROMA_PORT = int(os.getenv("CHROMA_PORT", "8000"))
     
     # API
     API_HOST = os.getenv("API_HOST", "0.0.0.0")
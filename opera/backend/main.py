@@ -3,17 +3,55 @@
 This module creates the FastAPI app and includes API routers. It also
 exposes endpoints for health checks. This file can be served with
 ``uvicorn opera.backend.main:app --reload``.
+
+Importing this module only builds the app and its routers; heavy client
+libraries (OpenAI, ChromaDB, torch/transformers, requests) are imported
+when first used, and shared services are created in ``lifespan``. Run
+``python -m opera.backend.startup_profile`` to see where import time goes.
 """
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 
-from .api import memory, reasoning, search, execution, insights, agent, voice
+from .api import memory, reasoning, search, execution, insights, agent, voice, chat
+from .config import config
+from .services.async_memory_store import dispose as dispose_async_engine
+from .services.embeddings import close_embedding_service
+from .services.executor import get_plan_executor
+from .services.intent_classifier import close_intent_classifier
+from .services.job_queue import close_job_worker_pool
+from .services.llm_client import close_async_llm_client
+from .services.model_manager import get_model_manager
+from .services.reasoning_service import get_reasoning_service
+from .services.vector_store import close_vector_store
 
 # Import tools to register them
 from .tools import file_tools, memory_tools, web_tools  # noqa
 
 
-app = FastAPI(title="Opera Backend", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Create shared services on startup and release them on shutdown."""
+    # Models load on background threads while the database is prepared
+    if config.MODEL_PRELOAD:
+        get_model_manager().start()
+    memory.on_startup()
+    get_reasoning_service()
+    get_plan_executor()
+
+    yield
+
+    # Stop job workers, save classifier state and release LLM, embedding, vector store and database resources
+    close_job_worker_pool()
+    await close_async_llm_client()
+    close_intent_classifier()
+    close_embedding_service()
+    close_vector_store()
+    await dispose_async_engine()
+
+
+app = FastAPI(title="Opera Backend", version="0.1.0", lifespan=lifespan)
 
 # Include routers
 app.include_router(memory.router)
@@ -23,9 +61,26 @@ app.include_router(execution.router)
 app.include_router(insights.router)
 app.include_router(agent.router)
 app.include_router(voice.router)
+app.include_router(chat.router)
 
 
 @app.get("/health")
 def health_check() -> dict[str, str]:
     """Simple health check endpoint."""
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+def readiness_check(response: Response) -> dict:
+    """
+    Readiness check reporting each model's load state.
+    
+    Returns 503 until every model has loaded. If a model failed to load,
+    ``degraded`` is true and the check stays 503 while the app runs without
+    it (e.g. rule-based reasoning) and requests retry the load.
+    """
+    manager = get_model_manager()
+    ready = manager.ready()
+    if not ready:
+        response.status_code = 503
+    return {"ready": ready, "degraded": bool(manager.failed()), "models": manager.status()}
@@ -0,0 +1,147 @@
+"""Async variant of the memory store for event-loop callers.
+
+``async def`` code (the background reasoner, the autonomous agent and
+their routes) should use these functions instead of ``memory_store`` so
+database I/O is awaited rather than blocking the uvicorn event loop. Only
+reads are provided: inserts go through ``memory_store.add_memory`` so the
+deduplication and embedding hooks always run. They
+run against the same database as ``memory_store`` through SQLAlchemy's
+async engine (aiosqlite for SQLite, asyncpg for PostgreSQL).
+"""
+
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import event, func
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from ..config import config
+from ..models.memory import MemoryItem
+from .memory_store import DATABASE_URL, _set_sqlite_pragmas
+
+
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def _async_url(url: str) -> str:
+    """Swap a sync database URL's driver for its async counterpart."""
+    scheme, rest = url.split("://", 1)
+    dialect = scheme.split("+", 1)[0]
+    if dialect not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database '{dialect}'")
+    return f"{_ASYNC_DRIVERS[dialect]}://{rest}"
+
+
+def build_async_engine(url: str = DATABASE_URL) -> AsyncEngine:
+    """Create an async engine with the same tuning as the sync one."""
+    async_url = _async_url(url)
+    if url.startswith("sqlite"):
+        if url in ("sqlite://", "sqlite:///:memory:"):
+            return create_async_engine(async_url, echo=False, poolclass=StaticPool)
+
+        sqlite_engine = create_async_engine(
+            async_url,
+            echo=False,
+            connect_args={"timeout": config.SQLITE_BUSY_TIMEOUT_MS / 1000},
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_timeout=config.DB_POOL_TIMEOUT
+        )
+        event.listen(sqlite_engine.sync_engine, "connect", _set_sqlite_pragmas)
+        return sqlite_engine
+
+    return create_async_engine(
+        async_url,
+        echo=False,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_pre_ping=True
+    )
+
+
+async_engine = build_async_engine()
+
+
+@asynccontextmanager
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    """Async context manager that yields a session and ensures it's closed."""
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
+async def memories_since(
+    since: datetime,
+    memory_type: Optional[str] = None,
+    limit: Optional[int] = None,
+    newest_first: bool = False,
+) -> list[MemoryItem]:
+    """Retrieve memories with a timestamp after ``since``.
+
+    Ordered oldest first unless ``newest_first`` is set.
+    """
+    query = select(MemoryItem).where(MemoryItem.timestamp > since)
+    if memory_type:
+        query = query.where(MemoryItem.type == memory_type)
+    if newest_first:
+        query = query.order_by(MemoryItem.timestamp.desc(), MemoryItem.id.desc())
+    else:
+        query = query.order_by(MemoryItem.timestamp.asc(), MemoryItem.id.asc())
+    if limit is not None:
+        query = query.limit(limit)
+    async with get_async_session() as session:
+        return (await session.exec(query)).all()
+
+
+async def memories_by_type(
+    memory_type: str,
+    limit: Optional[int] = None,
+    newest_first: bool = True,
+) -> list[MemoryItem]:
+    """Retrieve memories of one type ordered by timestamp."""
+    order = MemoryItem.timestamp.desc() if newest_first else MemoryItem.timestamp.asc()
+    query = select(MemoryItem).where(MemoryItem.type == memory_type).order_by(order)
+    if limit is not None:
+        query = query.limit(limit)
+    async with get_async_session() as session:
+        return (await session.exec(query)).all()
+
+
+async def latest_memories(limit: int) -> list[MemoryItem]:
+    """Retrieve the ``limit`` most recent memories, newest first."""
+    query = (
+        select(MemoryItem)
+        .order_by(MemoryItem.timestamp.desc(), MemoryItem.id.desc())
+        .limit(limit)
+    )
+    async with get_async_session() as session:
+        return (await session.exec(query)).all()
+
+
+async def memories_after_id(memory_id: int, limit: Optional[int] = None) -> list[MemoryItem]:
+    """Retrieve memories inserted after the given id, in insertion order."""
+    query = select(MemoryItem).where(MemoryItem.id > memory_id).order_by(MemoryItem.id)
+    if limit is not None:
+        query = query.limit(limit)
+    async with get_async_session() as session:
+        return (await session.exec(query)).all()
+
+
+async def count_by_type() -> dict[str, int]:
+    """Return the number of memories of each type."""
+    query = select(MemoryItem.type, func.count()).group_by(MemoryItem.type)
+    async with get_async_session() as session:
+        return {memory_type: count for memory_type, count in await session.exec(query)}
+
+
+async def dispose() -> None:
+    """Close pooled async connections, e.g. on application shutdown."""
+    await async_engine.dispose()
@@ -3,8 +3,10 @@ import asyncio
 import random
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
-from opera.backend.services.memory_store import list_memories, add_memory
-from opera.backend.services.llm_client import get_llm_client
+from opera.backend.services.async_memory_store import (
+    count_by_type, latest_memories, memories_by_type, memories_since
+)
+from opera.backend.services.llm_client import get_async_llm_client
 from opera.backend.models.memory import MemoryItem
 
 
@@ -38,7 +40,7 @@ class AutonomousAgent:
     def __init__(self):
         self.llm = None
         try:
-            self.llm = get_llm_client()
+            self.llm = get_async_llm_client()
         except:
             print("Warning: LLM not available for autonomous agent")
         
@@ -104,95 +106,70 @@ class AutonomousAgent:
     
     async def _observe(self) -> Dict[str, Any]:
         """Observe the current state of memories and user behavior."""
-        memories = list_memories()
-        
+        # Only the last day and the latest goals are needed, so query just
+        # those rather than scanning every memory each cycle.
         observations = {
-            'total_memories': len(memories),
-            'recent_memories': [m for m in memories if m.timestamp > datetime.utcnow() - timedelta(hours=24)],
-            'goals': [m for m in memories if m.type == 'goal'],
+            'total_memories': sum((await count_by_type()).values()),
+            'recent_memories': await memories_since(datetime.utcnow() - timedelta(hours=24)),
+            'goals': list(reversed(await memories_by_type('goal', limit=2))),
             'current_time': datetime.utcnow(),
             'time_since_last_interaction': None  # TODO: track this
         }
         
         # Detect patterns
-        if memories:
-            memory_times = [m.timestamp.hour for m in memories[-20:]]
-            if memory_times:
-                observations['typical_active_hours'] = max(set(memory_times), key=memory_times.count)
+        latest = await latest_memories(20)
+        if latest:
+            memory_times = [m.timestamp.hour for m in latest]
+            observations['typical_active_hours'] = max(set(memory_times), key=memory_times.count)
         
         return observations
     
+    async def _reflect(self, prompt: str, type: str, priority: int,
+                       temperature: float, max_tokens: int) -> Optional[Thought]:
+        """Ask the LLM for one thought, or None if generation fails."""
+        try:
+            content = await self.llm.acomplete(
+                [{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=max_tokens
+            )
+        except Exception:
+            return None
+        return Thought(content=content, type=type, priority=priority)
+    
     async def _think(self, observations: Dict) -> List[Thought]:
         """Generate thoughts based on observations."""
-        thoughts = []
+        if not self.llm:
+            return []
+        
+        # Decide which thoughts to have first, then generate them concurrently
+        pending = []
         
         # Think about goals
-        if observations['goals']:
-            for goal in observations['goals'][-2:]:
-                if self.llm and random.random() < self.personality['curiosity']:
-                    prompt = f"Reflect briefly on this user goal: '{goal.content}'. What should I wonder about or check?"
-                    
-                    try:
-                        reflection = self.llm.complete(
-                            [{"role": "user", "content": prompt}],
-                            temperature=0.8,
-                            max_tokens=80
-                        )
-                        
-                        thoughts.append(Thought(
-                            content=reflection,
-                            type='question',
-                            priority=7
-                        ))
-                    except:
-                        pass
+        for goal in observations['goals'][-2:]:
+            if random.random() < self.personality['curiosity']:
+                prompt = f"Reflect briefly on this user goal: '{goal.content}'. What should I wonder about or check?"
+                pending.append(self._reflect(prompt, 'question', 7, temperature=0.8, max_tokens=80))
         
         # Think about recent activity
         if observations['recent_memories']:
-            if self.llm and random.random() < self.personality['proactiveness']:
+            if random.random() < self.personality['proactiveness']:
                 recent_content = [m.content for m in observations['recent_memories'][:3]]
                 prompt = f"Recent user activity: {recent_content}. Brief thought about what this suggests?"
-                
-                try:
-                    thought = self.llm.complete(
-                        [{"role": "user", "content": prompt}],
-                        temperature=0.7,
-                        max_tokens=60
-                    )
-                    
-                    thoughts.append(Thought(
-                        content=thought,
-                        type='observation',
-                        priority=5
-                    ))
-                except:
-                    pass
+                pending.append(self._reflect(prompt, 'observation', 5, temperature=0.7, max_tokens=60))
         
         # Spontaneous curiosity
-        if random.random() < 0.2 and self.llm:
+        if random.random() < 0.2:
             prompts = [
                 "What pattern might I be missing in the user's behavior?",
                 "What could the user benefit from right now?",
                 "Is there anything the user mentioned but hasn't followed up on?"
             ]
             prompt = random.choice(prompts)
-            
-            try:
-                thought = self.llm.complete(
-                    [{"role": "user", "content": prompt}],
-                    temperature=0.9,
-                    max_tokens=50
-                )
-                
-                thoughts.append(Thought(
-                    content=thought,
-                    type='intention',
-                    priority=4
-                ))
-            except:
-                pass
+            pending.append(self._reflect(prompt, 'intention', 4, temperature=0.9, max_tokens=50))
         
-        return thoughts
+        thoughts = await asyncio.gather(*pending)
+        return [thought for thought in thoughts if thought is not None]
     
     async def _decide(self, thoughts: List[Thought]) -> List[Dict]:
         """Make decisions about what to do with thoughts."""
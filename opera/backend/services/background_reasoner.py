@@ -1,9 +1,12 @@
 """Background reasoning service for proactive intelligence."""
 import asyncio
+from collections import Counter
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
-from opera.backend.services.memory_store import list_memories
-from opera.backend.services.llm_client import get_llm_client
+from opera.backend.services.async_memory_store import (
+    count_by_type, latest_memories, memories_after_id, memories_by_type, memories_since
+)
+from opera.backend.services.llm_client import get_async_llm_client
 from opera.backend.models.memory import MemoryItem
 
 
@@ -25,11 +28,16 @@ class BackgroundReasoner:
     def __init__(self):
         self.llm = None
         try:
-            self.llm = get_llm_client()
+            self.llm = get_async_llm_client()
         except:
             print("LLM not available for background reasoning")
         
         self.insights: List[Insight] = []
+        
+        # Running keyword counts for pattern detection, advanced
+        # incrementally past the last memory id already counted.
+        self._keyword_counts: Counter = Counter()
+        self._last_counted_id = 0
     
     async def run_periodic_analysis(self, interval_seconds: int = 300):
         """Run analysis every N seconds."""
@@ -45,14 +53,20 @@ class BackgroundReasoner:
         """Run all analysis tasks and generate insights."""
         new_insights = []
         
-        # Get all memories
-        memories = list_memories()
-        
-        # Run different analysis types
-        new_insights.extend(await self._detect_patterns(memories))
-        new_insights.extend(await self._track_goals(memories))
-        new_insights.extend(await self._find_connections(memories))
-        new_insights.extend(await self._suggest_actions(memories))
+        # Run different analysis types concurrently. Each one queries only
+        # the slice of memories it needs, so a cycle costs O(recent changes).
+        results = await asyncio.gather(
+            self._detect_patterns(),
+            self._track_goals(),
+            self._find_connections(),
+            self._suggest_actions(),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"Background analysis step failed: {result}")
+            else:
+                new_insights.extend(result)
         
         # Store insights
         self.insights.extend(new_insights)
@@ -62,20 +76,26 @@ class BackgroundReasoner:
         
         return new_insights
     
-    async def _detect_patterns(self, memories: List[MemoryItem]) -> List[Insight]:
+    async def _count_new_keywords(self) -> None:
+        """Fold memories added since the last cycle into the keyword counts."""
+        while True:
+            batch = await memories_after_id(self._last_counted_id, limit=1000)
+            if not batch:
+                return
+            for memory in batch:
+                words = set(memory.content.lower().split())
+                self._keyword_counts.update(word for word in words if len(word) > 4)  # Only meaningful words
+            self._last_counted_id = batch[-1].id
+    
+    async def _detect_patterns(self) -> List[Insight]:
         """Detect recurring patterns in memories."""
         insights = []
         
         # Group by content similarity (simple keyword matching)
-        patterns = {}
-        for memory in memories:
-            words = set(memory.content.lower().split())
-            for word in words:
-                if len(word) > 4:  # Only meaningful words
-                    patterns[word] = patterns.get(word, 0) + 1
+        await self._count_new_keywords()
         
         # Find frequent patterns
-        frequent = [(word, count) for word, count in patterns.items() if count >= 3]
+        frequent = [(word, count) for word, count in self._keyword_counts.items() if count >= 3]
         
         if frequent and self.llm:
             # Use LLM to generate insight
@@ -83,7 +103,7 @@ class BackgroundReasoner:
             prompt = f"Analyze these recurring topics in my memories: {top_patterns}. Give a brief insight about patterns you see."
             
             try:
-                insight_text = self.llm.complete(
+                insight_text = await self.llm.acomplete(
                     [{"role": "user", "content": prompt}],
                     temperature=0.7,
                     max_tokens=150
@@ -99,56 +119,55 @@ class BackgroundReasoner:
         
         return insights
     
-    async def _track_goals(self, memories: List[MemoryItem]) -> List[Insight]:
+    async def _track_goals(self) -> List[Insight]:
         """Track progress on stated goals."""
         insights = []
         
-        # Find goal memories
-        goals = [m for m in memories if m.type == "goal"]
+        # Find goal memories (last 3 goals)
+        goals = list(reversed(await memories_by_type("goal", limit=3)))
         
         if goals and self.llm:
-            # Check goal progress
-            for goal in goals[-3:]:  # Last 3 goals
-                # See if there are recent memories related to this goal
-                recent_memories = [
-                    m for m in memories 
-                    if m.timestamp > datetime.utcnow() - timedelta(days=7)
-                ]
+            # See if there are recent memories related to these goals
+            recent_memories = await memories_since(datetime.utcnow() - timedelta(days=7), limit=5)
+            
+            # Check progress on every goal concurrently
+            async def check(goal: MemoryItem) -> None:
+                prompt = f"Goal: {goal.content}\nRecent activity: {[m.content for m in recent_memories[:5]]}\nBrief progress update?"
                 
-                if recent_memories:
-                    prompt = f"Goal: {goal.content}\nRecent activity: {[m.content for m in recent_memories[:5]]}\nBrief progress update?"
+                try:
+                    update = await self.llm.acomplete(
+                        [{"role": "user", "content": prompt}],
+                        temperature=0.7,
+                        max_tokens=100
+                    )
                     
-                    try:
-                        update = self.llm.complete(
-                            [{"role": "user", "content": prompt}],
-                            temperature=0.7,
-                            max_tokens=100
-                        )
-                        
-                        insights.append(Insight(
-                            type="goal_tracking",
-                            message=f"Goal Update: {update}",
-                            priority="high",
-                            memories=[goal.id]
-                        ))
-                    except:
-                        pass
+                    insights.append(Insight(
+                        type="goal_tracking",
+                        message=f"Goal Update: {update}",
+                        priority="high",
+                        memories=[goal.id]
+                    ))
+                except Exception:
+                    pass
+            
+            if recent_memories:
+                await asyncio.gather(*(check(goal) for goal in goals))
         
         return insights
     
-    async def _find_connections(self, memories: List[MemoryItem]) -> List[Insight]:
+    async def _find_connections(self) -> List[Insight]:
         """Find interesting connections between memories."""
         insights = []
         
         # Simple heuristic: find memories with shared keywords
-        if len(memories) > 10 and self.llm:
+        if self.llm and sum((await count_by_type()).values()) > 10:
             # Take recent memories
-            recent = memories[-20:]
+            recent = list(reversed(await latest_memories(20)))
             
             prompt = f"Find an interesting connection between these memories:\n{[m.content for m in recent[:5]]}"
             
             try:
-                connection = self.llm.complete(
+                connection = await self.llm.acomplete(
                     [{"role": "user", "content": prompt}],
                     temperature=0.8,
                     max_tokens=120
@@ -164,19 +183,19 @@ class BackgroundReasoner:
         
         return insights
     
-    async def _suggest_actions(self, memories: List[MemoryItem]) -> List[Insight]:
+    async def _suggest_actions(self) -> List[Insight]:
         """Suggest proactive actions based on memory analysis."""
         insights = []
         
-        # Find preferences and suggest actions
-        preferences = [m for m in memories if m.type == "preference"]
+        # Find the latest preference and suggest actions
+        preferences = await memories_by_type("preference", limit=1)
         
         if preferences and self.llm:
             pref = preferences[-1]
             prompt = f"Based on this preference: '{pref.content}', suggest one proactive action I could take."
             
             try:
-                suggestion = self.llm.complete(
+                suggestion = await self.llm.acomplete(
                     [{"role": "user", "content": prompt}],
                     temperature=0.7,
                     max_tokens=100
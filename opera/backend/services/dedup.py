@@ -0,0 +1,343 @@
+"""Near-duplicate memory detection backed by an LSH index in the database.
+
+Every stored memory gets a MinHash signature (``memory_signature``) and
+one bucket row per LSH band (``memory_lsh``, indexed on band and bucket).
+On insert the new text's buckets are looked up to find candidates of the
+same type, whose signatures are compared against
+``DEDUP_SIMILARITY_THRESHOLD``. Depending on ``DEDUP_MODE`` a match is
+either flagged with ``duplicate_of`` after being inserted (the default) or
+merged into the existing memory, which records the duplicate's timestamp
+and source as a ``memory_occurrence`` row so recurring events keep every
+time they happened.
+"""
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import BigInteger, Column, Index, LargeBinary, delete, tuple_, update
+from sqlmodel import Field, Session, SQLModel, select
+
+from ..config import config
+from ..models.memory import MemoryItem
+from .embedding_store import MemoryEmbedding
+from .job_queue import Job, enqueue, notify_workers, register_handler
+from .memory_store import get_session
+from .minhash import from_bytes, get_minhasher, to_bytes
+
+
+DEDUPE_JOB = "dedupe_corpus"
+# Memories per dedupe job, small enough to finish well within a job lease
+DEDUPE_RANGE_SIZE = 500
+
+
+class MemorySignature(SQLModel, table=True):
+    """MinHash signature of a memory, plus its duplicate flag."""
+
+    __tablename__ = "memory_signature"
+
+    memory_id: int = Field(primary_key=True, foreign_key="memoryitem.id")
+    signature: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    duplicate_of: Optional[int] = Field(default=None, index=True)
+    similarity: Optional[float] = None
+
+
+class MemoryLSHBucket(SQLModel, table=True):
+    """One LSH band key of a memory's signature."""
+
+    __tablename__ = "memory_lsh"
+    __table_args__ = (Index("ix_memory_lsh_band_bucket", "band", "bucket"),)
+
+    memory_id: int = Field(primary_key=True, foreign_key="memoryitem.id")
+    band: int = Field(primary_key=True)
+    bucket: int = Field(sa_column=Column(BigInteger, nullable=False))
+
+
+class MemoryOccurrence(SQLModel, table=True):
+    """When and from where a duplicate merged into a memory was recorded."""
+
+    __tablename__ = "memory_occurrence"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    memory_id: int = Field(foreign_key="memoryitem.id", index=True)
+    timestamp: datetime
+    source: str
+
+
+def find_duplicate(
+    session: Session,
+    signature: np.ndarray,
+    memory_type: str,
+    threshold: Optional[float] = None,
+    exclude_id: Optional[int] = None,
+) -> Optional[Tuple[int, float]]:
+    """
+    Look up the most similar indexed memory of the same type.
+
+    Returns:
+        (memory_id, estimated similarity) of the best match at or above
+        ``threshold``, or None
+    """
+    threshold = config.DEDUP_SIMILARITY_THRESHOLD if threshold is None else threshold
+    keys = list(enumerate(get_minhasher().band_keys(signature)))
+
+    query = (
+        select(MemorySignature.memory_id, MemorySignature.signature)
+        .join(MemoryItem, MemoryItem.id == MemorySignature.memory_id)
+        .where(
+            MemorySignature.memory_id.in_(
+                select(MemoryLSHBucket.memory_id).where(
+                    tuple_(MemoryLSHBucket.band, MemoryLSHBucket.bucket).in_(keys)
+                )
+            ),
+            MemoryItem.type == memory_type
+        )
+    )
+    if exclude_id is not None:
+        query = query.where(MemorySignature.memory_id != exclude_id)
+
+    best = None
+    for memory_id, blob in session.exec(query):
+        similarity = get_minhasher().similarity(signature, from_bytes(blob))
+        if similarity >= threshold and (best is None or similarity > best[1]):
+            best = (memory_id, similarity)
+    return best
+
+
+def _register(
+    session: Session,
+    memory_id: int,
+    signature: np.ndarray,
+    match: Optional[Tuple[int, float]] = None,
+) -> None:
+    session.add(MemorySignature(
+        memory_id=memory_id,
+        signature=to_bytes(signature),
+        duplicate_of=match[0] if match else None,
+        similarity=match[1] if match else None
+    ))
+    session.add_all([
+        MemoryLSHBucket(memory_id=memory_id, band=band, bucket=bucket)
+        for band, bucket in enumerate(get_minhasher().band_keys(signature))
+    ])
+
+
+def _merge_into(session: Session, existing: MemoryItem, item: MemoryItem) -> None:
+    """Fold a duplicate's metadata into the memory that is kept."""
+    existing.confidence = max(existing.confidence, item.confidence)
+    session.add(existing)
+    session.add(MemoryOccurrence(memory_id=existing.id, timestamp=item.timestamp, source=item.source))
+    if item.id is not None:
+        # A stored duplicate hands over the occurrences merged into it
+        session.exec(
+            update(MemoryOccurrence)
+            .where(MemoryOccurrence.memory_id == item.id)
+            .values(memory_id=existing.id)
+        )
+
+
+def insert_deduplicated(
+    session: Session, items: Sequence[MemoryItem]
+) -> List[Tuple[MemoryItem, bool]]:
+    """
+    Add items to the session, resolving near-duplicates first.
+
+    Items are checked one at a time against the index, including earlier
+    items of the same batch. Nothing is committed.
+
+    Returns:
+        One (memory, merged) pair per input item: the new item with
+        ``merged=False``, or the existing memory it was merged into with
+        ``merged=True``
+    """
+    hasher = get_minhasher()
+    results = []
+    for item in items:
+        signature = hasher.signature(item.content)
+        match = find_duplicate(session, signature, item.type)
+
+        if match and config.DEDUP_MODE == "merge":
+            existing = session.get(MemoryItem, match[0])
+            _merge_into(session, existing, item)
+            results.append((existing, True))
+            continue
+
+        session.add(item)
+        session.flush()
+        _register(session, item.id, signature, match)
+        results.append((item, False))
+    return results
+
+
+def delete_memories(session: Session, memory_ids: Sequence[int]) -> None:
+    """Delete memories with their signatures, buckets, occurrences and stored embeddings."""
+    for model, column in (
+        (MemoryLSHBucket, MemoryLSHBucket.memory_id),
+        (MemorySignature, MemorySignature.memory_id),
+        (MemoryOccurrence, MemoryOccurrence.memory_id),
+        (MemoryEmbedding, MemoryEmbedding.memory_id),
+        (MemoryItem, MemoryItem.id),
+    ):
+        session.exec(delete(model).where(column.in_(memory_ids)))
+
+
+def _range_end(session: Session, after_id: int, size: int) -> Optional[int]:
+    """Id of the ``size``-th memory after ``after_id``, or None if fewer remain."""
+    return session.exec(
+        select(MemoryItem.id)
+        .where(MemoryItem.id > after_id)
+        .order_by(MemoryItem.id)
+        .offset(size - 1)
+        .limit(1)
+    ).first()
+
+
+def deduplicate_range(
+    after_id: int = 0,
+    through_id: Optional[int] = None,
+    on_commit: Optional[Callable[[Session, Dict[str, int]], None]] = None,
+) -> Dict[str, int]:
+    """
+    Backfill signatures for a range of memories and resolve their duplicates.
+
+    Memories are processed oldest id first, so the earliest copy is kept.
+    In ``merge`` mode later duplicates are deleted from the database and
+    the vector store, leaving their timestamp and source
+    as occurrences of the kept memory; in ``flag`` mode they are flagged.
+    Safe to rerun: memories that already have a signature are skipped.
+
+    Args:
+        after_id: Exclusive lower id bound
+        through_id: Inclusive upper id bound, or None for no bound
+        on_commit: Called with the session and the counts just before the
+            commit, so follow-up work lands in the same transaction
+
+    Returns:
+        Counts of ``scanned``, ``merged`` and ``flagged`` memories
+    """
+    hasher = get_minhasher()
+    query = (
+        select(MemoryItem)
+        .outerjoin(MemorySignature, MemorySignature.memory_id == MemoryItem.id)
+        .where(MemoryItem.id > after_id, MemorySignature.memory_id.is_(None))
+        .order_by(MemoryItem.id)
+    )
+    if through_id is not None:
+        query = query.where(MemoryItem.id <= through_id)
+
+    with get_session() as session:
+        items = session.exec(query).all()
+        removed = []
+        flagged = 0
+        for item in items:
+            signature = hasher.signature(item.content)
+            match = find_duplicate(session, signature, item.type, exclude_id=item.id)
+            if match and config.DEDUP_MODE == "merge":
+                existing = session.get(MemoryItem, match[0])
+                _merge_into(session, existing, item)
+                removed.append(item.id)
+            else:
+                _register(session, item.id, signature, match)
+                flagged += bool(match)
+            # Later items in the range must see this one's buckets
+            session.flush()
+
+        if removed:
+            delete_memories(session, removed)
+        counts = {"scanned": len(items), "merged": len(removed), "flagged": flagged}
+        if on_commit:
+            on_commit(session, counts)
+        session.commit()
+
+    if removed:
+        _remove_vectors(removed)
+    return counts
+
+
+def deduplicate_corpus(batch_size: int = DEDUPE_RANGE_SIZE) -> Dict[str, int]:
+    """
+    Run ``deduplicate_range`` over the whole corpus in this process.
+
+    Returns:
+        Counts of ``scanned``, ``merged`` and ``flagged`` memories
+    """
+    totals = {"scanned": 0, "merged": 0, "flagged": 0}
+    after_id: Optional[int] = 0
+    while after_id is not None:
+        with get_session() as session:
+            through_id = _range_end(session, after_id, batch_size)
+        counts = deduplicate_range(after_id, through_id)
+        totals = {name: totals[name] + counts[name] for name in totals}
+        after_id = through_id
+    return totals
+
+
+def _dedupe_key(run: str, after_id: int) -> str:
+    return f"dedupe:{run}:{after_id}"
+
+
+def queue_dedupe() -> Job:
+    """
+    Queue a deduplication of the existing corpus.
+
+    Each job covers ``DEDUPE_RANGE_SIZE`` memories, fixed by id when it is
+    queued, and queues the next range in the transaction that commits its
+    own. No job outlives its lease, and an interrupted run resumes at the
+    range it stopped in.
+
+    Returns:
+        The job for the first range
+    """
+    run = uuid.uuid4().hex
+    with get_session() as session:
+        through_id = _range_end(session, 0, DEDUPE_RANGE_SIZE)
+    return enqueue(
+        DEDUPE_JOB, {"run": run, "after_id": 0, "through_id": through_id}, key=_dedupe_key(run, 0)
+    )
+
+
+@register_handler(DEDUPE_JOB)
+def run_dedupe_job(payloads: List[Dict]) -> None:
+    """Job queue entry point: deduplicate one range and queue the next."""
+    for payload in payloads:
+        run = payload["run"]
+        through_id = payload["through_id"]
+        previous = payload.get("counts") or {"scanned": 0, "merged": 0, "flagged": 0}
+
+        def queue_next(session: Session, counts: Dict[str, int]) -> None:
+            totals = {name: previous[name] + counts[name] for name in previous}
+            if through_id is None:
+                print(
+                    f"Deduplicated corpus: scanned {totals['scanned']}, "
+                    f"merged {totals['merged']}, flagged {totals['flagged']}"
+                )
+                return
+            key = _dedupe_key(run, through_id)
+            # A retry of a range that already committed has queued its successor
+            if session.exec(select(Job.id).where(Job.key == key)).first() is not None:
+                return
+            enqueue(
+                DEDUPE_JOB,
+                {
+                    "run": run,
+                    "after_id": through_id,
+                    "through_id": _range_end(session, through_id, DEDUPE_RANGE_SIZE),
+                    "counts": totals
+                },
+                key=key,
+                session=session
+            )
+
+        deduplicate_range(payload["after_id"], through_id, on_commit=queue_next)
+    notify_workers()
+
+
+def _remove_vectors(memory_ids: Sequence[int]) -> None:
+    from .vector_store import get_vector_store
+
+    try:
+        vector_store = get_vector_store()
+        for memory_id in memory_ids:
+            vector_store.delete_memory(memory_id)
+    except Exception as e:
+        print(f"Warning: Failed to remove merged duplicates from the vector store: {e}")
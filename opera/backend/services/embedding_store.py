@@ -0,0 +1,166 @@
+"""Compact binary storage for memory embeddings.
+
+Embeddings live in their own ``memory_embedding`` table as little-endian
+float32 (or float16) blobs rather than JSON text on ``MemoryItem``. A
+1536-dim vector takes 6 KB (3 KB at float16) instead of ~30 KB of JSON,
+and reads are a zero-copy ``numpy.frombuffer`` instead of a parse.
+
+Each row records the embedding model that produced it, so an empty
+vector index for that model can be refilled from SQL without calling the
+model again.
+"""
+import json
+from typing import Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Column, LargeBinary, delete, inspect, text
+from sqlalchemy.engine import Engine
+from sqlmodel import Field, SQLModel, select
+
+from opera.backend.config import config
+from opera.backend.models.memory import MemoryItem
+from opera.backend.services.memory_store import engine, get_session
+from opera.backend.services.vector_store import active_embedding_model
+
+
+# Storage dtype name -> explicit little-endian NumPy dtype
+EMBEDDING_DTYPES = {
+    "float32": np.dtype("<f4"),
+    "float16": np.dtype("<f2"),
+}
+
+
+class MemoryEmbedding(SQLModel, table=True):
+    """Binary embedding vector for a memory item."""
+
+    __tablename__ = "memory_embedding"
+
+    memory_id: int = Field(primary_key=True, foreign_key="memoryitem.id")
+    dtype: str = "float32"
+    dim: int
+    model: Optional[str] = Field(default=None, index=True)  # None for vectors of unknown origin
+    vector: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+
+
+def upgrade_embedding_table(db_engine: Engine = engine) -> None:
+    """Add columns introduced after the ``memory_embedding`` table was created."""
+    columns = {column["name"] for column in inspect(db_engine).get_columns("memory_embedding")}
+    if "model" not in columns:
+        with db_engine.begin() as conn:
+            conn.execute(text("ALTER TABLE memory_embedding ADD COLUMN model VARCHAR"))
+            conn.execute(text("CREATE INDEX ix_memory_embedding_model ON memory_embedding (model)"))
+
+
+def pack_embedding(embedding: Sequence[float], dtype: Optional[str] = None) -> bytes:
+    """Encode a vector as a little-endian blob of the given storage dtype."""
+    dtype = dtype or config.EMBEDDING_STORAGE_DTYPE
+    return np.asarray(embedding, dtype=EMBEDDING_DTYPES[dtype]).tobytes()
+
+
+def unpack_embedding(blob: bytes, dtype: str = "float32") -> np.ndarray:
+    """View a stored blob as a read-only NumPy array without copying."""
+    return np.frombuffer(blob, dtype=EMBEDDING_DTYPES[dtype])
+
+
+def save_embeddings(
+    embeddings: Sequence[Tuple[int, Sequence[float]]],
+    dtype: Optional[str] = None,
+    model: Optional[str] = None,
+) -> None:
+    """Insert or replace embeddings for many memories in one transaction.
+
+    ``model`` names the embedding model that produced the vectors and
+    defaults to the configured one.
+    """
+    if not embeddings:
+        return
+    dtype = dtype or config.EMBEDDING_STORAGE_DTYPE
+    model = model or active_embedding_model()
+    ids = [memory_id for memory_id, _ in embeddings]
+
+    with get_session() as session:
+        session.exec(delete(MemoryEmbedding).where(MemoryEmbedding.memory_id.in_(ids)))
+        session.add_all([
+            MemoryEmbedding(
+                memory_id=memory_id,
+                dtype=dtype,
+                dim=len(embedding),
+                model=model,
+                vector=pack_embedding(embedding, dtype)
+            )
+            for memory_id, embedding in embeddings
+        ])
+        session.commit()
+
+
+def iter_embeddings(
+    model: Optional[str] = None,
+    batch_size: int = 1000,
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """Yield (memory_id, vector) for stored embeddings in memory id order.
+
+    Rows are streamed ``batch_size`` at a time and vectors are zero-copy
+    views of the blobs, so the whole table is never held in memory.
+
+    Args:
+        model: Only yield vectors produced by this embedding model
+        batch_size: Rows fetched per round trip
+    """
+    query = select(MemoryEmbedding.memory_id, MemoryEmbedding.dtype, MemoryEmbedding.vector)
+    if model is not None:
+        query = query.where(MemoryEmbedding.model == model)
+    query = query.order_by(MemoryEmbedding.memory_id).execution_options(yield_per=batch_size)
+    with get_session() as session:
+        for memory_id, dtype, blob in session.exec(query):
+            yield memory_id, unpack_embedding(blob, dtype)
+
+
+def migrate_json_embeddings(batch_size: int = 500) -> int:
+    """Move legacy JSON ``MemoryItem.embedding`` values into binary storage.
+
+    Each batch writes the blobs and clears the JSON column in one
+    transaction, so the migration can be interrupted and rerun safely.
+    Run ``VACUUM`` afterwards to return freed pages to the filesystem on
+    SQLite.
+
+    Returns:
+        Number of memories migrated
+    """
+    dtype = config.EMBEDDING_STORAGE_DTYPE
+    migrated = 0
+    last_id = 0
+
+    while True:
+        with get_session() as session:
+            items = session.exec(
+                select(MemoryItem)
+                .where(MemoryItem.id > last_id, MemoryItem.embedding.is_not(None))
+                .order_by(MemoryItem.id)
+                .limit(batch_size)
+            ).all()
+            if not items:
+                return migrated
+
+            parsed = []
+            for item in items:
+                try:
+                    parsed.append((item, json.loads(item.embedding)))
+                except (TypeError, ValueError):
+                    print(f"Warning: skipping unparseable embedding for memory {item.id}")
+
+            session.exec(delete(MemoryEmbedding).where(
+                MemoryEmbedding.memory_id.in_([item.id for item, _ in parsed])
+            ))
+            for item, embedding in parsed:
+                session.add(MemoryEmbedding(
+                    memory_id=item.id,
+                    dtype=dtype,
+                    dim=len(embedding),
+                    vector=pack_embedding(embedding, dtype)
+                ))
+                item.embedding = None
+                session.add(item)
+
+            session.commit()
+            migrated += len(parsed)
+            last_id = items[-1].id
@@ -1,48 +1,215 @@
 """Embedding service for generating vector representations of text."""
-from typing import List
-from openai import OpenAI
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
 from opera.backend.config import config
+from opera.backend.services.embedding_cache import EmbeddingCache, get_embedding_cache
 
 
-class EmbeddingService:
-    """Service for generating embeddings from text."""
-    
-    def __init__(self):
-        """Initialize the embedding service with OpenAI client."""
-        if not config.OPENAI_API_KEY:
-            raise ValueError("OPENAI_API_KEY not set in environment")
-        self.client = OpenAI(api_key=config.OPENAI_API_KEY)
-        self.model = config.OPENAI_EMBEDDING_MODEL
-    
+class EmbeddingBatcher:
+    """Coalesces concurrent single-text embedding requests into batches.
+
+    Callers block on a future while a worker thread collects requests for
+    up to ``max_wait_ms`` (or until ``max_batch_size`` is reached) and runs
+    them through one batched backend call.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        embed_batch: Callable[[List[str]], List[List[float]]],
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            embed_batch: Function that embeds a list of texts
+            max_batch_size: Largest batch sent to the backend
+            max_wait_ms: How long to wait for more requests before flushing
+        """
+        self.embed_batch = embed_batch
+        self.max_batch_size = max_batch_size or config.EMBEDDING_BATCH_MAX_SIZE
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else config.EMBEDDING_BATCH_MAX_WAIT_MS) / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, text: str) -> Future:
+        """Queue a text for embedding and return a future for its vector."""
+        future: Future = Future()
+        self._ensure_worker()
+        self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str) -> List[float]:
+        """Embed a single text, blocking until its batch completes."""
+        return self.submit(text).result()
+
+    def close(self) -> None:
+        """Flush pending requests and stop the worker thread."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put(self._STOP)
+            thread.join()
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="embedding-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        """Worker loop: gather a batch, embed it, fan results back out."""
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                return
+
+            batch: List[Tuple[str, Future]] = [item]
+            stop = False
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._flush(batch)
+            if stop:
+                return
+
+    def _flush(self, batch: List[Tuple[str, Future]]) -> None:
+        texts = [text for text, _ in batch]
+        try:
+            vectors = self.embed_batch(texts)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), vector in zip(batch, vectors):
+            future.set_result(vector)
+
+
+class BaseEmbeddingService:
+    """Shared caching front-end for embedding backends.
+
+    Subclasses set ``model_name`` and implement ``_embed`` for a list of
+    texts; single and batch calls both go through the embedding cache.
+    Single-text cache misses are coalesced by an ``EmbeddingBatcher``
+    when batching is enabled.
+    """
+
+    model_name: str
+    cache: Optional[EmbeddingCache] = None
+    batcher: Optional[EmbeddingBatcher] = None
+
+    def _init_batcher(self) -> None:
+        """Attach a micro-batcher if enabled in configuration."""
+        if config.EMBEDDING_BATCH_ENABLED:
+            self.batcher = EmbeddingBatcher(self._embed_and_store)
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        """Compute embeddings for texts without consulting the cache."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Flush pending batched requests and stop the batcher."""
+        if self.batcher is not None:
+            self.batcher.close()
+
     def generate_embedding(self, text: str) -> List[float]:
         """
         Generate an embedding vector for the given text.
-        
+
         Args:
             text: The text to embed
-            
+
         Returns:
             A list of floats representing the embedding vector
         """
-        response = self.client.embeddings.create(
-            model=self.model,
-            input=text
-        )
-        return response.data[0].embedding
-    
+        if self.batcher is None:
+            return self.generate_embeddings_batch([text])[0]
+
+        # Serve hits immediately rather than waiting out the batch window
+        if self.cache is not None:
+            cached = self.cache.get(self.model_name, text)
+            if cached is not None:
+                return cached
+        return self.batcher.embed(text)
+
     def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings for multiple texts in batch.
-        
+
+        Cached vectors are returned directly; only the misses are sent to
+        the backend, in a single call.
+
         Args:
             texts: List of texts to embed
-            
+
         Returns:
             List of embedding vectors
         """
         if not texts:
             return []
-        
+
+        if self.cache is None:
+            return self._embed(texts)
+
+        results = self.cache.get_many(self.model_name, texts)
+        missing = [i for i, vector in enumerate(results) if vector is None]
+
+        if missing:
+            embedded = self._embed_and_store([texts[i] for i in missing])
+            for i, vector in zip(missing, embedded):
+                results[i] = vector
+
+        return results
+
+    def _embed_and_store(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts known to be uncached and write them to the cache."""
+        # Embed each distinct text once even if it repeats in the batch
+        unique_texts = list(dict.fromkeys(texts))
+        embedded = dict(zip(unique_texts, self._embed(unique_texts)))
+        if self.cache is not None:
+            self.cache.put_many(self.model_name, unique_texts, list(embedded.values()))
+        return [embedded[text] for text in texts]
+
+
+class EmbeddingService(BaseEmbeddingService):
+    """Service for generating embeddings from text."""
+
+    def __init__(self):
+        """Initialize the embedding service with OpenAI client."""
+        from openai import OpenAI
+
+        if not config.OPENAI_API_KEY:
+            raise ValueError("OPENAI_API_KEY not set in environment")
+        self.client = OpenAI(api_key=config.OPENAI_API_KEY)
+        self.model = config.OPENAI_EMBEDDING_MODEL
+        self.model_name = self.model
+        self.cache = get_embedding_cache()
+        self._init_batcher()
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        """Call the OpenAI embeddings API for a batch of texts."""
         response = self.client.embeddings.create(
             model=self.model,
             input=texts
@@ -50,62 +217,51 @@ class EmbeddingService:
         return [item.embedding for item in response.data]
 
 
-class LocalEmbeddingService:
+class LocalEmbeddingService(BaseEmbeddingService):
     """Service for generating embeddings using local sentence-transformers."""
-    
+
     def __init__(self):
         """Initialize the local embedding service."""
         from sentence_transformers import SentenceTransformer
-        
+
         self.model_name = config.LOCAL_EMBEDDING_MODEL
         print(f"Loading local embedding model: {self.model_name}...")
         self.model = SentenceTransformer(
             self.model_name,
             cache_folder=config.MODEL_CACHE_DIR
         )
+        self.cache = get_embedding_cache()
+        self._init_batcher()
         print("Local embedding model loaded successfully")
-    
-    def generate_embedding(self, text: str) -> List[float]:
-        """
-        Generate an embedding vector for the given text using local model.
-        
-        Args:
-            text: The text to embed
-            
-        Returns:
-            A list of floats representing the embedding vector
-        """
-        embedding = self.model.encode(text, convert_to_numpy=True)
-        return embedding.tolist()
-    
-    def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
-        """
-        Generate embeddings for multiple texts in batch using local model.
-        
-        Args:
-            texts: List of texts to embed
-            
-        Returns:
-            List of embedding vectors
-        """
-        if not texts:
-            return []
-        
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        """Run the local model over a batch of texts."""
         embeddings = self.model.encode(texts, convert_to_numpy=True)
         return [emb.tolist() for emb in embeddings]
 
 
 # Global embedding service instance
 _embedding_service = None
+_embedding_service_lock = threading.Lock()
 
 def get_embedding_service():
     """Get or create the global embedding service based on configuration."""
     global _embedding_service
-    if _embedding_service is None:
-        if config.USE_LOCAL_MODEL:
-            print("Initializing local embedding service...")
-            _embedding_service = LocalEmbeddingService()
-        else:
-            print("Initializing OpenAI embedding service...")
-            _embedding_service = EmbeddingService()
-    return _embedding_service
+    with _embedding_service_lock:
+        if _embedding_service is None:
+            if config.USE_LOCAL_MODEL:
+                print("Initializing local embedding service...")
+                _embedding_service = LocalEmbeddingService()
+            else:
+                print("Initializing OpenAI embedding service...")
+                _embedding_service = EmbeddingService()
+        return _embedding_service
+
+
+def close_embedding_service() -> None:
+    """Stop the global embedding service's batcher, if one was created."""
+    global _embedding_service
+    with _embedding_service_lock:
+        if _embedding_service is not None:
+            _embedding_service.close()
+            _embedding_service = None
@@ -1,5 +1,7 @@
 """Plan executor for Opera."""
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, List, Dict, Any, Optional
+import threading
 from pydantic import BaseModel
 from opera.backend.models.reasoning import Plan, PlanStep
 from opera.backend.tools.registry import get_registry, ToolPermission
@@ -66,6 +68,31 @@ class PlanExecutor:
             steps=step_results
         )
     
+    def read_only_steps(self, plan: Plan) -> List[PlanStep]:
+        """Steps whose tool is registered and needs only read permission."""
+        steps = []
+        for step in plan.steps:
+            tool = self.registry.get(step.tool_name) if step.tool_name else None
+            if tool and set(tool.schema.permissions) <= {ToolPermission.READ}:
+                steps.append(step)
+        return steps
+    
+    def execute_read_only(self, plan: Plan, max_workers: int = 4) -> Iterator[ExecutionResult]:
+        """
+        Speculatively run a plan's read-only steps, e.g. before the user approves it.
+        
+        Steps run concurrently and results are yielded as they complete;
+        steps that write, delete or use the network are left for
+        ``execute_plan``.
+        """
+        steps = self.read_only_steps(plan)
+        if not steps:
+            return
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(steps))) as pool:
+            futures = [pool.submit(self.execute_step, step, [ToolPermission.READ]) for step in steps]
+            for future in as_completed(futures):
+                yield future.result()
+    
     def execute_step(
         self,
         step: PlanStep,
@@ -124,3 +151,16 @@ class PlanExecutor:
                 output=None,
                 error=str(e)
             )
+
+
+# Global plan executor instance
+_plan_executor: Optional[PlanExecutor] = None
+_plan_executor_lock = threading.Lock()
+
+def get_plan_executor() -> PlanExecutor:
+    """Get or create the global plan executor."""
+    global _plan_executor
+    with _plan_executor_lock:
+        if _plan_executor is None:
+            _plan_executor = PlanExecutor()
+        return _plan_executor
@@ -0,0 +1,345 @@
+"""Exact in-process vector index backed by memory-mapped NumPy arrays.
+
+An alternative to the Chroma-backed ``VectorStore`` for personal-scale
+corpora. Vectors are L2-normalized float32 rows in a memory-mapped file,
+deletes flip a tombstone bitmap, and search is one matrix-vector product
+followed by ``argpartition``. Memory type and source are stored as integer
+codes so metadata filters become boolean masks. Documents and full
+metadata live in a small SQLite table and are only read for the top hits.
+
+Each embedding model gets its own index directory under
+``FLAT_INDEX_DIR``. Files in the index directory:
+
+- ``header.json``: dimension, row count, capacity and filter vocabularies
+- ``vectors.f32``: ``capacity x dim`` float32 matrix
+- ``ids.i64``: memory id per row
+- ``alive.u1``: tombstone bitmap (1 = live row)
+- ``codes_<field>.i32``: vocabulary code per row for each filter field
+- ``docs.db``: content and metadata keyed by memory id
+"""
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from opera.backend.config import config
+
+
+FILTER_FIELDS = ("type", "source")
+_INITIAL_CAPACITY = 1024
+
+
+class FlatVectorStore:
+    """Exact cosine-similarity vector store with the ``VectorStore`` interface."""
+
+    def __init__(self, directory: Optional[str] = None, embedding_model: Optional[str] = None):
+        """
+        Open (or create) the index in ``directory``.
+
+        Args:
+            directory: Folder holding the index files; defaults to a
+                per-model folder under ``config.FLAT_INDEX_DIR``
+            embedding_model: Model whose vectors are stored; defaults to the
+                configured embedding model
+        """
+        if directory is None:
+            from opera.backend.services.vector_store import active_embedding_model, collection_name
+
+            # One folder per model, like Chroma's per-model collections, so a
+            # model switch starts an empty index instead of a dimension mismatch
+            embedding_model = embedding_model or active_embedding_model()
+            directory = os.path.join(config.FLAT_INDEX_DIR, collection_name(embedding_model))
+        self.embedding_model = embedding_model
+        self.directory = directory
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._masks: Dict[Tuple[str, int], np.ndarray] = {}
+
+        header_path = self._path("header.json")
+        if os.path.exists(header_path):
+            with open(header_path) as f:
+                header = json.load(f)
+        else:
+            header = {"dim": None, "count": 0, "capacity": 0, "vocab": {}}
+
+        self.dim: Optional[int] = header["dim"]
+        self.count: int = header["count"]
+        self.capacity: int = header["capacity"]
+        self.vocab: Dict[str, List[str]] = {
+            field: header["vocab"].get(field, []) for field in FILTER_FIELDS
+        }
+        self._codes = {
+            field: {value: code for code, value in enumerate(values)}
+            for field, values in self.vocab.items()
+        }
+
+        self._db = sqlite3.connect(self._path("docs.db"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            "memory_id INTEGER PRIMARY KEY, content TEXT NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+        self._slots: Dict[int, int] = {}
+        if self.capacity:
+            self._open_arrays()
+            live = np.flatnonzero(self.alive[:self.count])
+            self._slots = dict(zip(self.ids[live].tolist(), live.tolist()))
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _open_arrays(self) -> None:
+        """Map the array files at the current capacity."""
+        self.vectors = np.memmap(
+            self._path("vectors.f32"), dtype=np.float32, mode="r+",
+            shape=(self.capacity, self.dim)
+        )
+        self.ids = np.memmap(self._path("ids.i64"), dtype=np.int64, mode="r+", shape=(self.capacity,))
+        self.alive = np.memmap(self._path("alive.u1"), dtype=np.bool_, mode="r+", shape=(self.capacity,))
+        self.codes = {
+            field: np.memmap(
+                self._path(f"codes_{field}.i32"), dtype=np.int32, mode="r+",
+                shape=(self.capacity,)
+            )
+            for field in FILTER_FIELDS
+        }
+
+    def _ensure_capacity(self, needed: int) -> None:
+        """Grow the array files so at least ``needed`` rows fit. Caller holds the lock."""
+        if needed <= self.capacity:
+            return
+
+        new_capacity = max(self.capacity or _INITIAL_CAPACITY, _INITIAL_CAPACITY)
+        while new_capacity < needed:
+            new_capacity *= 2
+
+        if self.capacity:
+            self._flush_arrays()
+        sizes = {
+            "vectors.f32": 4 * self.dim,
+            "ids.i64": 8,
+            "alive.u1": 1,
+            **{f"codes_{field}.i32": 4 for field in FILTER_FIELDS},
+        }
+        for name, row_bytes in sizes.items():
+            # Extending the file zero-fills new rows, i.e. tombstoned
+            with open(self._path(name), "ab") as f:
+                f.truncate(new_capacity * row_bytes)
+
+        self.capacity = new_capacity
+        self._open_arrays()
+        self._masks.clear()
+
+    def _flush_arrays(self) -> None:
+        self.vectors.flush()
+        self.ids.flush()
+        self.alive.flush()
+        for codes in self.codes.values():
+            codes.flush()
+
+    def _write_header(self) -> None:
+        header = {
+            "dim": self.dim,
+            "count": self.count,
+            "capacity": self.capacity,
+            "vocab": self.vocab
+        }
+        tmp_path = self._path("header.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(header, f)
+        os.replace(tmp_path, self._path("header.json"))
+
+    def _code(self, field: str, value) -> int:
+        """Return the vocabulary code for a metadata value, adding it if new."""
+        value = "" if value is None else str(value)
+        code = self._codes[field].get(value)
+        if code is None:
+            code = len(self.vocab[field])
+            self.vocab[field].append(value)
+            self._codes[field][value] = code
+        return code
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def is_empty(self) -> bool:
+        """True if the index holds no live vectors."""
+        with self._lock:
+            return not self._slots
+
+    def add_memory(
+        self,
+        memory_id: int,
+        content: str,
+        embedding: List[float],
+        metadata: Dict
+    ) -> None:
+        """Add (or replace) a single memory."""
+        self.add_memories([memory_id], [content], [embedding], [metadata])
+
+    def add_memories(
+        self,
+        memory_ids: List[int],
+        contents: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict],
+        batch_size: Optional[int] = None
+    ) -> None:
+        """
+        Upsert many memories.
+
+        Existing ids are overwritten in place; new ids are appended.
+        ``batch_size`` is accepted for interface compatibility and ignored.
+        """
+        if not memory_ids:
+            return
+
+        matrix = self._normalize(np.asarray(embeddings, dtype=np.float32))
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = matrix.shape[1]
+            elif matrix.shape[1] != self.dim:
+                raise ValueError(
+                    f"Embedding dimension {matrix.shape[1]} does not match index dimension {self.dim}"
+                )
+
+            new_ids = [mid for mid in dict.fromkeys(memory_ids) if mid not in self._slots]
+            self._ensure_capacity(self.count + len(new_ids))
+            for memory_id in new_ids:
+                self._slots[memory_id] = self.count
+                self.count += 1
+
+            slots = np.array([self._slots[mid] for mid in memory_ids], dtype=np.int64)
+            self.vectors[slots] = matrix
+            self.ids[slots] = memory_ids
+            self.alive[slots] = True
+            for field in FILTER_FIELDS:
+                self.codes[field][slots] = [self._code(field, m.get(field)) for m in metadatas]
+            self._masks.clear()
+
+            self._db.executemany(
+                "INSERT OR REPLACE INTO docs (memory_id, content, metadata) VALUES (?, ?, ?)",
+                [
+                    (mid, content, json.dumps(meta))
+                    for mid, content, meta in zip(memory_ids, contents, metadatas)
+                ]
+            )
+            self._db.commit()
+            self._flush_arrays()
+            self._write_header()
+
+    def update_memory(
+        self,
+        memory_id: int,
+        content: str,
+        embedding: List[float],
+        metadata: Dict
+    ) -> None:
+        """Update an existing memory in the index."""
+        self.add_memories([memory_id], [content], [embedding], [metadata])
+
+    def delete_memory(self, memory_id: int) -> None:
+        """Tombstone a memory so it no longer appears in results."""
+        with self._lock:
+            slot = self._slots.pop(memory_id, None)
+            if slot is None:
+                return
+            self.alive[slot] = False
+            self.alive.flush()
+            self._db.execute("DELETE FROM docs WHERE memory_id = ?", (memory_id,))
+            self._db.commit()
+
+    def _filter_mask(self, filter_dict: Dict, n: int) -> np.ndarray:
+        """Build a boolean row mask from a Chroma-style equality filter. Caller holds the lock."""
+        if "$and" in filter_dict:
+            clauses = filter_dict["$and"]
+        else:
+            clauses = [{key: value} for key, value in filter_dict.items()]
+
+        mask = self.alive[:n].copy()
+        for clause in clauses:
+            for field, condition in clause.items():
+                if isinstance(condition, dict):
+                    if set(condition) != {"$eq"}:
+                        raise ValueError(f"Unsupported filter operator: {condition}")
+                    condition = condition["$eq"]
+                if field not in FILTER_FIELDS:
+                    raise ValueError(f"Unsupported filter field: {field}")
+
+                code = self._codes[field].get(str(condition))
+                if code is None:
+                    return np.zeros(n, dtype=bool)
+                key = (field, code)
+                if key not in self._masks:
+                    self._masks[key] = self.codes[field][:n] == code
+                mask &= self._masks[key]
+        return mask
+
+    def search_similar(
+        self,
+        query_embedding: List[float],
+        n_results: int = 10,
+        filter_dict: Optional[Dict] = None
+    ) -> List[Dict]:
+        """
+        Exact top-k cosine search.
+
+        Returns results in the same shape as ``VectorStore.search_similar``,
+        with ``distance`` as cosine distance.
+        """
+        query = self._normalize(np.asarray(query_embedding, dtype=np.float32))
+
+        with self._lock:
+            n = self.count
+            if not n or n_results <= 0:
+                return []
+            vectors = self.vectors[:n]
+            ids = self.ids[:n]
+            mask = self._filter_mask(filter_dict, n) if filter_dict else self.alive[:n]
+
+        scores = vectors @ query
+        scores = np.where(mask, scores, -np.inf)
+        k = min(n_results, int(np.count_nonzero(mask)))
+        if k == 0:
+            return []
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top_ids = ids[top].tolist()
+
+        with self._lock:
+            placeholders = ",".join("?" * len(top_ids))
+            rows = self._db.execute(
+                f"SELECT memory_id, content, metadata FROM docs WHERE memory_id IN ({placeholders})",
+                top_ids
+            ).fetchall()
+        docs = {memory_id: (content, metadata) for memory_id, content, metadata in rows}
+
+        results = []
+        for memory_id, score in zip(top_ids, scores[top].tolist()):
+            if memory_id not in docs:
+                continue
+            content, metadata = docs[memory_id]
+            results.append({
+                'id': int(memory_id),
+                'content': content,
+                'metadata': json.loads(metadata),
+                'distance': 1.0 - score
+            })
+        return results
+
+    def close(self) -> None:
+        """Flush arrays and close the document database."""
+        with self._lock:
+            if self.capacity:
+                self._flush_arrays()
+            self._write_header()
+            self._db.close()
@@ -0,0 +1,249 @@
+"""Database-native full-text search over memory content.
+
+On SQLite this maintains an FTS5 virtual table (``memory_fts``) that
+mirrors ``memoryitem`` through triggers; on PostgreSQL it uses a GIN
+expression index over ``to_tsvector(content)``. Either way ranking,
+snippet highlighting and type filtering run inside the database.
+
+Query syntax is the same on both backends:
+
+- ``word`` terms are ANDed together
+- ``"quoted text"`` matches a phrase
+- ``prefix*`` matches any word starting with ``prefix``
+
+With ``match_any`` the clauses are ORed instead, which suits
+natural-language queries such as the lexical side of hybrid search.
+"""
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlmodel import select
+
+from ..models.memory import MemoryItem
+from .memory_store import engine, get_session
+
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+
+_QUERY_TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_PREFIX_RE = re.compile(r"\w\*+$", re.UNICODE)
+
+_SQLITE_SETUP = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS memory_fts USING fts5(
+        content, type UNINDEXED,
+        content='memoryitem', content_rowid='id',
+        tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS memory_fts_ai AFTER INSERT ON memoryitem BEGIN
+        INSERT INTO memory_fts(rowid, content, type) VALUES (new.id, new.content, new.type);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS memory_fts_ad AFTER DELETE ON memoryitem BEGIN
+        INSERT INTO memory_fts(memory_fts, rowid, content, type)
+        VALUES ('delete', old.id, old.content, old.type);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS memory_fts_au AFTER UPDATE OF content, type ON memoryitem BEGIN
+        INSERT INTO memory_fts(memory_fts, rowid, content, type)
+        VALUES ('delete', old.id, old.content, old.type);
+        INSERT INTO memory_fts(rowid, content, type) VALUES (new.id, new.content, new.type);
+    END
+    """,
+]
+
+_POSTGRES_SETUP = [
+    "CREATE INDEX IF NOT EXISTS ix_memoryitem_content_fts "
+    "ON memoryitem USING GIN (to_tsvector('english', content))",
+]
+
+# Which implementation the current database supports; set by init_fulltext
+# or detected on first search.
+_backend: Optional[str] = None
+
+
+def init_fulltext(db_engine: Engine = engine) -> None:
+    """Create the full-text index and its sync triggers if missing."""
+    global _backend
+    dialect = db_engine.dialect.name
+
+    if dialect == "sqlite":
+        with db_engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = 'memory_fts'")
+            ).first()
+            try:
+                for statement in _SQLITE_SETUP:
+                    conn.execute(text(statement))
+            except OperationalError as e:
+                print(f"Warning: SQLite FTS5 unavailable, falling back to LIKE search: {e}")
+                _backend = "like"
+                return
+            if not exists:
+                # Index rows written before the table existed
+                conn.execute(text("INSERT INTO memory_fts(memory_fts) VALUES ('rebuild')"))
+        _backend = "fts5"
+    elif dialect == "postgresql":
+        with db_engine.begin() as conn:
+            for statement in _POSTGRES_SETUP:
+                conn.execute(text(statement))
+        _backend = "tsvector"
+    else:
+        _backend = "like"
+
+
+def _detect_backend() -> str:
+    global _backend
+    if _backend is None:
+        if engine.dialect.name == "postgresql":
+            _backend = "tsvector"
+        elif engine.dialect.name == "sqlite":
+            with engine.connect() as conn:
+                exists = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE name = 'memory_fts'")
+                ).first()
+            _backend = "fts5" if exists else "like"
+        else:
+            _backend = "like"
+    return _backend
+
+
+def _parse_query(query: str) -> List[Tuple[str, List[str], bool]]:
+    """Split a query into (kind, words, is_prefix) clauses.
+
+    ``kind`` is ``"phrase"`` or ``"term"``; punctuation inside terms is
+    dropped so user input can never inject backend query operators.
+    """
+    clauses = []
+    for phrase, term in _QUERY_TOKEN_RE.findall(query):
+        if phrase:
+            words = _WORD_RE.findall(phrase)
+            if words:
+                clauses.append(("phrase", words, False))
+        else:
+            words = _WORD_RE.findall(term)
+            for word in words:
+                clauses.append(("term", [word], False))
+            # Only a '*' attached to a word makes it a prefix; a bare one is dropped
+            if words and _PREFIX_RE.search(term):
+                clauses[-1] = ("term", words[-1:], True)
+    return clauses
+
+
+def to_fts5_query(query: str, match_any: bool = False) -> str:
+    """Translate the shared query syntax into an FTS5 MATCH expression."""
+    parts = []
+    for kind, words, is_prefix in _parse_query(query):
+        quoted = '"' + " ".join(words) + '"'
+        parts.append(quoted + "*" if is_prefix else quoted)
+    return (" OR " if match_any else " ").join(parts)
+
+
+def to_tsquery(query: str, match_any: bool = False) -> str:
+    """Translate the shared query syntax into a PostgreSQL to_tsquery string."""
+    parts = []
+    for kind, words, is_prefix in _parse_query(query):
+        if kind == "phrase":
+            parts.append("(" + " <-> ".join(words) + ")")
+        else:
+            parts.append(words[0] + (":*" if is_prefix else ""))
+    return (" | " if match_any else " & ").join(parts)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def to_like_patterns(query: str) -> List[str]:
+    """Translate the shared query syntax into LIKE patterns, one per clause.
+
+    ``%`` and ``_`` in the words are escaped, so patterns are used with
+    ``ESCAPE '\\'``.
+    """
+    return ["%" + _escape_like(" ".join(words)) + "%" for _, words, _ in _parse_query(query)]
+
+
+def search_fulltext(
+    query: str,
+    memory_type: Optional[str] = None,
+    limit: int = 10,
+    match_any: bool = False,
+) -> List[Tuple[MemoryItem, float, str]]:
+    """
+    Ranked full-text search over memory content.
+
+    Args:
+        query: Terms, "quoted phrases" and prefix* terms
+        memory_type: Only return memories of this type
+        limit: Maximum number of results
+        match_any: Match memories containing any clause rather than all
+
+    Returns:
+        List of (memory, score, snippet) with the best match first. Higher
+        scores are better; matches in ``snippet`` are wrapped in
+        ``<mark>`` tags.
+    """
+    backend = _detect_backend()
+    params = {"limit": limit, "memory_type": memory_type}
+    type_clause = "AND m.type = :memory_type" if memory_type else ""
+
+    if backend == "fts5":
+        params["match"] = to_fts5_query(query, match_any)
+        if not params["match"]:
+            return []
+        sql = f"""
+            SELECT m.id, -bm25(memory_fts) AS score,
+                   snippet(memory_fts, 0, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}', '…', 12) AS snippet
+            FROM memory_fts JOIN memoryitem m ON m.id = memory_fts.rowid
+            WHERE memory_fts MATCH :match {type_clause}
+            ORDER BY bm25(memory_fts)
+            LIMIT :limit
+        """
+    elif backend == "tsvector":
+        params["tsquery"] = to_tsquery(query, match_any)
+        if not params["tsquery"]:
+            return []
+        sql = f"""
+            SELECT m.id,
+                   ts_rank_cd(to_tsvector('english', m.content), q) AS score,
+                   ts_headline('english', m.content, q,
+                               'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxFragments=1') AS snippet
+            FROM memoryitem m, to_tsquery('english', :tsquery) q
+            WHERE to_tsvector('english', m.content) @@ q {type_clause}
+            ORDER BY score DESC
+            LIMIT :limit
+        """
+    else:
+        patterns = to_like_patterns(query)
+        if not patterns:
+            return []
+        like_clause = (" OR " if match_any else " AND ").join(
+            f"m.content LIKE :pattern{i} ESCAPE '\\'" for i in range(len(patterns))
+        )
+        params.update({f"pattern{i}": pattern for i, pattern in enumerate(patterns)})
+        sql = f"""
+            SELECT m.id, 1.0 AS score, m.content AS snippet
+            FROM memoryitem m
+            WHERE {like_clause} {type_clause}
+            ORDER BY m.timestamp DESC
+            LIMIT :limit
+        """
+
+    with get_session() as session:
+        rows = session.connection().execute(text(sql), params).all()
+        if not rows:
+            return []
+        items = {
+            item.id: item
+            for item in session.exec(select(MemoryItem).where(MemoryItem.id.in_([row.id for row in rows])))
+        }
+    return [(items[row.id], float(row.score), row.snippet) for row in rows if row.id in items]
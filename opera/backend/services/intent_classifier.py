@@ -0,0 +1,284 @@
+"""Nearest-centroid intent classifier over sentence embeddings.
+
+Sits between ``ReasoningService`` and the LLM. Each intent category is the
+normalized mean embedding of its labeled examples, so classifying an input
+is one embedding plus one ``categories x dim`` matrix-vector product. Only
+confident predictions are used; ambiguous inputs go to the LLM. The
+category the LLM assigns is then folded back into the centroid (a running
+sum per category), so routine phrasings stop reaching the LLM.
+
+Centroids are saved to ``INTENT_CLASSIFIER_PATH`` on shutdown and reloaded
+if the embedding model hasn't changed.
+"""
+import os
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from opera.backend.config import config
+from opera.backend.services.model_manager import get_model_manager
+
+
+# Labeled examples for the categories in ``INTENT_DERIVATION_PROMPT``
+SEED_EXAMPLES: Dict[str, List[str]] = {
+    "information_retrieval": [
+        "Find my notes from the design review",
+        "What is the wifi password at the office?",
+        "Search for the email about the contract renewal",
+        "When is my dentist appointment?",
+        "Where did I put the tax documents?",
+        "Look up what Sam said about the budget",
+        "Do I have anything saved about flight times?",
+        "Show me my old resume",
+    ],
+    "memory_storage": [
+        "Remember that my passport expires in March",
+        "Save this: the gate code is 4821",
+        "Store the fact that Alex prefers tea",
+        "Note that I parked on level 3",
+        "Keep in mind that the meeting moved to Tuesday",
+        "I want you to remember my sister's birthday is June 4",
+        "Add to my memories that I finished the marathon",
+    ],
+    "memory_management": [
+        "Delete all emails from last year",
+        "Remove the note about the old address",
+        "Forget what I told you about the surprise party",
+        "Erase my memories about the job search",
+        "Clear out the duplicate entries",
+        "Get rid of everything tagged draft",
+        "Wipe my browsing history memories",
+    ],
+    "content_creation": [
+        "Draft a new blog post about remote work",
+        "Write an email to the landlord about the leak",
+        "Create a packing list for the camping trip",
+        "Compose a thank-you note for my mentor",
+        "Help me write a cover letter",
+        "Make an agenda for Monday's meeting",
+        "Generate a tweet announcing the launch",
+    ],
+    "memory_modification": [
+        "Update the meeting time to 3pm",
+        "Change my address to 12 Oak Street",
+        "Edit the note about the project deadline",
+        "Correct my phone number, it ends in 42 not 24",
+        "Modify the reminder to include Sarah",
+        "My manager's name is actually Priya, fix that",
+        "Replace the old gym schedule with the new one",
+    ],
+    "summarization": [
+        "Summarize today's events",
+        "Give me a recap of this week",
+        "What happened in my meetings yesterday, briefly?",
+        "Sum up the notes from the conference",
+        "Give me the highlights of my emails",
+        "Summarise what I worked on last month",
+        "Overview of my progress on the reading goal",
+    ],
+    "general_inquiry": [
+        "Hello, how are you?",
+        "What can you do?",
+        "Tell me a joke",
+        "How does photosynthesis work?",
+        "Thanks, that's helpful",
+        "What's the capital of Australia?",
+        "Explain how compound interest works",
+    ],
+}
+
+# Cosine similarities are scaled before the softmax so a few hundredths of
+# similarity margin translate into a meaningful confidence gap
+_LOGIT_SCALE = 30.0
+
+
+class IntentPrediction(NamedTuple):
+    """Classifier output for one input."""
+    category: str
+    confidence: float
+    similarity: float
+    vector: np.ndarray
+    accepted: bool
+
+
+class IntentClassifier:
+    """Nearest-centroid classifier that learns from LLM-labeled inputs."""
+
+    def __init__(
+        self,
+        embed_batch: Callable[[List[str]], List[List[float]]],
+        model_name: str,
+        seeds: Optional[Dict[str, Sequence[str]]] = None,
+        path: Optional[str] = None,
+        min_confidence: Optional[float] = None,
+        min_similarity: Optional[float] = None
+    ):
+        """
+        Build centroids from saved state or by embedding the seed examples.
+
+        Args:
+            embed_batch: Function that embeds a list of texts
+            model_name: Embedding model; saved state from another model is ignored
+            seeds: Category to example texts (defaults to ``SEED_EXAMPLES``)
+            path: ``.npz`` file to load and save centroids, or None to not persist
+            min_confidence: Softmax probability needed to accept a prediction
+            min_similarity: Cosine similarity to the centroid needed to accept one
+        """
+        self.embed_batch = embed_batch
+        self.model_name = model_name
+        self.path = path
+        self.min_confidence = (
+            min_confidence if min_confidence is not None else config.INTENT_CLASSIFIER_MIN_CONFIDENCE
+        )
+        self.min_similarity = (
+            min_similarity if min_similarity is not None else config.INTENT_CLASSIFIER_MIN_SIMILARITY
+        )
+        self.accepted = 0
+        self.escalated = 0
+        self.learned = 0
+        self._lock = threading.Lock()
+
+        if not self._load():
+            self._fit(seeds or SEED_EXAMPLES)
+
+    def _fit(self, seeds: Dict[str, Sequence[str]]) -> None:
+        self.categories = list(seeds)
+        texts = [text for category in self.categories for text in seeds[category]]
+        vectors = self._normalize(np.asarray(self.embed_batch(texts), dtype=np.float32))
+
+        self._sums = np.zeros((len(self.categories), vectors.shape[1]), dtype=np.float64)
+        self._counts = np.zeros(len(self.categories), dtype=np.int64)
+        row = 0
+        for i, category in enumerate(self.categories):
+            n = len(seeds[category])
+            self._sums[i] = vectors[row:row + n].sum(axis=0)
+            self._counts[i] = n
+            row += n
+        self._update_centroids()
+
+    def _load(self) -> bool:
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with np.load(self.path) as state:
+                if str(state["model"]) != self.model_name:
+                    return False
+                self.categories = [str(c) for c in state["categories"]]
+                self._sums = state["sums"].astype(np.float64)
+                self._counts = state["counts"].astype(np.int64)
+        except Exception as e:
+            print(f"Warning: Could not load intent classifier state: {e}")
+            return False
+        self._update_centroids()
+        return True
+
+    def save(self) -> None:
+        """Write centroids to ``path`` (no-op without one)."""
+        if not self.path:
+            return
+        with self._lock:
+            sums, counts = self._sums.copy(), self._counts.copy()
+        tmp_path = self.path + ".tmp.npz"
+        np.savez(
+            tmp_path, model=self.model_name, categories=np.array(self.categories),
+            sums=sums, counts=counts
+        )
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _update_centroids(self) -> None:
+        # Swapped in whole, so predict() never sees a half-updated matrix
+        self._centroids = self._normalize(self._sums).astype(np.float32)
+
+    def predict(self, text: str) -> IntentPrediction:
+        """
+        Classify a text.
+
+        ``accepted`` is True when the prediction clears both thresholds and
+        can be used without asking the LLM.
+        """
+        vector = self._normalize(np.asarray(self.embed_batch([text])[0], dtype=np.float32))
+        centroids, categories = self._centroids, self.categories
+        similarities = centroids @ vector
+        logits = _LOGIT_SCALE * (similarities - similarities.max())
+        probabilities = np.exp(logits) / np.exp(logits).sum()
+
+        best = int(np.argmax(similarities))
+        confidence = float(probabilities[best])
+        similarity = float(similarities[best])
+        accepted = confidence >= self.min_confidence and similarity >= self.min_similarity
+        with self._lock:
+            if accepted:
+                self.accepted += 1
+            else:
+                self.escalated += 1
+        return IntentPrediction(categories[best], confidence, similarity, vector, accepted)
+
+    def learn(self, vector: np.ndarray, category: str) -> None:
+        """Add a labeled example's (normalized) embedding to its category."""
+        with self._lock:
+            if category not in self.categories:
+                self.categories.append(category)
+                self._sums = np.vstack([self._sums, np.zeros_like(self._sums[:1])])
+                self._counts = np.append(self._counts, 0)
+            i = self.categories.index(category)
+            self._sums[i] += vector
+            self._counts[i] += 1
+            self.learned += 1
+            self._update_centroids()
+
+    def stats(self) -> Dict:
+        """Accept/escalate counts and examples per category."""
+        total = self.accepted + self.escalated
+        return {
+            "accepted": self.accepted,
+            "escalated": self.escalated,
+            "accept_rate": self.accepted / total if total else 0.0,
+            "learned": self.learned,
+            "examples": dict(zip(self.categories, self._counts.tolist()))
+        }
+
+
+# Global intent classifier instance
+_intent_classifier: Optional[IntentClassifier] = None
+_intent_classifier_lock = threading.Lock()
+
+def get_intent_classifier(embedding_service=None) -> IntentClassifier:
+    """
+    Get or create the global intent classifier over the embedding model.
+
+    Args:
+        embedding_service: Embedding service to use when creating it; by
+            default it is fetched from the model manager
+
+    Raises:
+        ModelNotReady: If the embedding model is still loading
+    """
+    global _intent_classifier
+    with _intent_classifier_lock:
+        if _intent_classifier is None:
+            service = embedding_service or get_model_manager().get("embeddings")
+            _intent_classifier = IntentClassifier(
+                service.generate_embeddings_batch,
+                service.model_name,
+                path=config.INTENT_CLASSIFIER_PATH or None
+            )
+        return _intent_classifier
+
+
+def close_intent_classifier() -> None:
+    """Save the global intent classifier's centroids, if it was created."""
+    global _intent_classifier
+    with _intent_classifier_lock:
+        if _intent_classifier is not None:
+            try:
+                _intent_classifier.save()
+            except Exception as e:
+                print(f"Warning: Could not save intent classifier state: {e}")
+            _intent_classifier = None
@@ -0,0 +1,378 @@
+"""Durable background job queue stored in the application database.
+
+Jobs are rows in the ``job`` table, so they survive restarts and share
+transactions with the writes that create them. A worker claims a batch of
+due jobs by stamping them with a lease; if it crashes, the lease expires
+and another worker picks the jobs up. Failed jobs are retried with
+exponential backoff until ``max_attempts`` is reached. Finished jobs are
+kept for ``JOB_RETENTION_HOURS`` so their status can be looked up, then
+deleted by the workers.
+
+Handlers are registered per job kind::
+
+    @register_handler("embed_memory", batch_size=64)
+    def embed(payloads: List[dict]) -> None:
+        ...
+"""
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Index, and_, delete, or_, update
+from sqlmodel import Field, Session, SQLModel, select
+
+from ..config import config
+from .memory_store import engine, get_session
+
+
+JobHandler = Callable[[List[Dict[str, Any]]], None]
+
+# Seconds between retention sweeps by a worker pool
+_SWEEP_INTERVAL_SECONDS = 3600
+
+
+class Job(SQLModel, table=True):
+    """A unit of background work."""
+
+    __tablename__ = "job"
+    __table_args__ = (Index("ix_job_kind_status_run_at", "kind", "status", "run_at"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str
+    key: Optional[str] = Field(default=None, index=True)  # e.g. "memory:42", for status lookups
+    payload: str = "{}"
+    status: str = "pending"  # pending, running, done or failed
+    attempts: int = 0
+    max_attempts: int = 5
+    run_at: datetime = Field(default_factory=datetime.utcnow)
+    lease_owner: Optional[str] = None
+    lease_until: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+# Job kind -> (handler, max jobs per call)
+_handlers: Dict[str, Tuple[JobHandler, int]] = {}
+
+
+def register_handler(kind: str, batch_size: int = 1) -> Callable[[JobHandler], JobHandler]:
+    """Decorator registering the function that runs jobs of ``kind``.
+
+    The handler receives the payloads of up to ``batch_size`` jobs and
+    should raise if any of them could not be processed. The batch's jobs
+    are then rerun one at a time, so only the jobs that fail on their own
+    are charged a failed attempt; handlers must therefore be safe to run
+    twice on the same payload.
+    """
+    def decorator(func: JobHandler) -> JobHandler:
+        _handlers[kind] = (func, max(1, batch_size))
+        return func
+    return decorator
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds to wait before the next attempt after ``attempts`` failures."""
+    delay = config.JOB_RETRY_BASE_SECONDS * (2 ** max(0, attempts - 1))
+    return min(delay, config.JOB_RETRY_MAX_SECONDS)
+
+
+def enqueue_many(
+    kind: str,
+    jobs: Iterable[Tuple[Dict[str, Any], Optional[str]]],
+    session: Optional[Session] = None,
+    max_attempts: Optional[int] = None,
+) -> List[Job]:
+    """
+    Add several (payload, key) jobs of one kind.
+
+    Args:
+        kind: Job kind; must have a registered handler to run
+        jobs: (payload, key) pairs; ``key`` may be None
+        session: Add to this session without committing, so the jobs are
+            created atomically with the caller's other writes
+        max_attempts: Attempts before a job is marked failed
+
+    Returns:
+        The new jobs
+    """
+    max_attempts = max_attempts or config.JOB_MAX_ATTEMPTS
+    rows = [
+        Job(kind=kind, key=key, payload=json.dumps(payload), max_attempts=max_attempts)
+        for payload, key in jobs
+    ]
+    if session is not None:
+        session.add_all(rows)
+        return rows
+
+    with Session(engine, expire_on_commit=False) as own_session:
+        own_session.add_all(rows)
+        own_session.commit()
+    notify_workers()
+    return rows
+
+
+def enqueue(
+    kind: str,
+    payload: Dict[str, Any],
+    key: Optional[str] = None,
+    session: Optional[Session] = None,
+    max_attempts: Optional[int] = None,
+) -> Job:
+    """Add a single job; see ``enqueue_many``."""
+    return enqueue_many(kind, [(payload, key)], session=session, max_attempts=max_attempts)[0]
+
+
+def claim(kind: str, limit: int, lease_seconds: Optional[float] = None) -> List[Job]:
+    """Lease up to ``limit`` due jobs of ``kind`` for the calling worker.
+
+    Due jobs are pending ones whose ``run_at`` has passed and running ones
+    whose lease has expired. Running jobs that expire with no attempts
+    left are marked failed instead.
+    """
+    now = datetime.utcnow()
+    lease_until = now + timedelta(seconds=lease_seconds or config.JOB_LEASE_SECONDS)
+    expired = and_(Job.status == "running", Job.lease_until < now)
+    claimable = and_(
+        Job.kind == kind,
+        or_(
+            and_(Job.status == "pending", Job.run_at <= now),
+            and_(expired, Job.attempts < Job.max_attempts),
+        ),
+    )
+    token = uuid.uuid4().hex
+
+    with get_session() as session:
+        session.exec(
+            update(Job)
+            .where(Job.kind == kind, expired, Job.attempts >= Job.max_attempts)
+            .values(status="failed", lease_owner=None, last_error="Lease expired", updated_at=now)
+        )
+        ids = session.exec(
+            select(Job.id).where(claimable).order_by(Job.run_at, Job.id).limit(limit)
+        ).all()
+        if not ids:
+            session.commit()
+            return []
+
+        # Another worker may have claimed some of these since the select;
+        # the repeated condition makes the update skip them.
+        session.exec(
+            update(Job)
+            .where(Job.id.in_(ids), claimable)
+            .values(
+                status="running",
+                lease_owner=token,
+                lease_until=lease_until,
+                attempts=Job.attempts + 1,
+                updated_at=now,
+            )
+        )
+        session.commit()
+        return session.exec(
+            select(Job).where(Job.id.in_(ids), Job.lease_owner == token)
+        ).all()
+
+
+def complete(jobs: Sequence[Job]) -> None:
+    """Mark leased jobs done."""
+    _finish(jobs, status="done", error=None)
+
+
+def fail(jobs: Sequence[Job], error: str) -> None:
+    """Record a failed attempt, scheduling a retry unless attempts are exhausted."""
+    _finish(jobs, status=None, error=error)
+
+
+def _finish(jobs: Sequence[Job], status: Optional[str], error: Optional[str]) -> None:
+    now = datetime.utcnow()
+    with get_session() as session:
+        for job in jobs:
+            if status:
+                values = {"status": status}
+            elif job.attempts >= job.max_attempts:
+                values = {"status": "failed"}
+            else:
+                values = {
+                    "status": "pending",
+                    "run_at": now + timedelta(seconds=retry_delay(job.attempts)),
+                }
+            # Only the current lease holder may finish a job
+            session.exec(
+                update(Job)
+                .where(Job.id == job.id, Job.lease_owner == job.lease_owner)
+                .values(
+                    lease_owner=None,
+                    lease_until=None,
+                    last_error=error[:2000] if error else None,
+                    updated_at=now,
+                    **values,
+                )
+            )
+        session.commit()
+
+
+def purge_done_jobs(older_than_hours: Optional[float] = None) -> int:
+    """Delete jobs that finished successfully more than ``older_than_hours`` ago.
+
+    Failed jobs are kept so their errors stay visible.
+
+    Returns:
+        Number of jobs deleted
+    """
+    hours = older_than_hours if older_than_hours is not None else config.JOB_RETENTION_HOURS
+    cutoff = datetime.utcnow() - timedelta(hours=hours)
+    with get_session() as session:
+        result = session.exec(delete(Job).where(Job.status == "done", Job.updated_at < cutoff))
+        session.commit()
+        return result.rowcount
+
+
+def latest_jobs(keys: Sequence[str]) -> Dict[str, Job]:
+    """Return the most recently created job for each key; keys without jobs are omitted."""
+    if not keys:
+        return {}
+    with get_session() as session:
+        jobs = session.exec(
+            select(Job).where(Job.key.in_(keys)).order_by(Job.id)
+        ).all()
+    return {job.key: job for job in jobs}
+
+
+def run_pending(lease_seconds: Optional[float] = None) -> bool:
+    """Claim and run one batch of due jobs for any registered kind.
+
+    Returns:
+        True if a batch was run
+    """
+    for kind, (handler, batch_size) in list(_handlers.items()):
+        jobs = claim(kind, batch_size, lease_seconds)
+        if not jobs:
+            continue
+        try:
+            handler([json.loads(job.payload) for job in jobs])
+        except Exception as e:
+            if len(jobs) == 1:
+                print(f"Warning: {kind} job failed: {e}")
+                fail(jobs, str(e))
+            else:
+                print(f"Warning: {kind} job batch failed, retrying its jobs one at a time: {e}")
+                _run_each(kind, handler, jobs)
+        else:
+            complete(jobs)
+        return True
+    return False
+
+
+def _run_each(kind: str, handler: JobHandler, jobs: Sequence[Job]) -> None:
+    """Run jobs from a failed batch individually, failing only those that raise."""
+    for job in jobs:
+        try:
+            handler([json.loads(job.payload)])
+        except Exception as e:
+            print(f"Warning: {kind} job {job.id} failed: {e}")
+            fail([job], str(e))
+        else:
+            complete([job])
+
+
+class JobWorkerPool:
+    """Threads that poll the queue and run jobs."""
+
+    def __init__(self, num_workers: int, poll_interval: float):
+        """
+        Initialize the pool without starting it.
+
+        Args:
+            num_workers: Number of worker threads
+            poll_interval: Seconds an idle worker waits before polling again
+        """
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._sweep_lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def start(self) -> None:
+        """Start the worker threads if they aren't running."""
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self) -> None:
+        """Wake idle workers, e.g. after new jobs were committed."""
+        self._wake.set()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the workers after their current batch and wait for them."""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _sweep(self) -> None:
+        """Delete old finished jobs, at most once per sweep interval per pool."""
+        if not config.JOB_RETENTION_HOURS:
+            return
+        with self._sweep_lock:
+            now = time.monotonic()
+            if now < self._next_sweep:
+                return
+            self._next_sweep = now + _SWEEP_INTERVAL_SECONDS
+        purge_done_jobs()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if run_pending():
+                    continue
+                self._sweep()
+            except Exception as e:
+                print(f"Warning: job worker error: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+
+# Global worker pool instance
+_job_worker_pool: Optional[JobWorkerPool] = None
+_job_worker_pool_lock = threading.Lock()
+
+def get_job_worker_pool() -> JobWorkerPool:
+    """Get or create the global job worker pool (not started)."""
+    global _job_worker_pool
+    with _job_worker_pool_lock:
+        if _job_worker_pool is None:
+            _job_worker_pool = JobWorkerPool(
+                num_workers=config.JOB_WORKERS,
+                poll_interval=config.JOB_POLL_INTERVAL_MS / 1000
+            )
+        return _job_worker_pool
+
+
+def notify_workers() -> None:
+    """Wake the worker pool if one exists in this process."""
+    with _job_worker_pool_lock:
+        pool = _job_worker_pool
+    if pool is not None:
+        pool.notify()
+
+
+def close_job_worker_pool() -> None:
+    """Stop the global worker pool, e.g. on application shutdown."""
+    global _job_worker_pool
+    with _job_worker_pool_lock:
+        pool, _job_worker_pool = _job_worker_pool, None
+    if pool is not None:
+        # Jobs still running when this returns are picked up again once
+        # their lease expires
+        pool.stop(timeout=10)
@@ -0,0 +1,357 @@
+"""Response cache for LLM completions.
+
+``CachedLLMClient`` wraps any ``LLMClient`` and memoizes ``complete`` calls
+keyed on the model, the whitespace-normalized messages and the sampling
+parameters. Entries live in a small SQLite database with a TTL and
+least-recently-used eviction, fronted by an in-process LRU so repeated
+prompts are answered without touching disk. Calls above
+``LLM_CACHE_MAX_TEMPERATURE`` are passed straight through, since callers
+asking for high temperature want varied output.
+
+Each entry also records a prefix key covering everything but the last
+message (typically the system prompt and context), so every cached answer
+built on a given prompt prefix can be dropped at once with
+``invalidate_prefix``.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from opera.backend.config import config
+from opera.backend.services.embedding_cache import normalize_text
+from opera.backend.services.llm_client import LLMClient
+
+
+def _normalize_messages(messages: Sequence[Dict[str, str]]) -> List[Tuple[str, str]]:
+    return [(m["role"], normalize_text(m["content"])) for m in messages]
+
+
+def _digest(payload: Any) -> str:
+    data = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def prefix_key(model: str, messages: Sequence[Dict[str, str]]) -> str:
+    """Key shared by every prompt that starts with ``messages``."""
+    return _digest({"model": model, "messages": _normalize_messages(messages)})
+
+
+def completion_key(
+    model: str, messages: Sequence[Dict[str, str]], params: Dict[str, Any]
+) -> Tuple[str, str]:
+    """
+    Return (key, prefix key) for a completion request.
+
+    The key covers the model, every normalized message and the sampling
+    parameters; the prefix key covers the model and all but the last message.
+    """
+    prefix = prefix_key(model, messages[:-1])
+    key = _digest({
+        "prefix": prefix,
+        "last": _normalize_messages(messages[-1:]),
+        "params": params
+    })
+    return key, prefix
+
+
+class CompletionCache:
+    """SQLite-backed completion store with TTL, LRU eviction and an in-memory front."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        memory_entries: Optional[int] = None,
+    ):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: SQLite file path, or ":memory:" for a process-local cache
+            max_entries: Maximum number of stored completions before LRU eviction
+            ttl_seconds: Age after which an entry is ignored and replaced
+            memory_entries: Size of the in-process LRU in front of SQLite
+        """
+        self.path = path or config.LLM_CACHE_PATH
+        self.max_entries = max_entries or config.LLM_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else config.LLM_CACHE_TTL_SECONDS
+        self.memory_entries = memory_entries if memory_entries is not None else config.LLM_CACHE_MEMORY_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._memory: "OrderedDict[str, Tuple[str, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                prefix_key TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_llm_cache_last_used ON llm_cache (last_used)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_llm_cache_prefix_key ON llm_cache (prefix_key)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def _remember(self, key: str, prefix: str, response: str, created_at: float) -> None:
+        """Add to the in-memory LRU. Caller holds the lock."""
+        self._memory[key] = (prefix, response, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a fresh cached response, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[2] <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            row = self._conn.execute(
+                "SELECT prefix_key, response, created_at FROM llm_cache WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None or now - row[2] > self.ttl_seconds:
+                self._memory.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._remember(key, row[0], row[1], row[2])
+            self.hits += 1
+            return row[1]
+
+    def put(self, key: str, prefix: str, response: str) -> None:
+        """Store a response and evict old entries if needed."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, prefix_key, response, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, prefix, response, now, now)
+            )
+            self._conn.commit()
+            self._remember(key, prefix, response, now)
+            self._size = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            self._evict(now)
+
+    def record_bypass(self) -> None:
+        """Count a call that skipped the cache."""
+        with self._lock:
+            self.bypassed += 1
+
+    def delete(self, key: str) -> None:
+        """Drop one entry, e.g. a response the caller could not use."""
+        with self._lock:
+            self._memory.pop(key, None)
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._conn.commit()
+            self._size = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Drop every entry sharing a prefix key and return how many were removed."""
+        with self._lock:
+            for key in [k for k, entry in self._memory.items() if entry[0] == prefix]:
+                del self._memory[key]
+            removed = self._conn.execute(
+                "DELETE FROM llm_cache WHERE prefix_key = ?", (prefix,)
+            ).rowcount
+            self._conn.commit()
+            self._size -= removed
+            return removed
+
+    def _evict(self, now: float) -> None:
+        """Drop expired rows, then least recently used rows beyond ``max_entries``.
+
+        Caller holds the lock.
+        """
+        overflow = self._size - self.max_entries
+        if overflow <= 0:
+            return
+
+        self._conn.execute(
+            "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+        )
+        self._size = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        overflow = self._size - self.max_entries
+        if overflow > 0:
+            # Evict an extra 10% so we don't pay for eviction on every insert
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE rowid IN ("
+                "SELECT rowid FROM llm_cache ORDER BY last_used ASC LIMIT ?)",
+                (overflow + self.max_entries // 10,)
+            )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def clear(self) -> None:
+        """Remove every cached response and reset counters."""
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+            self.bypassed = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss/bypass counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": self._size,
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries
+        }
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def _model_id(client: LLMClient) -> str:
+    """
+    Best-effort model name for keying; local clients keep the torch model in ``model``.
+
+    A local client's load profile is part of the id, since the same model
+    loaded in fp32 and int8 gives different completions.
+    """
+    name = type(client).__name__
+    for attr in ("model_name", "model"):
+        value = getattr(client, attr, None)
+        if isinstance(value, str):
+            name = value
+            break
+    profile = getattr(client, "profile", None)
+    return f"{name}:{profile}" if isinstance(profile, str) else name
+
+
+class CachedLLMClient(LLMClient):
+    """LLMClient decorator that memoizes low-temperature completions."""
+
+    def __init__(
+        self,
+        client: LLMClient,
+        cache: Optional[CompletionCache] = None,
+        max_temperature: Optional[float] = None,
+    ):
+        """
+        Wrap a client.
+
+        Args:
+            client: The client that actually generates completions
+            cache: Completion store; defaults to a new ``CompletionCache``
+            max_temperature: Calls above this temperature bypass the cache
+        """
+        self.client = client
+        self.cache = cache or CompletionCache()
+        self.max_temperature = (
+            max_temperature if max_temperature is not None else config.LLM_CACHE_MAX_TEMPERATURE
+        )
+        self.model_id = _model_id(client)
+
+    def __getattr__(self, name: str) -> Any:
+        # Expose the wrapped client's attributes (model, tokenizer, ...)
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def _key(self, messages, temperature, max_tokens, kwargs) -> Tuple[str, str]:
+        params = {"temperature": temperature, "max_tokens": max_tokens, **kwargs}
+        return completion_key(self.model_id, messages, params)
+
+    def _cacheable(self, temperature: float) -> bool:
+        if temperature > self.max_temperature:
+            self.cache.record_bypass()
+            return False
+        return True
+
+    def complete(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        **kwargs
+    ) -> str:
+        """Return a cached completion or generate and store one."""
+        if not self._cacheable(temperature):
+            return self.client.complete(messages, temperature=temperature, max_tokens=max_tokens, **kwargs)
+
+        key, prefix = self._key(messages, temperature, max_tokens, kwargs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        response = self.client.complete(messages, temperature=temperature, max_tokens=max_tokens, **kwargs)
+        if response is not None:
+            self.cache.put(key, prefix, response)
+        return response
+
+    def stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        **kwargs
+    ) -> Iterator[str]:
+        """Replay a cached completion as one chunk, or stream and store a new one."""
+        if not self._cacheable(temperature):
+            yield from self.client.stream(messages, temperature=temperature, max_tokens=max_tokens, **kwargs)
+            return
+
+        key, prefix = self._key(messages, temperature, max_tokens, kwargs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks = []
+        for chunk in self.client.stream(messages, temperature=temperature, max_tokens=max_tokens, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        # Only reached if the stream ran to completion
+        self.cache.put(key, prefix, "".join(chunks))
+
+    def forget(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        **kwargs
+    ) -> None:
+        """Drop the cached completion for a request, e.g. after it failed to parse."""
+        key, _ = self._key(messages, temperature, max_tokens, kwargs)
+        self.cache.delete(key)
+
+    def invalidate_prefix(self, messages: List[Dict[str, str]]) -> int:
+        """Drop every cached completion whose prompt starts with exactly ``messages``."""
+        return self.cache.delete_prefix(prefix_key(self.model_id, messages))
+
+    def stats(self) -> Dict[str, float]:
+        """Return cache hit-rate statistics."""
+        return self.cache.stats()
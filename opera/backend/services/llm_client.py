@@ -1,7 +1,9 @@
 """LLM client abstraction for Opera."""
+import asyncio
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional, Iterator
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, List, Dict, Optional, Iterator
 from opera.backend.config import config
 
 
@@ -24,6 +26,8 @@ class OpenAIClient(LLMClient):
     
     def __init__(self, model: Optional[str] = None):
         """Initialize OpenAI client."""
+        from openai import OpenAI
+        
         if not config.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY not set in environment")
         self.client = OpenAI(api_key=config.OPENAI_API_KEY)
@@ -70,6 +74,7 @@ class OpenAIClient(LLMClient):
             messages: List of message dicts with 'role' and 'content'
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
+            **kwargs: ``top_k`` and ``top_p``, as for ``complete``
             
         Yields:
             Chunks of completion text
@@ -84,7 +89,8 @@ class OpenAIClient(LLMClient):
         )
         
         for chunk in response:
-            if chunk.choices[0].delta.content:
+            # Some chunks (e.g. usage reports) carry no choices
+            if chunk.choices and chunk.choices[0].delta.content:
                 yield chunk.choices[0].delta.content
 
 
@@ -92,9 +98,12 @@ class HuggingFaceClient(LLMClient):
     """Local Hugging Face model client for completely free inference."""
     
     def __init__(self, model: Optional[str] = None):
-        """Initialize Hugging Face pipeline."""
-        from transformers import pipeline, AutoTokenizer, AutoModelForCausalLM
+        """Initialize the tokenizer and model using the configured load profile."""
+        from transformers import AutoTokenizer
         import torch
+        from opera.backend.services.model_profiles import (
+            benchmark_profiles, configure_threads, load_causal_lm, resident_memory_mb, resolve_profile
+        )
         
         self.model_name = model or config.LOCAL_MODEL_NAME
         print(f"Loading local model: {self.model_name}...")
@@ -102,19 +111,53 @@ class HuggingFaceClient(LLMClient):
         # Determine device
         self.device = "mps" if torch.backends.mps.is_available() else "cpu"
         print(f"Using device: {self.device}")
+        configure_threads()
         
         # Load tokenizer and model
         self.tokenizer = AutoTokenizer.from_pretrained(
             self.model_name,
             cache_dir=config.MODEL_CACHE_DIR
         )
-        self.model = AutoModelForCausalLM.from_pretrained(
-            self.model_name,
-            cache_dir=config.MODEL_CACHE_DIR,
-            torch_dtype=torch.float16 if self.device == "mps" else torch.float32
-        ).to(self.device)
         
-        print(f"Model loaded successfully on {self.device}")
+        profile = resolve_profile(config.LOCAL_MODEL_PROFILE, self.device)
+        if config.LOCAL_MODEL_BENCHMARK and self.device == "cpu":
+            print("Benchmarking local model profiles...")
+            results = benchmark_profiles(
+                self.model_name, self.tokenizer, self.device,
+                [p.strip() for p in config.LOCAL_MODEL_BENCHMARK_PROFILES.split(",") if p.strip()]
+            )
+            timed = [r for r in results if "tokens_per_second" in r]
+            if config.LOCAL_MODEL_PROFILE == "auto" and timed:
+                profile = max(timed, key=lambda r: r["tokens_per_second"])["profile"]
+        
+        self.model, self.profile = load_causal_lm(self.model_name, self.device, profile)
+        
+        rss = resident_memory_mb()
+        memory = f", {rss:.0f} MB resident" if rss is not None else ""
+        print(f"Model loaded successfully on {self.device} ({self.profile}{memory})")
+        
+        from opera.backend.services.local_inference import ContinuousBatcher, PrefixCache
+        
+        # ONNX Runtime models manage their own KV cache, so batching and
+        # prefix reuse (which drive the torch model directly) are skipped.
+        reuses_kv = self.profile != "onnx"
+        
+        # KV caches of fixed system prompts, so only the rest gets prefilled
+        self.prefix_cache = None
+        if config.LOCAL_PREFIX_CACHE_ENABLED and reuses_kv:
+            self.prefix_cache = PrefixCache(self.model, self.device)
+        
+        # Concurrent complete() calls share one batched decode loop
+        self.batcher = None
+        if config.LOCAL_BATCH_ENABLED and reuses_kv:
+            self.batcher = ContinuousBatcher(
+                self.model, self.tokenizer, self.device, prefix_cache=self.prefix_cache
+            )
+    
+    def close(self) -> None:
+        """Finish queued batched generations and stop the batcher."""
+        if self.batcher is not None:
+            self.batcher.close()
     
     def _format_messages(self, messages: List[Dict[str, str]]) -> str:
         """Convert chat messages to a prompt string."""
@@ -131,6 +174,48 @@ class HuggingFaceClient(LLMClient):
         formatted += "Assistant:"
         return formatted
     
+    def warm_prefix(self, messages: List[Dict[str, str]]) -> None:
+        """
+        Precompute the KV cache for the leading system messages.
+        
+        Later prompts that start with the same system messages reuse it and
+        only prefill the rest. Requests only look prefixes up, so callers
+        register their fixed system prompts here ahead of time (see
+        ``ReasoningService``); other system prompts never fill the cache.
+        """
+        if self.prefix_cache is None:
+            return
+        system = []
+        for msg in messages:
+            if msg["role"] != "system":
+                break
+            system.append(msg)
+        if not system:
+            return
+        
+        text = self._format_messages(system)[:-len("Assistant:")]
+        # Leave out the last token in case it merges with what follows
+        prefix_ids = self.tokenizer(text)["input_ids"][:-1]
+        if prefix_ids not in self.prefix_cache:
+            self.prefix_cache.add(prefix_ids)
+    
+    @staticmethod
+    def _sampling_kwargs(kwargs: Dict) -> Dict:
+        """Caller overrides of top_k/top_p; unset ones keep the generation config's."""
+        return {name: kwargs[name] for name in ("top_k", "top_p") if kwargs.get(name) is not None}
+    
+    def _cached_prefix(self, messages: List[Dict[str, str]], inputs) -> Dict:
+        """Generate kwargs that resume from a cached prompt prefix, if any."""
+        if self.prefix_cache is None:
+            return {}
+        from transformers import DynamicCache
+        
+        prefix = self.prefix_cache.lookup(inputs["input_ids"][0].tolist())
+        if prefix is None:
+            return {}
+        # A fresh wrapper: generate() appends to it without touching the cached tensors
+        return {"past_key_values": DynamicCache.from_legacy_cache(prefix[1])}
+    
     def complete(
         self, 
         messages: List[Dict[str, str]], 
@@ -145,6 +230,8 @@ class HuggingFaceClient(LLMClient):
             messages: List of message dicts with 'role' and 'content'
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
+            **kwargs: ``top_k`` and ``top_p`` override the model's generation
+                config, batched or not
             
         Returns:
             The completion text
@@ -152,15 +239,26 @@ class HuggingFaceClient(LLMClient):
         import torch
         
         prompt = self._format_messages(messages)
+        sampling = self._sampling_kwargs(kwargs)
+        if self.batcher is not None:
+            return self.batcher.generate(
+                prompt,
+                max_new_tokens=max_tokens or 512,
+                temperature=temperature,
+                **sampling
+            )
+        
         inputs = self.tokenizer(prompt, return_tensors="pt").to(self.device)
         
         with torch.no_grad():
             outputs = self.model.generate(
                 **inputs,
+                **self._cached_prefix(messages, inputs),
                 max_new_tokens=max_tokens or 512,
                 temperature=temperature,
                 do_sample=temperature > 0,
-                pad_token_id=self.tokenizer.eos_token_id
+                pad_token_id=self.tokenizer.eos_token_id,
+                **sampling
             )
         
         response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
@@ -176,35 +274,280 @@ class HuggingFaceClient(LLMClient):
         **kwargs
     ) -> Iterator[str]:
         """
-        Stream a completion (simplified - returns full response for now).
+        Stream a completion token by token.
+        
+        ``model.generate`` runs on a worker thread and pushes decoded text
+        into a ``TextIteratorStreamer`` as each token is produced. If the
+        caller stops iterating early (e.g. the client disconnected),
+        generation is stopped at the next token.
         
         Args:
             messages: List of message dicts with 'role' and 'content'
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
+            **kwargs: ``top_k`` and ``top_p``, as for ``complete``
             
         Yields:
             Chunks of completion text
         """
-        # For now, return the full response as one chunk
-        # TODO: Implement proper streaming with TextIteratorStreamer
-        response = self.complete(messages, temperature, max_tokens, **kwargs)
-        yield response
+        import torch
+        from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+        
+        class _StopWhenCancelled(StoppingCriteria):
+            def __init__(self, cancelled: threading.Event):
+                self.cancelled = cancelled
+            
+            def __call__(self, input_ids, scores, **kwargs) -> bool:
+                return self.cancelled.is_set()
+        
+        prompt = self._format_messages(messages)
+        inputs = self.tokenizer(prompt, return_tensors="pt").to(self.device)
+        streamer = TextIteratorStreamer(
+            self.tokenizer,
+            skip_prompt=True,
+            skip_special_tokens=True,
+            timeout=config.LLM_STREAM_TIMEOUT_SECONDS
+        )
+        cached_prefix = self._cached_prefix(messages, inputs)
+        sampling = self._sampling_kwargs(kwargs)
+        cancelled = threading.Event()
+        errors: List[BaseException] = []
+        
+        def generate() -> None:
+            try:
+                with torch.no_grad():
+                    self.model.generate(
+                        **inputs,
+                        **cached_prefix,
+                        max_new_tokens=max_tokens or 512,
+                        temperature=temperature,
+                        do_sample=temperature > 0,
+                        pad_token_id=self.tokenizer.eos_token_id,
+                        streamer=streamer,
+                        stopping_criteria=StoppingCriteriaList([_StopWhenCancelled(cancelled)]),
+                        **sampling
+                    )
+            except BaseException as e:
+                errors.append(e)
+                # Unblock the consumer; generate() only ends the stream on success
+                streamer.end()
+        
+        thread = threading.Thread(target=generate, name="hf-generate", daemon=True)
+        thread.start()
+        try:
+            started = False
+            for text in streamer:
+                if not started:
+                    # Match complete(), which strips leading whitespace
+                    text = text.lstrip()
+                    started = bool(text)
+                if text:
+                    yield text
+        finally:
+            cancelled.set()
+            thread.join()
+        if errors:
+            raise errors[0]
+
 
+class AsyncLLMClient(ABC):
+    """Abstract base class for LLM clients used from ``async def`` code."""
+    
+    @abstractmethod
+    async def acomplete(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Generate a completion from messages without blocking the event loop."""
+        pass
+    
+    @abstractmethod
+    def astream(self, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        """Stream a completion from messages without blocking the event loop."""
+        pass
+    
+    async def aclose(self) -> None:
+        """Release connections or worker threads."""
+        pass
+
+
+class AsyncOpenAIClient(AsyncLLMClient):
+    """OpenAI API client on ``AsyncOpenAI``, sharing one pooled HTTP connection pool."""
+    
+    def __init__(self, model: Optional[str] = None):
+        """Initialize the async OpenAI client."""
+        from openai import AsyncOpenAI
+        
+        if not config.OPENAI_API_KEY:
+            raise ValueError("OPENAI_API_KEY not set in environment")
+        self.client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
+        self.model = model or config.OPENAI_MODEL
+    
+    async def acomplete(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        **kwargs
+    ) -> str:
+        """Generate a completion from messages; see ``OpenAIClient.complete``."""
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs
+        )
+        return response.choices[0].message.content
+    
+    async def astream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Stream a completion from messages; see ``OpenAIClient.stream``."""
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            **kwargs
+        )
+        
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    async def aclose(self) -> None:
+        """Close the pooled HTTP connections."""
+        await self.client.close()
+
+
+class ThreadedAsyncLLMClient(AsyncLLMClient):
+    """Async adapter that runs a blocking ``LLMClient`` on worker threads.
+    
+    Used for local models, where generation is CPU/GPU bound. With
+    continuous batching enabled the pool gets one thread per batch slot,
+    since its threads mostly wait on the shared decode loop; otherwise a
+    single thread, because unbatched generations on one model contend for
+    the same cores. ``LLM_OFFLOAD_WORKERS`` overrides either default.
+    Queued calls wait on the pool instead of blocking the event loop.
+    """
+    
+    def __init__(self, get_client: Callable[[], LLMClient], max_workers: Optional[int] = None):
+        """
+        Wrap a synchronous client.
+        
+        Args:
+            get_client: Returns the client whose ``complete``/``stream`` are
+                offloaded; called on a worker thread, so a model that is
+                still loading never blocks the event loop
+            max_workers: Number of generation threads
+        """
+        self.get_client = get_client
+        if not max_workers:
+            max_workers = config.LLM_OFFLOAD_WORKERS or (
+                config.LOCAL_BATCH_MAX_SIZE if config.LOCAL_BATCH_ENABLED else 1
+            )
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="llm-offload"
+        )
+    
+    async def acomplete(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """Run ``complete`` on a worker thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, lambda: self.get_client().complete(messages, **kwargs)
+        )
+    
+    async def astream(self, messages: List[Dict[str, str]], **kwargs) -> AsyncIterator[str]:
+        """Run ``stream`` on a worker thread and relay its chunks."""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        cancelled = threading.Event()
+        done = object()
+        
+        def produce() -> None:
+            try:
+                chunks = self.get_client().stream(messages, **kwargs)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+                return
+            try:
+                for chunk in chunks:
+                    if cancelled.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                # Closing on this thread stops local generation early
+                chunks.close()
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+        
+        future = loop.run_in_executor(self._executor, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            cancelled.set()
+            await asyncio.shield(future)
+    
+    async def aclose(self) -> None:
+        """Stop the worker threads once queued generations finish."""
+        self._executor.shutdown(wait=False)
 
 
 # Global LLM client instance
 _llm_client: Optional[LLMClient] = None
+_llm_client_lock = threading.Lock()
 
 def get_llm_client() -> LLMClient:
     """Get or create the global LLM client based on configuration."""
     global _llm_client
-    if _llm_client is None:
+    with _llm_client_lock:
+        if _llm_client is None:
+            if config.USE_LOCAL_MODEL:
+                print("Initializing local Hugging Face model...")
+                client = HuggingFaceClient()
+            else:
+                print("Initializing OpenAI client...")
+                client = OpenAIClient()
+            if config.LLM_CACHE_ENABLED:
+                from opera.backend.services.llm_cache import CachedLLMClient
+                client = CachedLLMClient(client)
+            _llm_client = client
+        return _llm_client
+
+
+# Global async LLM client instance
+_async_llm_client: Optional[AsyncLLMClient] = None
+
+def get_async_llm_client() -> AsyncLLMClient:
+    """Get or create the global async LLM client based on configuration.
+    
+    Local models reuse the synchronous client on worker threads, loading
+    it there on first use; OpenAI gets a native ``AsyncOpenAI`` client.
+    """
+    global _async_llm_client
+    if _async_llm_client is None:
         if config.USE_LOCAL_MODEL:
-            print("Initializing local Hugging Face model...")
-            _llm_client = HuggingFaceClient()
+            _async_llm_client = ThreadedAsyncLLMClient(get_llm_client)
         else:
-            print("Initializing OpenAI client...")
-            _llm_client = OpenAIClient()
-    return _llm_client
+            _async_llm_client = AsyncOpenAIClient()
+    return _async_llm_client
+
 
+async def close_async_llm_client() -> None:
+    """Close the global async LLM client, e.g. on application shutdown."""
+    global _async_llm_client
+    client, _async_llm_client = _async_llm_client, None
+    if client is not None:
+        await client.aclose()
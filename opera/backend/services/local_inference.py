@@ -0,0 +1,531 @@
+"""Continuous batching scheduler for local causal language models.
+
+``model.generate`` handles one prompt per call, so concurrent requests to
+the local model run one after another. ``ContinuousBatcher`` instead owns a
+single decode loop on a worker thread:
+
+- pending prompts are prefilled together (left-padded) and merged into the
+  running batch between decode steps, so new requests don't wait for the
+  current batch to drain;
+- every decode step advances all active sequences by one token, each with
+  its own sampling settings (temperature, top-k, top-p, as ``generate()``
+  applies them) and ``max_new_tokens``;
+- a sequence that emits EOS or reaches its limit is resolved immediately
+  and dropped from the batch, along with any KV-cache padding that only it
+  needed.
+
+``PrefixCache`` keeps the KV cache of fixed prompt prefixes (such as the
+intent and planning system prompts), keyed by their exact token ids, so a
+request starting with one only prefills its variable suffix.
+"""
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import torch
+from transformers import DynamicCache
+
+from opera.backend.config import config
+
+
+_Legacy = Tuple[Tuple[torch.Tensor, torch.Tensor], ...]
+_Prefix = Tuple[int, _Legacy]
+
+
+class _Request:
+    """One prompt waiting for, or taking part in, batched generation."""
+
+    def __init__(
+        self,
+        prompt_ids: List[int],
+        max_new_tokens: int,
+        temperature: float,
+        top_k: int = 0,
+        top_p: float = 1.0,
+        prefix: Optional[_Prefix] = None
+    ):
+        self.prompt_ids = prompt_ids
+        self.max_new_tokens = max_new_tokens
+        self.temperature = temperature
+        self.top_k = top_k
+        self.top_p = top_p
+        self.prefix = prefix
+        self.generated: List[int] = []
+        self.future: Future = Future()
+
+
+def _nbytes(cache: _Legacy) -> int:
+    return sum(t.numel() * t.element_size() for layer in cache for t in layer)
+
+
+class PrefixCache:
+    """Bounded LRU of precomputed KV caches for fixed prompt prefixes.
+
+    Entries are keyed by the exact token ids of the prefix and hold the
+    per-layer keys/values for a batch of one. Total tensor size is capped at
+    ``max_bytes``; least recently used prefixes are evicted first.
+    """
+
+    def __init__(self, model, device: str, max_bytes: Optional[int] = None):
+        """
+        Initialize an empty cache.
+
+        Args:
+            model: The causal LM whose KV cache is stored
+            device: Device the model lives on
+            max_bytes: Memory budget for cached keys and values
+        """
+        self.model = model
+        self.device = device
+        self.max_bytes = max_bytes or int(config.LOCAL_PREFIX_CACHE_MAX_MB * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[int, ...], _Legacy]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, prefix_ids: Sequence[int]) -> bool:
+        with self._lock:
+            return tuple(prefix_ids) in self._entries
+
+    def add(self, prefix_ids: Sequence[int]) -> None:
+        """Prefill ``prefix_ids`` and store its KV cache, evicting old prefixes if needed."""
+        key = tuple(prefix_ids)
+        if not key or key in self:
+            return
+        with torch.no_grad():
+            out = self.model(
+                input_ids=torch.tensor([key], device=self.device),
+                past_key_values=DynamicCache(),
+                use_cache=True
+            )
+        cache = out.past_key_values.to_legacy_cache()
+        size = _nbytes(cache)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = cache
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= _nbytes(evicted)
+
+    def lookup(self, prompt_ids: Sequence[int]) -> Optional[_Prefix]:
+        """
+        Find the longest cached prefix of a prompt.
+
+        At least one prompt token is always left uncovered, since the model
+        needs a fresh forward pass to produce the next-token logits.
+
+        Returns:
+            (prefix length, KV cache) or None
+        """
+        best = None
+        with self._lock:
+            for key in self._entries:
+                if (
+                    len(key) < len(prompt_ids)
+                    and (best is None or len(key) > len(best))
+                    and tuple(prompt_ids[:len(key)]) == key
+                ):
+                    best = key
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best)
+            self.hits += 1
+            return len(best), self._entries[best]
+
+    def clear(self) -> None:
+        """Drop every cached prefix."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and memory use."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes
+        }
+
+
+def _pad_cache(cache: _Legacy, length: int) -> _Legacy:
+    """Left-pad every layer's keys and values along the sequence axis."""
+    pad = length - cache[0][0].shape[2]
+    if pad <= 0:
+        return cache
+    return tuple(
+        tuple(
+            torch.cat([t.new_zeros(t.shape[0], t.shape[1], pad, t.shape[3]), t], dim=2)
+            for t in layer
+        )
+        for layer in cache
+    )
+
+
+def _pad_mask(mask: torch.Tensor, length: int) -> torch.Tensor:
+    pad = length - mask.shape[1]
+    if pad <= 0:
+        return mask
+    return torch.cat([mask.new_zeros(mask.shape[0], pad), mask], dim=1)
+
+
+class ContinuousBatcher:
+    """Runs concurrent generation requests through one shared decode loop.
+
+    Callers block on a future while a worker thread admits up to
+    ``max_batch_size`` sequences at a time. When idle, the worker waits up
+    to ``max_wait_ms`` after the first request so a burst is prefilled in
+    one forward pass.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        model,
+        tokenizer,
+        device: str,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        prefix_cache: Optional[PrefixCache] = None
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            model: A Hugging Face causal LM supporting ``DynamicCache``
+            tokenizer: The model's tokenizer
+            device: Device the model lives on
+            max_batch_size: Most sequences decoded together
+            max_wait_ms: How long an idle worker waits to fill the first batch
+            prefix_cache: Cached prompt prefixes to skip during prefill
+        """
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        self.prefix_cache = prefix_cache
+        self.max_batch_size = max_batch_size or config.LOCAL_BATCH_MAX_SIZE
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else config.LOCAL_BATCH_MAX_WAIT_MS) / 1000
+
+        eos = model.generation_config.eos_token_id
+        if eos is None:
+            eos = tokenizer.eos_token_id
+        self.eos_token_ids: Set[int] = set(eos if isinstance(eos, (list, tuple)) else [eos])
+        self.pad_token_id = tokenizer.pad_token_id
+        if self.pad_token_id is None:
+            self.pad_token_id = min(self.eos_token_ids)
+        # Sampling defaults, as generate() takes them from the generation config
+        self.top_k = model.generation_config.top_k or 0
+        top_p = model.generation_config.top_p
+        self.top_p = 1.0 if top_p is None else top_p
+
+        self.tokens_generated = 0
+        self.steps = 0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        """Drop the running batch. Only called from the worker thread."""
+        self._active: List[_Request] = []
+        self._cache: Optional[_Legacy] = None
+        self._mask: Optional[torch.Tensor] = None
+        self._next_tokens: Optional[torch.Tensor] = None
+        self._positions: Optional[torch.Tensor] = None
+
+    def submit(
+        self,
+        prompt: str,
+        max_new_tokens: int = 512,
+        temperature: float = 0.7,
+        top_k: Optional[int] = None,
+        top_p: Optional[float] = None
+    ) -> Future:
+        """
+        Queue a prompt and return a future for its completion text.
+
+        ``top_k`` and ``top_p`` default to the model's generation config;
+        a temperature of 0 decodes greedily and ignores both.
+        """
+        prompt_ids = self.tokenizer(prompt)["input_ids"]
+        request = _Request(
+            prompt_ids,
+            max_new_tokens=max(1, max_new_tokens),
+            temperature=temperature,
+            top_k=self.top_k if top_k is None else top_k,
+            top_p=self.top_p if top_p is None else top_p,
+            prefix=self.prefix_cache.lookup(prompt_ids) if self.prefix_cache else None
+        )
+        self._ensure_worker()
+        self._queue.put(request)
+        return request.future
+
+    def generate(
+        self,
+        prompt: str,
+        max_new_tokens: int = 512,
+        temperature: float = 0.7,
+        top_k: Optional[int] = None,
+        top_p: Optional[float] = None
+    ) -> str:
+        """Generate a completion, blocking until its sequence finishes."""
+        return self.submit(prompt, max_new_tokens, temperature, top_k, top_p).result()
+
+    def stats(self) -> dict:
+        """Return decode-loop counters; ``mean_batch_size`` is tokens per forward pass."""
+        return {
+            "tokens_generated": self.tokens_generated,
+            "steps": self.steps,
+            "mean_batch_size": self.tokens_generated / self.steps if self.steps else 0.0,
+            "active": len(self._active)
+        }
+
+    def close(self) -> None:
+        """Finish requests already queued, then stop the worker thread."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put(self._STOP)
+            thread.join()
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="local-llm-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def _collect(self) -> Tuple[List[_Request], bool]:
+        """Take queued requests for the free batch slots; block only when idle."""
+        incoming: List[_Request] = []
+        stop = False
+        free = self.max_batch_size - len(self._active)
+
+        if not self._active:
+            item = self._queue.get()
+            if item is self._STOP:
+                return incoming, True
+            incoming.append(item)
+            deadline = time.monotonic() + self.max_wait
+            while len(incoming) < free:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stop = True
+                    break
+                incoming.append(item)
+        else:
+            while len(incoming) < free:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stop = True
+                    break
+                incoming.append(item)
+
+        # Skip requests whose caller cancelled while they were queued
+        return [r for r in incoming if r.future.set_running_or_notify_cancel()], stop
+
+    def _run(self) -> None:
+        """Worker loop: admit new requests, decode one step, resolve finished ones."""
+        stopping = False
+        while True:
+            incoming: List[_Request] = []
+            if not stopping:
+                incoming, stopping = self._collect()
+            if not self._active and not incoming:
+                if stopping:
+                    return
+                continue
+
+            try:
+                with torch.no_grad():
+                    if incoming:
+                        self._prefill(incoming)
+                    else:
+                        self._decode()
+                self._retire()
+            except Exception as e:
+                for request in self._active + incoming:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                self._reset()
+
+    def _warp(self, logits: torch.Tensor, requests: List[_Request]) -> torch.Tensor:
+        """Scale and filter logits per row like generate()'s temperature, top-k and top-p warpers."""
+        temperatures = torch.tensor([r.temperature for r in requests], device=logits.device)
+        scores = logits.float() / temperatures.unsqueeze(-1)
+        vocab = scores.shape[-1]
+        top_k = [r.top_k if 0 < r.top_k < vocab else vocab for r in requests]
+        top_p = [r.top_p for r in requests]
+        if all(k == vocab for k in top_k) and all(p >= 1.0 for p in top_p):
+            return scores
+
+        sorted_scores, order = scores.sort(dim=-1, descending=True)
+        ranks = torch.arange(vocab, device=logits.device)
+        remove = ranks >= torch.tensor(top_k, device=logits.device).unsqueeze(-1)
+        # Top-p runs on the top-k survivors and always keeps the most likely token
+        probs = torch.softmax(sorted_scores.masked_fill(remove, float("-inf")), dim=-1)
+        p = torch.tensor(top_p, device=logits.device).unsqueeze(-1)
+        remove |= (probs.cumsum(dim=-1) - probs >= p) & (p < 1.0)
+        return scores.scatter(-1, order, sorted_scores.masked_fill(remove, float("-inf")))
+
+    def _sample(self, logits: torch.Tensor, requests: List[_Request]) -> torch.Tensor:
+        """Pick the next token per row: greedy at temperature 0, else sampled from the warped logits."""
+        tokens = logits.argmax(dim=-1)
+        rows = [i for i, request in enumerate(requests) if request.temperature > 0]
+        if rows:
+            index = torch.tensor(rows, device=logits.device)
+            scores = self._warp(logits[index], [requests[i] for i in rows])
+            probs = torch.softmax(scores, dim=-1)
+            tokens[index] = torch.multinomial(probs, 1).squeeze(-1)
+        return tokens
+
+    def _prefill(self, incoming: List[_Request]) -> None:
+        """Run the new prompts in one padded forward pass and merge them into the batch.
+
+        Rows with a cached prefix start from its KV cache and only feed their
+        remaining tokens. Each row's mask reads [pad, prefix, pad, suffix].
+        """
+        prefix_length = max((r.prefix[0] for r in incoming if r.prefix), default=0)
+        suffixes = [r.prompt_ids[r.prefix[0] if r.prefix else 0:] for r in incoming]
+        length = max(len(ids) for ids in suffixes)
+
+        input_ids = torch.full((len(incoming), length), self.pad_token_id, dtype=torch.long)
+        mask = torch.zeros((len(incoming), prefix_length + length), dtype=torch.long)
+        for row, (request, ids) in enumerate(zip(incoming, suffixes)):
+            input_ids[row, length - len(ids):] = torch.tensor(ids)
+            mask[row, prefix_length + length - len(ids):] = 1
+            if request.prefix:
+                mask[row, prefix_length - request.prefix[0]:prefix_length] = 1
+        input_ids = input_ids.to(self.device)
+        mask = mask.to(self.device)
+        position_ids = (mask.cumsum(-1) - 1).clamp(min=0)[:, prefix_length:]
+
+        past = DynamicCache()
+        if prefix_length:
+            template = next(r.prefix[1] for r in incoming if r.prefix)
+            rows = [
+                _pad_cache(r.prefix[1], prefix_length) if r.prefix else tuple(
+                    tuple(t.new_zeros(1, t.shape[1], prefix_length, t.shape[3]) for t in layer)
+                    for layer in template
+                )
+                for r in incoming
+            ]
+            past = DynamicCache.from_legacy_cache(tuple(
+                tuple(torch.cat(tensors, dim=0) for tensors in zip(*layers))
+                for layers in zip(*rows)
+            ))
+
+        out = self.model(
+            input_ids=input_ids,
+            attention_mask=mask,
+            position_ids=position_ids,
+            past_key_values=past,
+            use_cache=True
+        )
+        tokens = self._sample(out.logits[:, -1, :], incoming)
+        cache = out.past_key_values.to_legacy_cache()
+        positions = mask.sum(-1)
+        length = mask.shape[1]
+
+        if self._active:
+            length = max(length, self._mask.shape[1])
+            cache = tuple(
+                tuple(torch.cat([old, new], dim=0) for old, new in zip(old_layer, new_layer))
+                for old_layer, new_layer in zip(_pad_cache(self._cache, length), _pad_cache(cache, length))
+            )
+            mask = torch.cat([_pad_mask(self._mask, length), _pad_mask(mask, length)], dim=0)
+            tokens = torch.cat([self._next_tokens, tokens])
+            positions = torch.cat([self._positions, positions])
+            # Sequences already running keep their pending token; only the
+            # new rows record the token sampled from their prompt.
+            for request, token in zip(incoming, tokens[len(self._active):].tolist()):
+                request.generated.append(token)
+        else:
+            for request, token in zip(incoming, tokens.tolist()):
+                request.generated.append(token)
+
+        self.steps += 1
+        self.tokens_generated += len(incoming)
+        self._active = self._active + incoming
+        self._cache, self._mask = cache, mask
+        self._next_tokens, self._positions = tokens, positions
+
+    def _decode(self) -> None:
+        """Advance every active sequence by one token."""
+        mask = torch.cat([self._mask, self._mask.new_ones(self._mask.shape[0], 1)], dim=1)
+        out = self.model(
+            input_ids=self._next_tokens.unsqueeze(-1),
+            attention_mask=mask,
+            position_ids=self._positions.unsqueeze(-1),
+            past_key_values=DynamicCache.from_legacy_cache(self._cache),
+            use_cache=True
+        )
+        tokens = self._sample(out.logits[:, -1, :], self._active)
+        for request, token in zip(self._active, tokens.tolist()):
+            request.generated.append(token)
+
+        self.steps += 1
+        self.tokens_generated += len(self._active)
+        self._cache = out.past_key_values.to_legacy_cache()
+        self._mask = mask
+        self._next_tokens = tokens
+        self._positions = self._positions + 1
+
+    def _finished(self, request: _Request) -> bool:
+        return (
+            request.generated[-1] in self.eos_token_ids
+            or len(request.generated) >= request.max_new_tokens
+        )
+
+    def _retire(self) -> None:
+        """Resolve finished sequences and shrink the batch to the remaining ones."""
+        keep = []
+        for row, request in enumerate(self._active):
+            if not self._finished(request):
+                keep.append(row)
+                continue
+            text = self.tokenizer.decode(request.generated, skip_special_tokens=True)
+            request.future.set_result(text.strip())
+
+        if len(keep) == len(self._active):
+            return
+        if not keep:
+            self._reset()
+            return
+
+        index = torch.tensor(keep, device=self.device)
+        mask = self._mask.index_select(0, index)
+        # Drop leading columns that were padding for every remaining row
+        start = int((mask.sum(0) > 0).nonzero()[0])
+        self._mask = mask[:, start:]
+        self._cache = tuple(
+            tuple(t.index_select(0, index)[:, :, start:] for t in layer)
+            for layer in self._cache
+        )
+        self._next_tokens = self._next_tokens.index_select(0, index)
+        self._positions = self._positions.index_select(0, index)
+        self._active = [self._active[row] for row in keep]
+
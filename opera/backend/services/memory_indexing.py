@@ -0,0 +1,222 @@
+"""Background embedding of memories through the job queue.
+
+Creating a memory only commits its row plus an ``embed_memory`` job in
+the same transaction; job workers then generate embeddings in batches,
+upsert them into the vector store and save them in SQL. Per-memory
+progress is available through ``indexing_status``.
+"""
+from itertools import islice
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import String, and_, cast, exists, literal
+from sqlmodel import Session, select
+
+from ..config import config
+from ..models.memory import MemoryItem
+from .embedding_store import MemoryEmbedding, iter_embeddings, save_embeddings
+from .job_queue import Job, enqueue_many, latest_jobs, notify_workers, register_handler
+from .memory_store import get_memories, get_session
+
+
+EMBED_JOB = "embed_memory"
+_KEY_PREFIX = literal("memory:")
+
+
+def _job_key(memory_id: int) -> str:
+    return f"memory:{memory_id}"
+
+
+def vector_metadata(memory: MemoryItem) -> dict:
+    """Metadata stored alongside a memory's vector."""
+    return {
+        "type": memory.type,
+        "source": memory.source,
+        "timestamp": memory.timestamp.isoformat(),
+        "confidence": memory.confidence
+    }
+
+
+def enqueue_embedding(session: Session, items: Sequence[MemoryItem]) -> None:
+    """Queue embedding jobs for flushed items inside the caller's transaction.
+
+    Matches the memory store's ``on_insert`` hook signature. Workers are
+    woken via ``notify_workers`` once the caller commits.
+    """
+    enqueue_many(
+        EMBED_JOB,
+        [({"memory_id": item.id}, _job_key(item.id)) for item in items],
+        session=session
+    )
+
+
+def queue_reindex(memory_ids: Sequence[int]) -> None:
+    """Queue (re-)embedding for existing memories."""
+    enqueue_many(EMBED_JOB, [({"memory_id": memory_id}, _job_key(memory_id)) for memory_id in memory_ids])
+
+
+def queue_reindex_all(batch_size: int = 1000, embedded_with: Optional[str] = None) -> int:
+    """Queue embedding for every memory without a pending or running job.
+
+    Used to fill a new vector collection, e.g. after the embedding model
+    changed; the jobs also replace the old model's vectors in SQL.
+
+    Args:
+        batch_size: Memories queued per transaction
+        embedded_with: Skip memories whose stored embedding came from this model
+
+    Returns:
+        Number of memories queued
+    """
+    skip = [exists().where(
+        Job.key == _KEY_PREFIX.concat(cast(MemoryItem.id, String)),
+        Job.kind == EMBED_JOB,
+        Job.status.in_(("pending", "running"))
+    )]
+    if embedded_with is not None:
+        skip.append(exists().where(
+            MemoryEmbedding.memory_id == MemoryItem.id,
+            MemoryEmbedding.model == embedded_with
+        ))
+    queued = 0
+    last_id = 0
+    while True:
+        with get_session() as session:
+            ids = session.exec(
+                select(MemoryItem.id)
+                .where(MemoryItem.id > last_id, *[~condition for condition in skip])
+                .order_by(MemoryItem.id)
+                .limit(batch_size)
+            ).all()
+            if not ids:
+                return queued
+            enqueue_many(EMBED_JOB, [({"memory_id": i}, _job_key(i)) for i in ids], session=session)
+            session.commit()
+        notify_workers()
+        queued += len(ids)
+        last_id = ids[-1]
+
+
+def sync_vector_index(batch_size: int = 1000) -> Tuple[int, int]:
+    """Fill the vector index from SQL if it is empty.
+
+    A new index (e.g. after switching embedding models or losing the index
+    files) starts empty. Embeddings already stored in SQL for the current
+    model are loaded back into it; only the remaining memories are queued
+    for embedding. Run once at startup, before the job workers start, so
+    embed jobs can't make the index look filled.
+
+    Returns:
+        (memories restored from stored embeddings, memories queued)
+    """
+    from .vector_store import active_embedding_model, get_vector_store
+
+    vector_store = get_vector_store()
+    if not vector_store.is_empty():
+        return 0, 0
+
+    model = active_embedding_model()
+    restored = 0
+    stored = iter_embeddings(model=model, batch_size=batch_size)
+    while True:
+        chunk = dict(islice(stored, batch_size))
+        if not chunk:
+            break
+        # Embeddings of deleted memories are skipped
+        memories = get_memories(list(chunk))
+        vector_store.add_memories(
+            memory_ids=[m.id for m in memories],
+            contents=[m.content for m in memories],
+            embeddings=[chunk[m.id] for m in memories],
+            metadatas=[vector_metadata(m) for m in memories]
+        )
+        restored += len(memories)
+    return restored, queue_reindex_all(batch_size, embedded_with=model)
+
+
+def enqueue_unindexed(batch_size: int = 1000) -> int:
+    """Queue embedding for memories with neither an embedding nor a job.
+
+    Covers memories written before the queue existed or by code paths that
+    bypass it.
+
+    Returns:
+        Number of memories queued
+    """
+    queued = 0
+    last_id = 0
+    while True:
+        with get_session() as session:
+            ids = session.exec(
+                select(MemoryItem.id)
+                .outerjoin(MemoryEmbedding, MemoryEmbedding.memory_id == MemoryItem.id)
+                .outerjoin(Job, and_(Job.key == _KEY_PREFIX.concat(cast(MemoryItem.id, String)), Job.kind == EMBED_JOB))
+                .where(
+                    MemoryItem.id > last_id,
+                    MemoryEmbedding.memory_id.is_(None),
+                    Job.id.is_(None)
+                )
+                .order_by(MemoryItem.id)
+                .limit(batch_size)
+            ).all()
+            if not ids:
+                return queued
+            enqueue_many(EMBED_JOB, [({"memory_id": i}, _job_key(i)) for i in ids], session=session)
+            session.commit()
+        notify_workers()
+        queued += len(ids)
+        last_id = ids[-1]
+
+
+@register_handler(EMBED_JOB, batch_size=config.EMBEDDING_BULK_CHUNK_SIZE)
+def embed_memories(payloads: List[Dict[str, Any]]) -> None:
+    """Embed a batch of memories and write them to the vector store and SQL."""
+    from .embeddings import get_embedding_service
+    from .vector_store import get_vector_store
+
+    # Deleted memories have nothing left to index
+    memories = get_memories(list({payload["memory_id"] for payload in payloads}))
+    if not memories:
+        return
+
+    embedding_service = get_embedding_service()
+    vector_store = get_vector_store()
+
+    embeddings = embedding_service.generate_embeddings_batch([m.content for m in memories])
+    vector_store.add_memories(
+        memory_ids=[m.id for m in memories],
+        contents=[m.content for m in memories],
+        embeddings=embeddings,
+        metadatas=[vector_metadata(m) for m in memories]
+    )
+    save_embeddings([(m.id, embedding) for m, embedding in zip(memories, embeddings)])
+
+
+def indexing_status(memory_ids: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    Report embedding progress for memories.
+
+    Returns:
+        Dict keyed by memory id with ``status`` (``pending``, ``running``,
+        ``indexed``, ``failed`` or ``unindexed``), ``attempts`` and ``error``
+    """
+    jobs = latest_jobs([_job_key(memory_id) for memory_id in memory_ids])
+    with get_session() as session:
+        embedded = set(session.exec(
+            select(MemoryEmbedding.memory_id).where(MemoryEmbedding.memory_id.in_(memory_ids))
+        ).all())
+
+    report = {}
+    for memory_id in memory_ids:
+        job = jobs.get(_job_key(memory_id))
+        if job is not None and job.status != "done":
+            status = job.status
+        elif job is not None or memory_id in embedded:
+            status = "indexed"
+        else:
+            status = "unindexed"
+        report[memory_id] = {
+            "status": status,
+            "attempts": job.attempts if job else 0,
+            "error": job.last_error if job else None
+        }
+    return report
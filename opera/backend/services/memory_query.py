@@ -1,30 +1,114 @@
-"""Placeholder for advanced memory querying functions.
+"""Memory querying functions.
 
-This module will eventually provide semantic search over memories using
-embeddings and vector similarity. For now, it's a stub that
-performs simple filtering.
+Keyword search runs against the database full-text index; hybrid search
+fuses the same index with vector similarity. Keeping the lexical side in
+the database means every worker process sees every write.
 """
 
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from ..models.memory import MemoryItem
-from .memory_store import list_memories
+from .fulltext import search_fulltext
+from .memory_store import get_memories
+
+
+# Runs the lexical and vector halves of a hybrid query side by side
+_hybrid_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid-search")
 
 
 def search_memories(
     query: str, memory_type: Optional[str] = None, limit: int = 10
 ) -> List[MemoryItem]:
-    """Naive search implementation.
+    """Keyword search backed by the database full-text index.
 
-    Filters memories by type and returns those whose content contains
-    the query string (case-insensitive). In the future, this should
-    perform vector search on embeddings.
+    Supports plain terms, "quoted phrases" and prefix* terms; results are
+    ranked best match first. See ``fulltext.search_fulltext`` for scores
+    and highlighted snippets.
     """
-    query_lower = query.lower()
-    results: List[MemoryItem] = []
-    for mem in list_memories(memory_type):
-        if query_lower in mem.content.lower():
-            results.append(mem)
-        if len(results) >= limit:
-            break
-    return results
\ No newline at end of file
+    return [item for item, _, _ in search_fulltext(query, memory_type=memory_type, limit=limit)]
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[int]], k: int = 60
+) -> List[Tuple[int, float]]:
+    """Merge ranked id lists with reciprocal rank fusion.
+
+    Each id scores ``sum(1 / (k + rank))`` over the lists it appears in,
+    with ranks starting at 1.
+    """
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, memory_id in enumerate(ranking, start=1):
+            scores[memory_id] = scores.get(memory_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def hybrid_search(
+    query: str,
+    embedding_service,
+    vector_store,
+    memory_type: Optional[str] = None,
+    limit: int = 10,
+    candidates: Optional[int] = None,
+) -> List[Dict]:
+    """Full-text plus vector search merged with reciprocal rank fusion.
+
+    Both retrievers run concurrently and each contributes ``candidates``
+    hits (default ``2 * limit``) to the fusion. If the vector side is
+    unavailable (``embedding_service`` or ``vector_store`` is None, or the
+    query fails) results come from full-text search alone. The lexical side
+    matches memories containing any of the query's terms.
+
+    Returns:
+        Up to ``limit`` dicts with ``memory``, ``score``, ``lexical_rank``,
+        ``vector_rank`` and ``similarity`` keys.
+    """
+    candidates = candidates or limit * 2
+
+    def lexical() -> List[Tuple[int, float]]:
+        hits = search_fulltext(query, memory_type=memory_type, limit=candidates, match_any=True)
+        return [(memory.id, score) for memory, score, _ in hits]
+
+    def vector() -> List[Dict]:
+        query_embedding = embedding_service.generate_embedding(query)
+        filter_dict = {"type": memory_type} if memory_type else None
+        return vector_store.search_similar(
+            query_embedding, n_results=candidates, filter_dict=filter_dict
+        )
+
+    lexical_future = _hybrid_executor.submit(lexical)
+    vector_hits: List[Dict] = []
+    if embedding_service is not None and vector_store is not None:
+        try:
+            vector_hits = _hybrid_executor.submit(vector).result()
+        except Exception as e:
+            print(f"Warning: vector half of hybrid search failed: {e}")
+    lexical_hits = lexical_future.result()
+
+    lexical_ids = [memory_id for memory_id, _ in lexical_hits]
+    vector_ids = [hit["id"] for hit in vector_hits]
+    fused = reciprocal_rank_fusion([lexical_ids, vector_ids])[:limit]
+
+    memories = {m.id: m for m in get_memories([memory_id for memory_id, _ in fused])}
+    lexical_ranks = {memory_id: rank for rank, memory_id in enumerate(lexical_ids, start=1)}
+    vector_ranks = {memory_id: rank for rank, memory_id in enumerate(vector_ids, start=1)}
+    similarities = {
+        hit["id"]: 1.0 - hit["distance"] if hit["distance"] is not None else 0.0
+        for hit in vector_hits
+    }
+
+    results = []
+    for memory_id, score in fused:
+        memory = memories.get(memory_id)
+        if memory is None:
+            # Vector index can briefly lag deletes in SQL
+            continue
+        results.append({
+            "memory": memory,
+            "score": score,
+            "lexical_rank": lexical_ranks.get(memory_id),
+            "vector_rank": vector_ranks.get(memory_id),
+            "similarity": similarities.get(memory_id),
+        })
+    return results
@@ -1,29 +1,114 @@
 """Basic memory store for Opera.
 
 This module defines the storage layer for memory items. It uses SQLModel
-and SQLite for persistence. The storage API encapsulates basic CRUD
-operations for MemoryItem objects.
+for persistence against the database in ``config.DATABASE_URL``: a local
+SQLite file by default, or PostgreSQL for shared deployments. The storage
+API encapsulates basic CRUD operations for MemoryItem objects.
 """
 
+import base64
 from contextlib import contextmanager
-from typing import Iterable, Optional
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, Optional, Sequence
 
+from sqlalchemy import Index, event, func, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import StaticPool
 from sqlmodel import Session, SQLModel, create_engine, select
 
+from ..config import config
 from ..models.memory import MemoryItem
 
 
-# SQLite database file. In a real deployment this could be swapped for
-# PostgreSQL or another durable store.
-DATABASE_URL = "sqlite:///./opera.db"
+# Called inside the insert transaction with the session and the new items
+InsertHook = Callable[[Session, Sequence[MemoryItem]], None]
 
 
-engine = create_engine(DATABASE_URL, echo=False)
+def _normalize_url(url: str) -> str:
+    """Accept the ``postgres://`` scheme many hosting providers hand out."""
+    if url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+DATABASE_URL = _normalize_url(config.DATABASE_URL)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Tune each new SQLite connection for concurrent readers and writers."""
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers proceed while a writer commits; NORMAL sync is
+    # durable across application crashes, which is what we need here.
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={config.SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+def build_engine(url: str = DATABASE_URL) -> Engine:
+    """Create a pooled engine configured for the target database."""
+    if url.startswith("sqlite"):
+        if url in ("sqlite://", "sqlite:///:memory:"):
+            # One shared connection, or every checkout sees a fresh empty DB
+            return create_engine(
+                url,
+                echo=False,
+                connect_args={"check_same_thread": False},
+                poolclass=StaticPool
+            )
+
+        sqlite_engine = create_engine(
+            url,
+            echo=False,
+            # FastAPI runs sync endpoints in a threadpool, so connections
+            # are checked out on whichever worker thread handles a request.
+            connect_args={
+                "check_same_thread": False,
+                "timeout": config.SQLITE_BUSY_TIMEOUT_MS / 1000
+            },
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_timeout=config.DB_POOL_TIMEOUT
+        )
+        event.listen(sqlite_engine, "connect", _set_sqlite_pragmas)
+        return sqlite_engine
+
+    return create_engine(
+        url,
+        echo=False,
+        pool_size=config.DB_POOL_SIZE,
+        max_overflow=config.DB_MAX_OVERFLOW,
+        pool_timeout=config.DB_POOL_TIMEOUT,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        pool_pre_ping=True
+    )
+
+
+engine = build_engine()
+
+
+# Secondary indexes owned by the store. create_all only builds indexes for
+# tables it creates, so init_db also creates these on existing databases.
+INDEXES = [
+    # Keyset pagination and time-window queries over (timestamp, id)
+    Index("ix_memoryitem_timestamp_id", MemoryItem.timestamp, MemoryItem.id),
+    # Typed queries ordered by recency, and per-type counts
+    Index("ix_memoryitem_type_timestamp", MemoryItem.type, MemoryItem.timestamp),
+]
 
 
 def init_db() -> None:
     """Initializes the database schema."""
+    from . import dedup, embedding_store, job_queue  # noqa: F401 - registers their tables
+    from .embedding_store import upgrade_embedding_table
+    from .fulltext import init_fulltext
+
     SQLModel.metadata.create_all(engine)
+    upgrade_embedding_table(engine)
+    for index in INDEXES:
+        index.create(engine, checkfirst=True)
+    init_fulltext(engine)
 
 
 @contextmanager
@@ -33,13 +118,102 @@ def get_session() -> Iterable[Session]:
         yield session
 
 
-def add_memory(item: MemoryItem) -> MemoryItem:
-    """Persist a MemoryItem and return the stored instance."""
+def _insert(session: Session, items: Sequence[MemoryItem]) -> list[tuple[MemoryItem, bool]]:
+    """Add items to the session, merging near-duplicates when deduplication is on.
+
+    Returns one (memory, merged) pair per item; see ``dedup.insert_deduplicated``.
+    """
+    if config.DEDUP_ENABLED:
+        from .dedup import insert_deduplicated
+
+        return insert_deduplicated(session, items)
+    session.add_all(items)
+    return [(item, False) for item in items]
+
+
+def add_memory(item: MemoryItem, on_insert: Optional[InsertHook] = None) -> MemoryItem:
+    """Persist a MemoryItem and return the stored instance.
+
+    ``on_insert`` is called with the session and the flushed item before
+    commit, so follow-up rows (e.g. background jobs) land in the same
+    transaction. If the item is merged into an existing near-duplicate,
+    the existing memory is returned and ``on_insert`` is not called.
+    """
     with get_session() as session:
-        session.add(item)
+        memory, merged = _insert(session, [item])[0]
+        if on_insert and not merged:
+            session.flush()
+            on_insert(session, [memory])
         session.commit()
-        session.refresh(item)
-        return item
+        session.refresh(memory)
+        return memory
+
+
+def add_memories(
+    items: Sequence[MemoryItem],
+    on_insert: Optional[InsertHook] = None,
+) -> tuple[list[MemoryItem], list[tuple[int, str]], list[tuple[int, MemoryItem]]]:
+    """Persist many MemoryItems in a single transaction.
+
+    If the batch insert fails, the transaction is rolled back and the items
+    are retried one at a time so a bad row only fails itself. ``on_insert``
+    works as in ``add_memory``.
+
+    Returns:
+        A tuple of (stored items, failures, merged). Each failure is the
+        item's index in ``items`` and an error message; each merge is the
+        item's index and the existing memory it was merged into.
+    """
+    if not items:
+        return [], [], []
+
+    original_ids = [item.id for item in items]
+
+    def split(results):
+        stored = [memory for memory, was_merged in results if not was_merged]
+        merged = [
+            (index, memory) for index, (memory, was_merged) in enumerate(results)
+            if was_merged
+        ]
+        return stored, merged
+
+    # Keep attributes loaded after commit so callers don't trigger a
+    # refresh query per item.
+    with Session(engine, expire_on_commit=False) as session:
+        try:
+            stored, merged = split(_insert(session, items))
+            if on_insert and stored:
+                session.flush()
+                on_insert(session, stored)
+            session.commit()
+            return stored, [], merged
+        except Exception:
+            session.rollback()
+            for item, original_id in zip(items, original_ids):
+                item.id = original_id
+
+        stored: list[MemoryItem] = []
+        failures: list[tuple[int, str]] = []
+        merged: list[tuple[int, MemoryItem]] = []
+        for index, item in enumerate(items):
+            try:
+                memory, was_merged = _insert(session, [item])[0]
+                if on_insert and not was_merged:
+                    session.flush()
+                    on_insert(session, [memory])
+                session.commit()
+                # Detach now: a later item's failed flush rolls back and
+                # would expire everything still in the session
+                session.expunge(memory)
+                if was_merged:
+                    merged.append((index, memory))
+                else:
+                    stored.append(memory)
+            except Exception as e:
+                session.rollback()
+                session.expunge_all()
+                failures.append((index, str(e)))
+        return stored, failures, merged
 
 
 def list_memories(memory_type: Optional[str] = None) -> list[MemoryItem]:
@@ -52,10 +226,193 @@ def list_memories(memory_type: Optional[str] = None) -> list[MemoryItem]:
         return results.all()
 
 
+def memories_since(
+    since: datetime,
+    memory_type: Optional[str] = None,
+    limit: Optional[int] = None,
+    newest_first: bool = False,
+) -> list[MemoryItem]:
+    """Retrieve memories with a timestamp after ``since``.
+
+    Ordered oldest first unless ``newest_first`` is set.
+    """
+    query = select(MemoryItem).where(MemoryItem.timestamp > since)
+    if memory_type:
+        query = query.where(MemoryItem.type == memory_type)
+    if newest_first:
+        query = query.order_by(MemoryItem.timestamp.desc(), MemoryItem.id.desc())
+    else:
+        query = query.order_by(MemoryItem.timestamp.asc(), MemoryItem.id.asc())
+    if limit is not None:
+        query = query.limit(limit)
+    with get_session() as session:
+        return session.exec(query).all()
+
+
+def memories_by_type(
+    memory_type: str,
+    limit: Optional[int] = None,
+    newest_first: bool = True,
+) -> list[MemoryItem]:
+    """Retrieve memories of one type ordered by timestamp."""
+    order = MemoryItem.timestamp.desc() if newest_first else MemoryItem.timestamp.asc()
+    query = select(MemoryItem).where(MemoryItem.type == memory_type).order_by(order)
+    if limit is not None:
+        query = query.limit(limit)
+    with get_session() as session:
+        return session.exec(query).all()
+
+
+def latest_memories(limit: int) -> list[MemoryItem]:
+    """Retrieve the ``limit`` most recent memories, newest first."""
+    query = (
+        select(MemoryItem)
+        .order_by(MemoryItem.timestamp.desc(), MemoryItem.id.desc())
+        .limit(limit)
+    )
+    with get_session() as session:
+        return session.exec(query).all()
+
+
+def memories_after_id(memory_id: int, limit: Optional[int] = None) -> list[MemoryItem]:
+    """Retrieve memories inserted after the given id, in insertion order.
+
+    Unlike ``memories_since`` this also picks up backfilled rows whose
+    timestamps are in the past.
+    """
+    query = select(MemoryItem).where(MemoryItem.id > memory_id).order_by(MemoryItem.id)
+    if limit is not None:
+        query = query.limit(limit)
+    with get_session() as session:
+        return session.exec(query).all()
+
+
+def count_by_type() -> dict[str, int]:
+    """Return the number of memories of each type."""
+    query = select(MemoryItem.type, func.count()).group_by(MemoryItem.type)
+    with get_session() as session:
+        return {memory_type: count for memory_type, count in session.exec(query)}
+
+
+def encode_cursor(item: MemoryItem) -> str:
+    """Opaque pagination cursor pointing at an item's (timestamp, id)."""
+    raw = f"{item.timestamp.isoformat()}|{item.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of ``encode_cursor``; raises ValueError on malformed input."""
+    try:
+        timestamp, memory_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(memory_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _apply_filters(
+    query,
+    memory_type: Optional[str] = None,
+    source: Optional[str] = None,
+    min_confidence: Optional[float] = None,
+):
+    """Add the optional listing filters to a select over MemoryItem."""
+    if memory_type:
+        query = query.where(MemoryItem.type == memory_type)
+    if source:
+        query = query.where(MemoryItem.source == source)
+    if min_confidence is not None:
+        query = query.where(MemoryItem.confidence >= min_confidence)
+    return query
+
+
+def list_memories_page(
+    limit: int = 50,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    memory_type: Optional[str] = None,
+    source: Optional[str] = None,
+    min_confidence: Optional[float] = None,
+) -> tuple[list[MemoryItem], Optional[str], Optional[str]]:
+    """Retrieve one page of memories, newest first, using keyset pagination.
+
+    Args:
+        limit: Maximum number of items in the page
+        before: Cursor; return items older than it
+        after: Cursor; return items newer than it
+        memory_type, source, min_confidence: Optional filters
+
+    Returns:
+        A tuple of (items, next_cursor, prev_cursor). ``next_cursor`` pages
+        towards older items (pass it as ``before``) and ``prev_cursor``
+        towards newer ones (pass it as ``after``); each is None at that end.
+    """
+    if before and after:
+        raise ValueError("Pass either 'before' or 'after', not both")
+
+    key = tuple_(MemoryItem.timestamp, MemoryItem.id)
+    query = _apply_filters(select(MemoryItem), memory_type, source, min_confidence)
+
+    with get_session() as session:
+        if after:
+            query = query.where(key > tuple_(*decode_cursor(after)))
+            query = query.order_by(MemoryItem.timestamp.asc(), MemoryItem.id.asc())
+            items = session.exec(query.limit(limit + 1)).all()
+            has_newer = len(items) > limit
+            items = list(reversed(items[:limit]))
+            has_older = True
+        else:
+            if before:
+                query = query.where(key < tuple_(*decode_cursor(before)))
+            query = query.order_by(MemoryItem.timestamp.desc(), MemoryItem.id.desc())
+            items = session.exec(query.limit(limit + 1)).all()
+            has_older = len(items) > limit
+            items = list(items[:limit])
+            has_newer = before is not None
+
+    next_cursor = encode_cursor(items[-1]) if items and has_older else None
+    prev_cursor = encode_cursor(items[0]) if items and has_newer else None
+    return items, next_cursor, prev_cursor
+
+
+def stream_memories(
+    memory_type: Optional[str] = None,
+    source: Optional[str] = None,
+    min_confidence: Optional[float] = None,
+    batch_size: int = 1000,
+) -> Iterator[MemoryItem]:
+    """Yield memories newest first from a server-side cursor.
+
+    Rows are fetched ``batch_size`` at a time, so the full result set is
+    never held in memory.
+    """
+    query = _apply_filters(select(MemoryItem), memory_type, source, min_confidence)
+    query = query.order_by(MemoryItem.timestamp.desc(), MemoryItem.id.desc())
+    with get_session() as session:
+        yield from session.exec(query.execution_options(yield_per=batch_size))
+
+
+def get_memories(ids: Sequence[int]) -> list[MemoryItem]:
+    """Retrieve memories by id, in no particular order."""
+    if not ids:
+        return []
+    with get_session() as session:
+        query = select(MemoryItem).where(MemoryItem.id.in_(ids))
+        return session.exec(query).all()
+
+
 def update_memory(item: MemoryItem) -> MemoryItem:
     """Update an existing MemoryItem."""
     with get_session() as session:
         session.add(item)
         session.commit()
         session.refresh(item)
-        return item
\ No newline at end of file
+        return item
+
+
+def update_memories(items: Sequence[MemoryItem]) -> None:
+    """Update many existing MemoryItems in a single transaction."""
+    if not items:
+        return
+    with Session(engine, expire_on_commit=False) as session:
+        session.add_all(items)
+        session.commit()
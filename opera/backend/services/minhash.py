@@ -0,0 +1,101 @@
+"""MinHash signatures and LSH banding for near-duplicate text detection.
+
+A signature is ``num_perm`` 32-bit minima of salted shingle hashes; the
+fraction of positions where two signatures agree estimates the Jaccard
+similarity of their word-shingle sets. Splitting a signature into
+``bands`` of ``num_perm / bands`` rows and hashing each band gives bucket
+keys such that similar texts share at least one bucket with high
+probability, so candidates can be found with an indexed equality lookup.
+"""
+import re
+from typing import List, Optional, Set
+
+import mmh3
+import numpy as np
+
+from ..config import config
+
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; keeps numbers and identifiers intact."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """Word n-grams of normalized text; short texts fall back to single words."""
+    tokens = tokenize(text)
+    if len(tokens) < size:
+        return set(tokens)
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+class MinHasher:
+    """Computes fixed-length MinHash signatures and their LSH band keys."""
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, seed: int = 1):
+        """
+        Initialize the hash family.
+
+        Args:
+            num_perm: Signature length
+            bands: Number of LSH bands; must divide ``num_perm``
+            seed: Seed for the permutation parameters. Signatures are only
+                comparable between hashers with the same settings.
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.RandomState(seed)
+        # Universal hashing (a * x + b) mod p with p = 2^61 - 1
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """Return the uint32 MinHash signature of a text."""
+        grams = shingles(text)
+        if not grams:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+        hashes = np.array(
+            [mmh3.hash(gram, signed=False) for gram in grams], dtype=np.uint64
+        )
+        # a < 2^32 and x < 2^32, so a * x + b stays below 2^64
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        return (permuted & _MAX_HASH).min(axis=0).astype(np.uint32)
+
+    def band_keys(self, signature: np.ndarray) -> List[int]:
+        """Hash each band of a signature to a signed 64-bit bucket key."""
+        rows = np.ascontiguousarray(signature, dtype="<u4").reshape(self.bands, self.rows)
+        return [mmh3.hash64(band.tobytes(), seed=i)[0] for i, band in enumerate(rows)]
+
+    @staticmethod
+    def similarity(a: np.ndarray, b: np.ndarray) -> float:
+        """Estimated Jaccard similarity of the texts behind two signatures."""
+        return float(np.mean(a == b))
+
+
+def to_bytes(signature: np.ndarray) -> bytes:
+    """Encode a signature for storage."""
+    return np.ascontiguousarray(signature, dtype="<u4").tobytes()
+
+
+def from_bytes(blob: bytes) -> np.ndarray:
+    """Decode a stored signature without copying."""
+    return np.frombuffer(blob, dtype="<u4")
+
+
+# Global hasher instance
+_minhasher: Optional[MinHasher] = None
+
+def get_minhasher() -> MinHasher:
+    """Get or create the global MinHasher configured from settings."""
+    global _minhasher
+    if _minhasher is None:
+        _minhasher = MinHasher(num_perm=config.DEDUP_NUM_PERM, bands=config.DEDUP_BANDS)
+    return _minhasher
@@ -0,0 +1,186 @@
+"""Background loading of the LLM and embedding models.
+
+Loading Llama weights or a sentence-transformers model takes seconds to
+minutes, and used to happen on first use, either at import time or inside
+a request. ``ModelManager`` loads each model on its own thread, so the app
+can start serving immediately and the models load concurrently. Request
+handlers ask for a model with a bounded wait (``MODEL_WAIT_TIMEOUT_SECONDS``)
+and fall back or answer 503 if it is still warming up. A failed load is
+retried by the next ``get`` once its backoff (``MODEL_RETRY_BASE_SECONDS``,
+doubling up to ``MODEL_RETRY_MAX_SECONDS``) has passed.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from opera.backend.config import config
+from opera.backend.services.embeddings import get_embedding_service
+from opera.backend.services.llm_client import get_llm_client
+
+
+class ModelNotReady(RuntimeError):
+    """Raised when a model is still loading after the allowed wait."""
+
+
+class _ModelSlot:
+    """Load state of one model."""
+
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        self.name = name
+        self.loader = loader
+        self.state = "pending"  # pending, loading, ready, failed
+        self.instance: Any = None
+        self.error: Optional[BaseException] = None
+        self.load_seconds: Optional[float] = None
+        self.attempts = 0
+        self.retry_at = 0.0  # time.monotonic() after which a failed load is retried
+        self.loaded = threading.Event()
+        self.callbacks: List[Callable[[Any], None]] = []
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds to wait before loading a model again after ``attempts`` failures."""
+    delay = config.MODEL_RETRY_BASE_SECONDS * (2 ** max(0, attempts - 1))
+    return min(delay, config.MODEL_RETRY_MAX_SECONDS)
+
+
+class ModelManager:
+    """Loads models on background threads and hands them out once ready."""
+
+    def __init__(self, loaders: Dict[str, Callable[[], Any]]):
+        """
+        Initialize without loading anything.
+
+        Args:
+            loaders: Model name to a function that loads and returns it
+        """
+        self._slots = {name: _ModelSlot(name, loader) for name, loader in loaders.items()}
+        self._lock = threading.Lock()
+
+    def start(self, names: Optional[Iterable[str]] = None) -> None:
+        """
+        Start loading the given models (all by default) if not already started.
+
+        Models whose last load failed are loaded again once their retry
+        backoff has passed.
+        """
+        now = time.monotonic()
+        with self._lock:
+            slots = [self._slots[name] for name in (names or self._slots)]
+            pending = [
+                slot for slot in slots
+                if slot.state == "pending" or (slot.state == "failed" and now >= slot.retry_at)
+            ]
+            for slot in pending:
+                slot.state = "loading"
+                slot.attempts += 1
+                slot.loaded.clear()
+        for slot in pending:
+            threading.Thread(
+                target=self._load, args=(slot,), name=f"load-{slot.name}", daemon=True
+            ).start()
+
+    def _load(self, slot: _ModelSlot) -> None:
+        started = time.monotonic()
+        try:
+            instance = slot.loader()
+        except Exception as e:
+            delay = retry_delay(slot.attempts)
+            print(f"Warning: Failed to load {slot.name} model (retrying after {delay:.0f}s): {e}")
+            with self._lock:
+                slot.state = "failed"
+                slot.error = e
+                slot.load_seconds = time.monotonic() - started
+                slot.retry_at = time.monotonic() + delay
+            slot.loaded.set()
+            return
+
+        with self._lock:
+            slot.state = "ready"
+            slot.instance = instance
+            slot.error = None
+            slot.load_seconds = time.monotonic() - started
+            callbacks, slot.callbacks = slot.callbacks, []
+        # Warm-up callbacks finish before waiters are released
+        for callback in callbacks:
+            self._run_callback(slot, callback)
+        slot.loaded.set()
+        print(f"{slot.name} model ready in {slot.load_seconds:.1f}s")
+
+    def _run_callback(self, slot: _ModelSlot, callback: Callable[[Any], None]) -> None:
+        try:
+            callback(slot.instance)
+        except Exception as e:
+            print(f"Warning: {slot.name} ready callback failed: {e}")
+
+    def on_ready(self, name: str, callback: Callable[[Any], None]) -> None:
+        """Call ``callback(model)`` once the model has loaded (now, if it already has)."""
+        slot = self._slots[name]
+        with self._lock:
+            if slot.state != "ready":
+                slot.callbacks.append(callback)
+                return
+        self._run_callback(slot, callback)
+
+    def get(self, name: str, timeout: Optional[float] = None) -> Any:
+        """
+        Return a loaded model, starting its load if nobody has yet or
+        retrying a failed one whose backoff has passed.
+
+        Args:
+            name: Model name, e.g. "llm" or "embeddings"
+            timeout: Seconds to wait for a model that is still loading;
+                defaults to ``MODEL_WAIT_TIMEOUT_SECONDS``
+
+        Raises:
+            ModelNotReady: If the model is still loading after ``timeout``
+            Exception: The loader's error if the last load failed and its
+                retry is not due yet
+        """
+        slot = self._slots[name]
+        self.start([name])
+        timeout = config.MODEL_WAIT_TIMEOUT_SECONDS if timeout is None else timeout
+        if not slot.loaded.wait(timeout):
+            raise ModelNotReady(f"The {name} model is still loading")
+        if slot.error is not None:
+            raise slot.error
+        return slot.instance
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model load state, error and load time."""
+        with self._lock:
+            return {
+                name: {
+                    "state": slot.state,
+                    "error": str(slot.error) if slot.error is not None else None,
+                    "attempts": slot.attempts,
+                    "load_seconds": slot.load_seconds
+                }
+                for name, slot in self._slots.items()
+            }
+
+    def ready(self) -> bool:
+        """Whether every model has loaded successfully."""
+        with self._lock:
+            return all(slot.state == "ready" for slot in self._slots.values())
+
+    def failed(self) -> List[str]:
+        """Names of models whose last load attempt failed."""
+        with self._lock:
+            return [name for name, slot in self._slots.items() if slot.state == "failed"]
+
+
+# Global model manager instance
+_model_manager: Optional[ModelManager] = None
+_model_manager_lock = threading.Lock()
+
+def get_model_manager() -> ModelManager:
+    """Get or create the global model manager for the LLM and embedding models."""
+    global _model_manager
+    with _model_manager_lock:
+        if _model_manager is None:
+            _model_manager = ModelManager({
+                "llm": get_llm_client,
+                "embeddings": get_embedding_service
+            })
+        return _model_manager
@@ -0,0 +1,203 @@
+"""Load profiles for running the local causal LM on CPU.
+
+``LOCAL_MODEL_PROFILE`` selects how the model is loaded:
+
+- ``fp32``: full precision, the previous default
+- ``bf16``: bfloat16 weights and activations; only fast on CPUs with native
+  bf16 instructions (AVX512-BF16/AMX on x86, BF16 on Arm)
+- ``int8``: dynamic int8 quantization of every ``nn.Linear``; weights are
+  stored as int8 and activations quantized on the fly
+- ``onnx``: ONNX Runtime through ``optimum`` (optional dependency); the
+  exported model is saved under ``MODEL_CACHE_DIR/onnx`` and reused
+- ``auto``: ``fp32``, so completions stay identical to earlier releases;
+  ``int8`` gave the best decode speed and memory on the CPUs we measured
+  but changes the output, so it is opt-in. bf16 only pays off with native
+  support
+
+int8 output differs from fp32, and batched int8 output can differ slightly
+from running a prompt alone, since dynamic quantization picks one
+activation scale per input tensor.
+
+On MPS the model is always loaded in float16. With ``LOCAL_MODEL_BENCHMARK``
+every profile in ``LOCAL_MODEL_BENCHMARK_PROFILES`` is loaded and timed at
+startup, and ``auto`` picks the fastest.
+"""
+import itertools
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import torch
+
+from opera.backend.config import config
+
+
+PROFILES = ("fp32", "bf16", "int8", "onnx")
+
+_BENCHMARK_MESSAGES = "User: Summarize the benefits of regular exercise in a few sentences.\n\nAssistant:"
+
+_threads_configured = False
+
+
+def cpu_supports_bf16() -> bool:
+    """Whether the CPU has native bfloat16 instructions (Linux only; False elsewhere)."""
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = set(f.read().split())
+    except OSError:
+        return False
+    return bool(flags & {"avx512_bf16", "amx_bf16", "bf16"})
+
+
+def configure_threads() -> None:
+    """Apply ``LOCAL_TORCH_THREADS`` / ``LOCAL_TORCH_INTEROP_THREADS`` once per process."""
+    global _threads_configured
+    if _threads_configured:
+        return
+    _threads_configured = True
+
+    if config.LOCAL_TORCH_THREADS > 0:
+        torch.set_num_threads(config.LOCAL_TORCH_THREADS)
+    if config.LOCAL_TORCH_INTEROP_THREADS > 0:
+        try:
+            torch.set_num_interop_threads(config.LOCAL_TORCH_INTEROP_THREADS)
+        except RuntimeError as e:
+            # Only allowed before any inter-op parallel work has started
+            print(f"Warning: Could not set inter-op threads: {e}")
+
+
+def resolve_profile(profile: str, device: str) -> str:
+    """Turn ``auto`` (or any profile on MPS) into the concrete profile to load."""
+    if device == "mps":
+        return "fp16"
+    if profile == "auto":
+        return "fp32"
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown LOCAL_MODEL_PROFILE '{profile}', expected auto or one of {PROFILES}")
+    if profile == "bf16" and not cpu_supports_bf16():
+        print("Warning: CPU has no native bfloat16 support; the bf16 profile will be slow")
+    return profile
+
+
+def _load_onnx(model_name: str):
+    from optimum.onnxruntime import ORTModelForCausalLM
+    import onnxruntime
+
+    options = onnxruntime.SessionOptions()
+    if config.LOCAL_TORCH_THREADS > 0:
+        options.intra_op_num_threads = config.LOCAL_TORCH_THREADS
+    if config.LOCAL_TORCH_INTEROP_THREADS > 0:
+        options.inter_op_num_threads = config.LOCAL_TORCH_INTEROP_THREADS
+
+    export_dir = os.path.join(config.MODEL_CACHE_DIR, "onnx", model_name.replace("/", "--"))
+    if os.path.isdir(export_dir):
+        return ORTModelForCausalLM.from_pretrained(export_dir, session_options=options)
+
+    print(f"Exporting {model_name} to ONNX (one-time)...")
+    model = ORTModelForCausalLM.from_pretrained(
+        model_name, export=True, cache_dir=config.MODEL_CACHE_DIR, session_options=options
+    )
+    model.save_pretrained(export_dir)
+    return model
+
+
+def load_causal_lm(model_name: str, device: str, profile: str) -> Tuple[object, str]:
+    """
+    Load a causal LM with the given concrete profile.
+
+    Falls back to ``int8`` when the ``onnx`` profile can't be loaded.
+
+    Returns:
+        (model, profile actually used)
+    """
+    from transformers import AutoModelForCausalLM
+
+    if profile == "onnx":
+        try:
+            return _load_onnx(model_name), "onnx"
+        except Exception as e:
+            print(f"Warning: ONNX profile unavailable, falling back to int8: {e}")
+            profile = "int8"
+
+    dtype = {"fp16": torch.float16, "bf16": torch.bfloat16}.get(profile, torch.float32)
+    model = AutoModelForCausalLM.from_pretrained(
+        model_name,
+        cache_dir=config.MODEL_CACHE_DIR,
+        torch_dtype=dtype,
+        low_cpu_mem_usage=True
+    ).to(device)
+    model.eval()
+
+    if profile == "int8":
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model, profile
+
+
+def model_memory_mb(model) -> Optional[float]:
+    """Size of the model's weights and buffers, counting int8-packed linear weights."""
+    if not isinstance(model, torch.nn.Module):
+        return None
+    tensors = list(itertools.chain(model.parameters(), model.buffers()))
+    for module in model.modules():
+        if isinstance(module, torch.ao.nn.quantized.dynamic.Linear):
+            tensors.append(module.weight())
+            if module.bias() is not None:
+                tensors.append(module.bias())
+    return sum(t.numel() * t.element_size() for t in tensors) / 2 ** 20
+
+
+def resident_memory_mb() -> Optional[float]:
+    """Current resident set size of this process (Linux only)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def benchmark(model, tokenizer, device: str, new_tokens: Optional[int] = None) -> float:
+    """Measure greedy decoding speed in generated tokens per second."""
+    new_tokens = new_tokens or config.LOCAL_MODEL_BENCHMARK_TOKENS
+    inputs = tokenizer(_BENCHMARK_MESSAGES, return_tensors="pt", return_token_type_ids=False).to(device)
+    params = dict(do_sample=False, pad_token_id=tokenizer.eos_token_id)
+
+    with torch.no_grad():
+        # Warm-up: first call pays for lazy initialization and allocation
+        model.generate(**inputs, max_new_tokens=2, **params)
+        start = time.perf_counter()
+        model.generate(**inputs, max_new_tokens=new_tokens, min_new_tokens=new_tokens, **params)
+    return new_tokens / (time.perf_counter() - start)
+
+
+def benchmark_profiles(
+    model_name: str, tokenizer, device: str, profiles: Sequence[str]
+) -> List[Dict]:
+    """
+    Load and time each profile in turn, printing one line per profile.
+
+    Returns:
+        One dict per profile with ``profile``, ``tokens_per_second`` and
+        ``model_mb`` (``error`` instead if it failed to load or run)
+    """
+    results = []
+    for profile in profiles:
+        try:
+            model, loaded = load_causal_lm(model_name, device, profile)
+            if loaded != profile:
+                raise RuntimeError(f"loaded as {loaded}")
+            result = {
+                "profile": profile,
+                "tokens_per_second": benchmark(model, tokenizer, device),
+                "model_mb": model_memory_mb(model)
+            }
+            del model
+            size = f"{result['model_mb']:.0f} MB" if result["model_mb"] is not None else "n/a"
+            print(f"  {profile:>5}: {result['tokens_per_second']:.1f} tokens/s, weights {size}")
+        except Exception as e:
+            result = {"profile": profile, "error": str(e)}
+            print(f"  {profile:>5}: failed ({e})")
+        results.append(result)
+    return results
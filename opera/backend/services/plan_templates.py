@@ -0,0 +1,293 @@
+"""Reusable plan templates keyed by intent category and parameter names.
+
+Most LLM plans differ only in the user's parameter values: every
+``information_retrieval`` intent with a ``query`` parameter gets the same
+steps with a different query. ``PlanTemplateStore`` compares the LLM plans
+for one key and infers a template from how they differ, and later intents
+with the same category and parameter names get a copy with their own
+values substituted instead of a new LLM call.
+
+Only strings are templated, and only strings that changed between two
+plans in step with a parameter: each plan must come out of the template
+with its own parameter values substituted. Values that stayed the same are
+kept literally, and numbers and booleans are never templated, so a
+``top_k: 1`` is not mistaken for a ``count`` parameter that happened to be
+1. Descriptions are compared like arguments. A plan whose steps changed in
+any other way, such as request-specific text the LLM copied in, starts the
+key over, and a plan whose parameter values left a string ambiguous is not
+counted.
+
+A template is served once ``PLAN_TEMPLATE_MIN_OBSERVATIONS`` (at least
+two) LLM plans for its key agreed. Templates are evicted least recently
+used and dropped when the tool registry changes.
+"""
+import copy
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from opera.backend.config import config
+from opera.backend.models.reasoning import Intent, Plan, PlanStep
+from opera.backend.tools.registry import ToolRegistry, get_registry
+
+
+# Marks a parameter reference inside a template string; never typed by users
+_MARK = "\x00"
+
+# Substrings shorter than this are only replaced when they are a whole value
+_MIN_SUBSTRING_LENGTH = 3
+
+TemplateKey = Tuple[str, FrozenSet[str]]
+
+
+def template_key(intent: Intent) -> TemplateKey:
+    """Template key of an intent: its category and parameter names."""
+    return intent.category, frozenset((intent.parameters or {}).keys())
+
+
+def _placeholder(name: str) -> str:
+    return f"{_MARK}{name}{_MARK}"
+
+
+def _templatize(value: str, parameters: Dict[str, Any]) -> str:
+    """Replace string parameter values inside a string with placeholders."""
+    # Longest first so a value containing another is replaced whole
+    for name, param in sorted(parameters.items(), key=lambda p: -len(str(p[1]))):
+        if isinstance(param, str) and (value == param or len(param) >= _MIN_SUBSTRING_LENGTH):
+            value = value.replace(param, _placeholder(name))
+    return value
+
+
+def _instantiate(value: Any, parameters: Dict[str, Any]) -> Any:
+    """Substitute parameter values back into a templated value."""
+    if isinstance(value, dict):
+        return {k: _instantiate(v, parameters) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_instantiate(v, parameters) for v in value]
+    if not isinstance(value, str) or _MARK not in value:
+        return value
+    parts = value.split(_MARK)
+    if len(parts) == 3 and not parts[0] and not parts[2]:
+        # The whole value was one parameter; keep its type
+        return parameters.get(parts[1])
+    # Odd positions are parameter names
+    return "".join(
+        str(parameters.get(part)) if i % 2 else part for i, part in enumerate(parts)
+    )
+
+
+class _Mismatch(Exception):
+    """Two plans differ in a way their parameters don't explain."""
+
+
+def _merge(old: Any, old_parameters: Dict[str, Any], new: Any, new_parameters: Dict[str, Any]) -> Tuple[Any, bool]:
+    """
+    Infer the template two plans (or parts of them) share.
+
+    Returns:
+        (template, ambiguous); ``ambiguous`` is True when an unchanged
+        string contains a parameter value that was also unchanged, so the
+        plans can't tell whether it depends on that parameter
+
+    Raises:
+        _Mismatch: If the plans differ other than by substituted strings
+    """
+    if type(old) is not type(new):
+        raise _Mismatch()
+    if isinstance(old, dict):
+        if old.keys() != new.keys():
+            raise _Mismatch()
+        merged = {}
+        ambiguous = False
+        for key in old:
+            merged[key], unclear = _merge(old[key], old_parameters, new[key], new_parameters)
+            ambiguous = ambiguous or unclear
+        return merged, ambiguous
+    if isinstance(old, list):
+        if len(old) != len(new):
+            raise _Mismatch()
+        merged = []
+        ambiguous = False
+        for old_item, new_item in zip(old, new):
+            item, unclear = _merge(old_item, old_parameters, new_item, new_parameters)
+            merged.append(item)
+            ambiguous = ambiguous or unclear
+        return merged, ambiguous
+    if not isinstance(old, str):
+        if old != new:
+            raise _Mismatch()
+        return old, False
+
+    candidates = [_templatize(old, old_parameters), _templatize(new, new_parameters)]
+    fits = [
+        template for template in candidates
+        if _MARK in template
+        and _instantiate(template, old_parameters) == old
+        and _instantiate(template, new_parameters) == new
+    ]
+    if old == new:
+        return old, bool(fits)
+    if not fits:
+        raise _Mismatch()
+    return fits[0], False
+
+
+class _Template:
+    """Template inferred for one key and how many LLM plans agreed with it."""
+
+    def __init__(self, steps: List[Dict[str, Any]], parameters: Dict[str, Any], duration: int):
+        # The first plan, literal; the next one is compared with it to infer
+        # the template, which later plans must then reproduce exactly
+        self.first_steps = steps
+        self.first_parameters = parameters
+        self.steps: Optional[List[Dict[str, Any]]] = None
+        self.duration = duration
+        self.observations = 1
+        self.hits = 0
+
+
+class PlanTemplateStore:
+    """LRU store of plan templates learned from LLM plans."""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        min_observations: Optional[int] = None,
+        min_confidence: Optional[float] = None,
+        registry: Optional[ToolRegistry] = None
+    ):
+        """
+        Initialize an empty store.
+
+        Args:
+            max_entries: Templates kept before least recently used eviction
+            min_observations: Matching LLM plans needed before a template is served
+            min_confidence: Intent confidence needed to record or use a template
+            registry: Tool registry whose changes invalidate templates;
+                defaults to the global one
+        """
+        self.max_entries = max_entries or config.PLAN_TEMPLATE_MAX_ENTRIES
+        self.min_observations = (
+            min_observations if min_observations is not None else config.PLAN_TEMPLATE_MIN_OBSERVATIONS
+        )
+        self.min_confidence = (
+            min_confidence if min_confidence is not None else config.PLAN_TEMPLATE_MIN_CONFIDENCE
+        )
+        self.hits = 0
+        self.misses = 0
+        self._templates: "OrderedDict[TemplateKey, _Template]" = OrderedDict()
+        self.registry = registry if registry is not None else get_registry()
+        self._registry_version = self.registry.version
+        self._lock = threading.Lock()
+
+    def _check_registry(self) -> None:
+        """Drop every template if tools were added since they were learned."""
+        version = self.registry.version
+        if version != self._registry_version:
+            self._templates.clear()
+            self._registry_version = version
+
+    def lookup(self, intent: Intent) -> Optional[Plan]:
+        """Return a plan for the intent from a trusted template, or None."""
+        if intent.confidence < self.min_confidence:
+            return None
+        key = template_key(intent)
+        with self._lock:
+            self._check_registry()
+            template = self._templates.get(key)
+            if (
+                template is None
+                or template.steps is None
+                or template.observations < self.min_observations
+            ):
+                self.misses += 1
+                return None
+            self._templates.move_to_end(key)
+            template.hits += 1
+            self.hits += 1
+            steps = copy.deepcopy(template.steps)
+            duration = template.duration
+
+        parameters = intent.parameters or {}
+        return Plan(
+            plan_id=str(uuid.uuid4()),
+            steps=[PlanStep(**_instantiate(step, parameters)) for step in steps],
+            estimated_duration_seconds=duration
+        )
+
+    def record(self, intent: Intent, plan: Plan) -> None:
+        """Learn from a plan the LLM generated for an intent."""
+        if intent.confidence < self.min_confidence or not plan.steps:
+            return
+        parameters = intent.parameters or {}
+        steps = [
+            {**step.model_dump(), "tool_arguments": step.tool_arguments or {}}
+            for step in plan.steps
+        ]
+        key = template_key(intent)
+        with self._lock:
+            self._check_registry()
+            template = self._templates.get(key)
+            if template is not None:
+                if template.steps is not None:
+                    agrees = _instantiate(template.steps, parameters) == steps
+                else:
+                    try:
+                        merged, ambiguous = _merge(
+                            template.first_steps, template.first_parameters, steps, parameters
+                        )
+                    except _Mismatch:
+                        agrees = False
+                    else:
+                        if ambiguous:
+                            # Same parameter values as last time: no evidence either way
+                            self._templates.move_to_end(key)
+                            return
+                        template.steps = merged
+                        agrees = True
+                if agrees:
+                    template.duration = plan.estimated_duration_seconds
+                    template.observations += 1
+                    self._templates.move_to_end(key)
+                    return
+            # New key, or the LLM disagreed with the old template: start over
+            self._templates[key] = _Template(steps, parameters, plan.estimated_duration_seconds)
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.max_entries:
+                self._templates.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every template."""
+        with self._lock:
+            self._templates.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and template counts."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "templates": len(self._templates),
+                "trusted": sum(
+                    1 for t in self._templates.values()
+                    if t.steps is not None and t.observations >= self.min_observations
+                )
+            }
+
+
+# Global plan template store instance
+_plan_template_store: Optional[PlanTemplateStore] = None
+_plan_template_store_lock = threading.Lock()
+
+def get_plan_template_store() -> Optional[PlanTemplateStore]:
+    """Get or create the global plan template store, or None if disabled."""
+    global _plan_template_store
+    if not config.PLAN_TEMPLATES_ENABLED:
+        return None
+    with _plan_template_store_lock:
+        if _plan_template_store is None:
+            _plan_template_store = PlanTemplateStore()
+        return _plan_template_store
@@ -1,61 +1,124 @@
-"""System prompts for LLM-powered reasoning."""
+"""System prompts for LLM-powered reasoning.
 
-INTENT_DERIVATION_PROMPT = """You are Opera, a personal intelligence operating system. Your job is to understand what the user wants to do.
+The planning prompts list the tools in the tool registry, so plans only
+name tools the executor can run.
+"""
+from typing import Optional
 
-Given the user's input and any available context, derive their intent.
+from opera.backend.tools.registry import ToolRegistry, get_registry
 
-Classify the intent into one of these categories:
+INTENT_CATEGORIES = """Classify the intent into one of these categories:
 - information_retrieval: User wants to find or recall information
 - memory_storage: User wants to remember something for later
 - memory_management: User wants to delete or modify memories
 - content_creation: User wants to create new content (drafts, notes, etc.)
 - memory_modification: User wants to update existing information
 - summarization: User wants a summary of events or memories
-- general_inquiry: General questions or unclear intent
+- general_inquiry: General questions or unclear intent"""
+
+# Replaced with the registered tools when a planning prompt is built
+_TOOLS_PLACEHOLDER = "{tools}"
+
+INTENT_DERIVATION_PROMPT = f"""You are Opera, a personal intelligence operating system. Your job is to understand what the user wants to do.
+
+Given the user's input and any available context, derive their intent.
+
+{INTENT_CATEGORIES}
 
 Extract any relevant parameters from the user's input.
 
 Respond in JSON format:
-{
+{{
   "category": "category_name",
   "description": "clear description of what user wants",
   "confidence": 0.0-1.0,
-  "parameters": {"key": "value"}
-}"""
+  "parameters": {{"key": "value"}}
+}}"""
 
-PLAN_GENERATION_PROMPT = """You are Opera's planning engine. Given a user's intent, generate a detailed execution plan.
+_PLAN_GENERATION_TEMPLATE = f"""You are Opera's planning engine. Given a user's intent, generate a detailed execution plan.
 
 Break down the intent into discrete steps. Each step should specify:
 - A clear description
 - The tool to use (if applicable)
 - Arguments for the tool
 
-Available tools:
-- embedder: Generate embeddings for text
-- vector_db: Search or store in vector database
-- llm_summarizer: Summarize information
-- entity_extractor: Extract entities from text
-- db_writer: Write to database
-- db_deleter: Delete from database
-- db_updater: Update database records
-- query_analyzer: Analyze queries
-- memory_fetcher: Fetch memories
-- llm_writer: Generate content with LLM
-- llm_reviewer: Review and refine content
-- chat_model: General conversation
+{{tools}}
 
 Respond in JSON format:
-{
+{{
   "steps": [
-    {
+    {{
       "step_id": 1,
       "description": "step description",
       "tool_name": "tool_name",
-      "tool_arguments": {"key": "value"}
-    }
+      "tool_arguments": {{"key": "value"}}
+    }}
   ],
   "estimated_duration_seconds": 5
-}"""
+}}"""
+
+_REASONING_PIPELINE_TEMPLATE = f"""You are Opera, a personal intelligence operating system. Understand what the user wants to do, then plan how to do it.
+
+Given the user's input and any available context, derive their intent.
+
+{INTENT_CATEGORIES}
+
+Extract any relevant parameters from the user's input.
+
+Then break the intent down into discrete execution steps, each with a clear description, the tool to use (if applicable) and arguments for the tool.
+
+{{tools}}
+
+Respond in JSON format, with "intent" first:
+{{
+  "intent": {{
+    "category": "category_name",
+    "description": "clear description of what user wants",
+    "confidence": 0.0-1.0,
+    "parameters": {{"key": "value"}}
+  }},
+  "plan": {{
+    "steps": [
+      {{
+        "step_id": 1,
+        "description": "step description",
+        "tool_name": "tool_name",
+        "tool_arguments": {{"key": "value"}}
+      }}
+    ],
+    "estimated_duration_seconds": 5
+  }}
+}}"""
+
+
+def describe_tools(registry: Optional[ToolRegistry] = None) -> str:
+    """List registered tools with their arguments and permissions for the planner.
+
+    Optional arguments are marked with ``?``.
+    """
+    registry = registry or get_registry()
+    lines = [
+        "Available tools (use only these, with tool_name null for steps "
+        "that need no tool):"
+    ]
+    for schema in registry.get_all_schemas():
+        arguments = ", ".join(
+            param.name if param.required else f"{param.name}?" for param in schema.parameters
+        )
+        permissions = ", ".join(permission.value for permission in schema.permissions)
+        lines.append(f"- {schema.name}({arguments}) [{permissions}]: {schema.description}")
+    return "\n".join(lines)
+
+
+def plan_generation_prompt(registry: Optional[ToolRegistry] = None) -> str:
+    """System prompt for plan generation, listing the registered tools."""
+    return _PLAN_GENERATION_TEMPLATE.replace(_TOOLS_PLACEHOLDER, describe_tools(registry))
+
+
+def reasoning_pipeline_prompt(registry: Optional[ToolRegistry] = None) -> str:
+    """System prompt for deriving intent and plan in one call, listing the registered tools."""
+    return _REASONING_PIPELINE_TEMPLATE.replace(_TOOLS_PLACEHOLDER, describe_tools(registry))
+
 
 MEMORY_CONTEXT_PROMPT = """Here are relevant memories from the user's past:
 
@@ -76,6 +139,12 @@ def build_intent_messages(user_input: str, context: dict = None) -> list:
     
     return messages
 
+def build_reasoning_messages(user_input: str, context: dict = None) -> list:
+    """Build messages for deriving intent and plan in one call."""
+    messages = build_intent_messages(user_input, context)
+    messages[0]["content"] = reasoning_pipeline_prompt()
+    return messages
+
 def build_plan_messages(intent_description: str, intent_category: str, parameters: dict = None) -> list:
     """Build messages for plan generation."""
     user_message = f"Intent: {intent_description}\nCategory: {intent_category}"
@@ -84,6 +153,6 @@ def build_plan_messages(intent_description: str, intent_category: str, parameter
         user_message += f"\nParameters: {parameters}"
     
     return [
-        {"role": "system", "content": PLAN_GENERATION_PROMPT},
+        {"role": "system", "content": plan_generation_prompt()},
         {"role": "user", "content": user_message}
     ]
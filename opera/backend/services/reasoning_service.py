@@ -1,51 +1,173 @@
-from typing import List, Dict
+from typing import Any, Iterator, List, Dict, Optional, Tuple
+import threading
 import uuid
 import json
+import re
 from opera.backend.models.reasoning import (
     Intent, Plan, PlanStep, ActionPreview
 )
-from opera.backend.services.llm_client import get_llm_client
-from opera.backend.services.prompts import build_intent_messages, build_plan_messages
+from opera.backend.config import config
+from opera.backend.services.intent_classifier import IntentPrediction, get_intent_classifier
+from opera.backend.services.model_manager import get_model_manager
+from opera.backend.services.plan_templates import get_plan_template_store
+from opera.backend.services.prompts import (
+    INTENT_DERIVATION_PROMPT, build_intent_messages, build_plan_messages,
+    build_reasoning_messages, plan_generation_prompt, reasoning_pipeline_prompt
+)
+
+INTENT_DESCRIPTIONS = {
+    "information_retrieval": "User wants to retrieve information: {}",
+    "memory_storage": "User wants to store a memory: {}",
+    "memory_management": "User wants to delete information: {}",
+    "content_creation": "User wants to create content: {}",
+    "memory_modification": "User wants to modify information: {}",
+    "summarization": "User wants a summary: {}",
+    "general_inquiry": "User wants to: {}",
+}
+
+_json_decoder = json.JSONDecoder()
+
+
+def _json_field(text: str, key: str) -> Optional[Any]:
+    """
+    Return the value of the first ``"key": ...`` in possibly incomplete JSON.
+
+    Returns None until the value itself has been fully received, so it can
+    be called on a growing stream of text.
+    """
+    match = re.search(r'"%s"\s*:\s*' % re.escape(key), text)
+    if match is None:
+        return None
+    try:
+        value, _ = _json_decoder.raw_decode(text, match.end())
+    except ValueError:
+        return None
+    return value
 
 
 class ReasoningService:
     def __init__(self):
-        """Initialize reasoning service with LLM client."""
+        """
+        Initialize reasoning service.
+        
+        The LLM loads in the background (see ``model_manager``); until it is
+        ready, or if it fails to load, requests use rule-based reasoning.
+        Routine intents are classified from their embedding without the LLM
+        (see ``intent_classifier``) once the embedding model is ready.
+        """
+        self.use_llm = True
+        
+        # Local models can precompute the fixed system prompts' KV cache
+        get_model_manager().on_ready("llm", self._warm_prefixes)
+        if config.INTENT_CLASSIFIER_ENABLED:
+            get_model_manager().on_ready("embeddings", get_intent_classifier)
+    
+    @property
+    def llm(self):
+        """The LLM client, or None while it is loading or if it is unavailable.
+
+        Each access may wait up to ``MODEL_WAIT_TIMEOUT_SECONDS`` for a
+        loading model, so requests read it once and pass the client on.
+        """
+        if not self.use_llm:
+            return None
+        try:
+            return get_model_manager().get("llm")
+        except Exception:
+            return None
+    
+    def _warm_prefixes(self, llm) -> None:
+        warm_prefix = getattr(llm, "warm_prefix", None)
+        if warm_prefix:
+            for prompt in (INTENT_DERIVATION_PROMPT, plan_generation_prompt(), reasoning_pipeline_prompt()):
+                warm_prefix([{"role": "system", "content": prompt}])
+    
+    def _forget(self, llm, messages: List[Dict[str, str]], **params) -> None:
+        """Drop a cached LLM response that couldn't be used so the next call retries."""
+        forget = getattr(llm, "forget", None)
+        if forget:
+            forget(messages, **params)
+    
+    @property
+    def intent_classifier(self):
+        """The embedding intent classifier, or None if disabled or not ready."""
+        if not config.INTENT_CLASSIFIER_ENABLED:
+            return None
         try:
-            self.llm = get_llm_client()
-            self.use_llm = True
-        except ValueError as e:
-            print(f"Warning: LLM not available, falling back to rule-based: {e}")
-            self.llm = None
-            self.use_llm = False
+            # Don't hold requests while embeddings load; the LLM or rules answer instead
+            return get_intent_classifier(get_model_manager().get("embeddings", timeout=0))
+        except Exception:
+            return None
     
     def derive_intent(self, user_input: str, context: dict = None) -> Intent:
         """
-        Derives intent using LLM or falls back to rule-based heuristics.
+        Derives intent with the embedding classifier when it is confident,
+        otherwise using LLM or falling back to rule-based heuristics.
         """
-        if self.use_llm and self.llm:
-            return self._derive_intent_llm(user_input, context)
+        prediction, intent = self._classify_intent(user_input)
+        if intent is not None:
+            return intent
+        
+        llm = self.llm
+        if llm:
+            return self._derive_intent_llm(llm, user_input, context, prediction)
         else:
             return self._derive_intent_rules(user_input)
     
-    def _derive_intent_llm(self, user_input: str, context: dict = None) -> Intent:
-        """Use LLM to derive intent."""
+    def _classify_intent(self, user_input: str) -> Tuple[Optional[IntentPrediction], Optional[Intent]]:
+        """Run the embedding classifier; the intent is only set for a confident prediction."""
+        classifier = self.intent_classifier
+        if classifier is None:
+            return None, None
+        try:
+            prediction = classifier.predict(user_input)
+        except Exception as e:
+            print(f"Intent classification failed: {e}")
+            return None, None
+        if not prediction.accepted:
+            return prediction, None
+        return prediction, Intent(
+            category=prediction.category,
+            description=INTENT_DESCRIPTIONS[prediction.category].format(user_input),
+            confidence=round(prediction.confidence, 3),
+            parameters={"query": user_input}
+        )
+    
+    def _learn_intent(self, prediction: Optional[IntentPrediction], intent: Intent) -> None:
+        """Teach the classifier an LLM-derived intent for an input it was unsure about."""
+        if (
+            prediction is not None
+            and intent.category in INTENT_DESCRIPTIONS
+            and intent.confidence >= config.INTENT_CLASSIFIER_LEARN_MIN_CONFIDENCE
+        ):
+            self.intent_classifier.learn(prediction.vector, intent.category)
+    
+    @staticmethod
+    def _intent_from_data(intent_data: dict, user_input: str) -> Intent:
+        return Intent(
+            category=intent_data.get("category", "general_inquiry"),
+            description=intent_data.get("description", user_input),
+            confidence=intent_data.get("confidence", 0.8),
+            parameters=intent_data.get("parameters", {"query": user_input})
+        )
+    
+    def _derive_intent_llm(
+        self, llm, user_input: str, context: dict = None, prediction: Optional[IntentPrediction] = None
+    ) -> Intent:
+        """Use LLM to derive intent, teaching the classifier its answer."""
         messages = build_intent_messages(user_input, context)
         
         try:
-            response = self.llm.complete(messages, temperature=0.3, max_tokens=300)
+            response = llm.complete(messages, temperature=0.3, max_tokens=300)
             # Parse JSON response
-            intent_data = json.loads(response)
-            
-            return Intent(
-                category=intent_data.get("category", "general_inquiry"),
-                description=intent_data.get("description", user_input),
-                confidence=intent_data.get("confidence", 0.8),
-                parameters=intent_data.get("parameters", {"query": user_input})
-            )
+            intent = self._intent_from_data(json.loads(response), user_input)
         except Exception as e:
             print(f"LLM intent derivation failed: {e}, falling back to rules")
+            self._forget(llm, messages, temperature=0.3, max_tokens=300)
             return self._derive_intent_rules(user_input)
+        
+        self._learn_intent(prediction, intent)
+        return intent
     
     def _derive_intent_rules(self, user_input: str) -> Intent:
         """Fallback rule-based intent derivation."""
@@ -53,43 +175,42 @@ class ReasoningService:
         
         if "find" in text or "search" in text or "what is" in text:
             category = "information_retrieval"
-            description = f"User wants to retrieve information: {user_input}"
         elif "remember" in text or "save" in text or "store" in text:
             category = "memory_storage"
-            description = f"User wants to store a memory: {user_input}"
         elif "delete" in text or "remove" in text:
             category = "memory_management"
-            description = f"User wants to delete information: {user_input}"
         elif "create" in text or "draft" in text or "write" in text:
             category = "content_creation"
-            description = f"User wants to create content: {user_input}"
         elif "update" in text or "edit" in text or "modify" in text:
             category = "memory_modification"
-            description = f"User wants to modify information: {user_input}"
         elif "summarize" in text or "summarise" in text:
             category = "summarization"
-            description = f"User wants a summary: {user_input}"
         else:
             category = "general_inquiry"
-            description = f"User wants to: {user_input}"
             
         return Intent(
             category=category,
-            description=description,
+            description=INTENT_DESCRIPTIONS[category].format(user_input),
             confidence=0.85,
             parameters={"query": user_input}
         )
 
     def generate_plan(self, intent: Intent) -> Plan:
         """
-        Generates a plan using LLM or falls back to rule-based generation.
+        Generates a plan from a learned template (see ``plan_templates``),
+        using LLM, or falls back to rule-based generation.
         """
-        if self.use_llm and self.llm:
-            return self._generate_plan_llm(intent)
+        plan = self._plan_from_template(intent)
+        if plan is not None:
+            return plan
+        
+        llm = self.llm
+        if llm:
+            return self._generate_plan_llm(llm, intent)
         else:
             return self._generate_plan_rules(intent)
     
-    def _generate_plan_llm(self, intent: Intent) -> Plan:
+    def _generate_plan_llm(self, llm, intent: Intent) -> Plan:
         """Use LLM to generate execution plan."""
         messages = build_plan_messages(
             intent.description,
@@ -98,27 +219,110 @@ class ReasoningService:
         )
         
         try:
-            response = self.llm.complete(messages, temperature=0.3, max_tokens=500)
-            plan_data = json.loads(response)
-            
-            steps = [
-                PlanStep(
-                    step_id=step.get("step_id", i+1),
-                    description=step.get("description", ""),
-                    tool_name=step.get("tool_name"),
-                    tool_arguments=step.get("tool_arguments", {})
-                )
-                for i, step in enumerate(plan_data.get("steps", []))
-            ]
-            
-            return Plan(
-                plan_id=str(uuid.uuid4()),
-                steps=steps,
-                estimated_duration_seconds=plan_data.get("estimated_duration_seconds", 5)
-            )
+            response = llm.complete(messages, temperature=0.3, max_tokens=500)
+            plan = self._plan_from_data(json.loads(response))
         except Exception as e:
             print(f"LLM plan generation failed: {e}, falling back to rules")
+            self._forget(llm, messages, temperature=0.3, max_tokens=500)
             return self._generate_plan_rules(intent)
+        
+        self._record_template(intent, plan)
+        return plan
+    
+    def _plan_from_template(self, intent: Intent) -> Optional[Plan]:
+        templates = get_plan_template_store()
+        return templates.lookup(intent) if templates is not None else None
+    
+    def _record_template(self, intent: Intent, plan: Plan) -> None:
+        templates = get_plan_template_store()
+        if templates is not None:
+            templates.record(intent, plan)
+    
+    @staticmethod
+    def _plan_from_data(plan_data: dict) -> Plan:
+        steps = [
+            PlanStep(
+                step_id=step.get("step_id", i+1),
+                description=step.get("description", ""),
+                tool_name=step.get("tool_name"),
+                tool_arguments=step.get("tool_arguments", {})
+            )
+            for i, step in enumerate(plan_data.get("steps", []))
+        ]
+        
+        return Plan(
+            plan_id=str(uuid.uuid4()),
+            steps=steps,
+            estimated_duration_seconds=plan_data.get("estimated_duration_seconds", 5)
+        )
+    
+    def reason(self, user_input: str, context: dict = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Derives intent and plan together, yielding ``("intent", Intent)`` as
+        soon as the intent is known and then ``("plan", Plan)``.
+        
+        A confident classifier intent is yielded immediately and only the
+        plan is generated. Otherwise the LLM is asked for both in one
+        streamed call, and the intent is yielded once its JSON object is
+        complete, while the plan is still being generated.
+        """
+        prediction, intent = self._classify_intent(user_input)
+        if intent is not None:
+            yield "intent", intent
+            yield "plan", self.generate_plan(intent)
+            return
+        
+        llm = self.llm
+        if llm:
+            yield from self._reason_llm(llm, user_input, context, prediction)
+        else:
+            intent = self._derive_intent_rules(user_input)
+            yield "intent", intent
+            yield "plan", self._generate_plan_rules(intent)
+    
+    def _reason_llm(
+        self, llm, user_input: str, context: dict = None, prediction: Optional[IntentPrediction] = None
+    ) -> Iterator[Tuple[str, Any]]:
+        """Use one streamed LLM call for intent and plan, falling back to separate calls."""
+        messages = build_reasoning_messages(user_input, context)
+        params = dict(temperature=0.3, max_tokens=800)
+        intent = None
+        plan = None
+        
+        try:
+            response = ""
+            chunks = llm.stream(messages, **params)
+            try:
+                for chunk in chunks:
+                    response += chunk
+                    if intent is None:
+                        intent_data = _json_field(response, "intent")
+                        if intent_data is not None:
+                            intent = self._intent_from_data(intent_data, user_input)
+                            self._learn_intent(prediction, intent)
+                            yield "intent", intent
+                            # A known plan shape ends generation early
+                            plan = self._plan_from_template(intent)
+                            if plan is not None:
+                                break
+            finally:
+                chunks.close()
+            
+            if plan is None:
+                plan_data = _json_field(response, "plan")
+                if intent is None or plan_data is None:
+                    raise ValueError("response has no intent and plan")
+                plan = self._plan_from_data(plan_data)
+                self._record_template(intent, plan)
+        except Exception as e:
+            print(f"LLM reasoning failed: {e}, falling back to separate intent and plan")
+            self._forget(llm, messages, **params)
+            if intent is None:
+                intent = self._derive_intent_llm(llm, user_input, context, prediction)
+                yield "intent", intent
+            plan = self._plan_from_template(intent) or self._generate_plan_llm(llm, intent)
+        
+        yield "plan", plan
     
     def _generate_plan_rules(self, intent: Intent) -> Plan:
         """Fallback rule-based plan generation."""
@@ -211,3 +415,16 @@ class ReasoningService:
                 risk_level="low"
             )
 
+
+
+# Global reasoning service instance
+_reasoning_service: Optional[ReasoningService] = None
+_reasoning_service_lock = threading.Lock()
+
+def get_reasoning_service() -> ReasoningService:
+    """Get or create the global reasoning service."""
+    global _reasoning_service
+    with _reasoning_service_lock:
+        if _reasoning_service is None:
+            _reasoning_service = ReasoningService()
+        return _reasoning_service
@@ -1,64 +1,147 @@
 """Vector store service using ChromaDB for semantic memory search."""
+import hashlib
+import re
+import threading
 from typing import List, Dict, Optional
-import chromadb
-from chromadb.config import Settings
 from opera.backend.config import config
 from opera.backend.models.memory import MemoryItem
 
 
+def active_embedding_model() -> str:
+    """Name of the embedding model ``get_embedding_service`` will use."""
+    return config.LOCAL_EMBEDDING_MODEL if config.USE_LOCAL_MODEL else config.OPENAI_EMBEDDING_MODEL
+
+
+def collection_name(embedding_model: str) -> str:
+    """Chroma collection holding the vectors of one embedding model.
+
+    Vectors from different models (and dimensions) can't share a
+    collection, so switching models starts a new one instead of failing
+    every query on a dimension mismatch.
+    """
+    slug = re.sub(r"[^a-z0-9]+", "-", embedding_model.lower()).strip("-")
+    name = f"memories-{slug}"
+    if len(name) > 63:
+        # Chroma names are at most 63 characters
+        digest = hashlib.sha1(embedding_model.encode()).hexdigest()[:8]
+        name = f"{name[:54].rstrip('-')}-{digest}"
+    return name
+
+
 class VectorStore:
-    """Service for storing and searching memory embeddings."""
-    
-    def __init__(self):
-        """Initialize ChromaDB client and collection."""
-        self.client = chromadb.Client(Settings(
-            persist_directory=config.CHROMA_PERSIST_DIR,
-            anonymized_telemetry=False
-        ))
-        
-        # Get or create collection for memories
+    """Service for storing and searching memory embeddings.
+
+    A single instance is shared by the whole process (see
+    ``get_vector_store``); writes are serialized with a lock.
+    """
+
+    def __init__(self, embedding_model: Optional[str] = None):
+        """
+        Initialize ChromaDB client and collection.
+
+        Args:
+            embedding_model: Model whose vectors are stored; defaults to the
+                configured embedding model
+        """
+        import chromadb
+        from chromadb.config import Settings
+
+        settings = Settings(anonymized_telemetry=False)
+        if config.CHROMA_HOST:
+            # Shared Chroma server, e.g. the chromadb service in docker-compose
+            self.client = chromadb.HttpClient(
+                host=config.CHROMA_HOST,
+                port=config.CHROMA_PORT,
+                settings=settings
+            )
+        else:
+            self.client = chromadb.PersistentClient(
+                path=config.CHROMA_PERSIST_DIR,
+                settings=settings
+            )
+        self._lock = threading.RLock()
+
+        # Get or create the collection for this embedding model's vectors
+        self.embedding_model = embedding_model or active_embedding_model()
         self.collection = self.client.get_or_create_collection(
-            name="memories",
-            metadata={"hnsw:space": "cosine"}
+            name=collection_name(self.embedding_model),
+            metadata={"hnsw:space": "cosine", "embedding_model": self.embedding_model}
         )
-    
+
+    def is_empty(self) -> bool:
+        """True if no vectors have been stored in the collection yet."""
+        return self.collection.count() == 0
+
     def add_memory(
-        self, 
-        memory_id: int, 
-        content: str, 
+        self,
+        memory_id: int,
+        content: str,
         embedding: List[float],
         metadata: Dict
     ) -> None:
         """
         Add a memory to the vector store.
-        
+
         Args:
             memory_id: Unique identifier for the memory
             content: The text content
             embedding: The embedding vector
             metadata: Additional metadata (type, timestamp, etc.)
         """
-        self.collection.add(
-            ids=[str(memory_id)],
-            embeddings=[embedding],
-            documents=[content],
-            metadatas=[metadata]
+        with self._lock:
+            self.collection.add(
+                ids=[str(memory_id)],
+                embeddings=[embedding],
+                documents=[content],
+                metadatas=[metadata]
+            )
+
+    def add_memories(
+        self,
+        memory_ids: List[int],
+        contents: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict],
+        batch_size: Optional[int] = None
+    ) -> None:
+        """
+        Upsert many memories into the vector store in large batches.
+
+        Args:
+            memory_ids: Unique identifiers for the memories
+            contents: The text contents
+            embeddings: The embedding vectors
+            metadatas: Metadata dicts aligned with the other lists
+            batch_size: Items per Chroma call (capped at the client's maximum)
+        """
+        batch_size = min(
+            batch_size or config.VECTOR_UPSERT_BATCH_SIZE,
+            self.client.get_max_batch_size()
         )
-    
+        with self._lock:
+            for start in range(0, len(memory_ids), batch_size):
+                end = start + batch_size
+                self.collection.upsert(
+                    ids=[str(memory_id) for memory_id in memory_ids[start:end]],
+                    embeddings=embeddings[start:end],
+                    documents=contents[start:end],
+                    metadatas=metadatas[start:end]
+                )
+
     def search_similar(
-        self, 
-        query_embedding: List[float], 
+        self,
+        query_embedding: List[float],
         n_results: int = 10,
         filter_dict: Optional[Dict] = None
     ) -> List[Dict]:
         """
         Search for similar memories.
-        
+
         Args:
             query_embedding: The query embedding vector
             n_results: Number of results to return
             filter_dict: Optional metadata filters
-            
+
         Returns:
             List of similar memories with scores
         """
@@ -67,7 +150,7 @@ class VectorStore:
             n_results=n_results,
             where=filter_dict
         )
-        
+
         # Format results
         formatted_results = []
         if results['ids'] and results['ids'][0]:
@@ -78,9 +161,9 @@ class VectorStore:
                     'metadata': results['metadatas'][0][i],
                     'distance': results['distances'][0][i] if 'distances' in results else None
                 })
-        
+
         return formatted_results
-    
+
     def update_memory(
         self,
         memory_id: int,
@@ -89,13 +172,50 @@ class VectorStore:
         metadata: Dict
     ) -> None:
         """Update an existing memory in the vector store."""
-        self.collection.update(
-            ids=[str(memory_id)],
-            embeddings=[embedding],
-            documents=[content],
-            metadatas=[metadata]
-        )
-    
+        with self._lock:
+            self.collection.update(
+                ids=[str(memory_id)],
+                embeddings=[embedding],
+                documents=[content],
+                metadatas=[metadata]
+            )
+
     def delete_memory(self, memory_id: int) -> None:
         """Delete a memory from the vector store."""
-        self.collection.delete(ids=[str(memory_id)])
+        with self._lock:
+            self.collection.delete(ids=[str(memory_id)])
+
+    def close(self) -> None:
+        """Release the Chroma client and its background resources."""
+        with self._lock:
+            self.client.clear_system_cache()
+
+
+# Global vector store instance
+_vector_store: Optional[VectorStore] = None
+_vector_store_lock = threading.Lock()
+
+def get_vector_store() -> VectorStore:
+    """Get or create the process-wide vector store.
+
+    ``config.VECTOR_BACKEND`` selects Chroma (``"chroma"``) or the in-process
+    NumPy flat index (``"numpy"``); both expose the same interface.
+    """
+    global _vector_store
+    with _vector_store_lock:
+        if _vector_store is None:
+            if config.VECTOR_BACKEND == "numpy":
+                from opera.backend.services.flat_vector_store import FlatVectorStore
+                _vector_store = FlatVectorStore()
+            else:
+                _vector_store = VectorStore()
+        return _vector_store
+
+
+def close_vector_store() -> None:
+    """Close the process-wide vector store, if one was created."""
+    global _vector_store
+    with _vector_store_lock:
+        if _vector_store is not None:
+            _vector_store.close()
+            _vector_store = None
@@ -0,0 +1,124 @@
+"""Import-time profile and startup benchmark for the backend.
+
+Run ``python -m opera.backend.startup_profile`` to print the modules that
+cost the most to import (cumulative, from ``python -X importtime``), any
+heavy client library pulled in at import time, and how long importing the
+app and running its lifespan startup take. Exits non-zero when a heavy
+library is imported eagerly or, if ``--budget`` is given, when import plus
+startup takes longer than that many seconds.
+
+Every measurement runs in a fresh interpreter so modules already imported
+by the caller don't hide their cost. Model preloading and job workers are
+turned off there (``MODEL_PRELOAD=false``, ``JOB_WORKERS=0``): they import
+torch and chromadb on background threads, which would make the
+heavy-library check depend on timing.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+APP_MODULE = "opera.backend.main"
+
+# Libraries that must only be imported when first used
+HEAVY_MODULES = (
+    "chromadb", "openai", "torch", "transformers", "sentence_transformers",
+    "optimum", "onnxruntime", "bs4", "requests"
+)
+
+_BENCHMARK_SCRIPT = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+import {module} as target
+imported = time.perf_counter()
+
+async def startup():
+    async with target.app.router.lifespan_context(target.app):
+        return time.perf_counter()
+
+started = asyncio.run(startup()) if {lifespan} else imported
+print(json.dumps({{
+    "import_seconds": imported - start,
+    "startup_seconds": started - imported,
+    "heavy": sorted(name for name in {heavy!r} if name in sys.modules)
+}}))
+"""
+
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    env = dict(os.environ, MODEL_PRELOAD="false", JOB_WORKERS="0")
+    result = subprocess.run([sys.executable, *args], capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"exited with status {result.returncode}")
+    return result
+
+
+def import_profile(module: str = APP_MODULE) -> List[Tuple[str, int]]:
+    """
+    Import a module in a fresh interpreter with ``-X importtime``.
+
+    Returns:
+        (module name, cumulative import time in microseconds) for every
+        module imported, most expensive first
+    """
+    result = _run(["-X", "importtime", "-c", f"import {module}"])
+    profile = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        profile.append((name.strip(), int(cumulative)))
+    profile.sort(key=lambda entry: entry[1], reverse=True)
+    return profile
+
+
+def benchmark_startup(module: str = APP_MODULE, lifespan: bool = True) -> Dict:
+    """
+    Time importing the app and, optionally, running its lifespan startup.
+
+    Returns:
+        ``import_seconds``, ``startup_seconds`` and ``heavy``, the heavy
+        libraries loaded by the end of startup
+    """
+    script = _BENCHMARK_SCRIPT.format(module=module, lifespan=lifespan, heavy=HEAVY_MODULES)
+    return json.loads(_run(["-c", script]).stdout.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Profile backend import and startup time")
+    parser.add_argument("--module", default=APP_MODULE)
+    parser.add_argument("--top", type=int, default=25, help="Modules to list")
+    parser.add_argument(
+        "--budget", type=float, default=None,
+        help="Fail if import + startup takes longer than this many seconds (off by default)"
+    )
+    parser.add_argument("--no-lifespan", action="store_true", help="Only time the import")
+    args = parser.parse_args()
+
+    profile = import_profile(args.module)
+    print(f"Slowest imports for {args.module} (cumulative):")
+    for name, micros in profile[:args.top]:
+        print(f"  {micros / 1000:9.1f} ms  {name}")
+
+    result = benchmark_startup(args.module, lifespan=not args.no_lifespan)
+    total = result["import_seconds"] + result["startup_seconds"]
+    print(f"\nImport:  {result['import_seconds'] * 1000:.0f} ms")
+    print(f"Startup: {result['startup_seconds'] * 1000:.0f} ms")
+
+    failed = False
+    if result["heavy"]:
+        print(f"Heavy libraries loaded during startup: {', '.join(result['heavy'])}")
+        failed = True
+    if args.budget is not None and total > args.budget:
+        print(f"Startup took {total:.2f}s, over the {args.budget:.2f}s budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
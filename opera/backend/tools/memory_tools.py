@@ -1,6 +1,9 @@
 """Memory tools for Opera."""
 from typing import List, Dict, Any
 from opera.backend.tools.registry import tool, ToolPermission
+from opera.backend.services.fulltext import search_fulltext
+from opera.backend.services.job_queue import notify_workers
+from opera.backend.services.memory_indexing import enqueue_embedding
 from opera.backend.services.memory_store import add_memory, list_memories
 from opera.backend.models.memory import MemoryItem
 
@@ -17,7 +20,7 @@ def store_memory(
     source: str = "tool",
     confidence: float = 1.0
 ) -> str:
-    """Store a new memory in the database."""
+    """Store a new memory in the database and queue its embedding."""
     item = MemoryItem(
         type=memory_type,
         content=content,
@@ -25,18 +28,41 @@ def store_memory(
         confidence=confidence
     )
     
-    memory = add_memory(item)
+    memory = add_memory(item, on_insert=enqueue_embedding)
+    notify_workers()
     return f"Stored memory with ID {memory.id}"
 
 
 @tool(
     name="fetch_memories",
-    description="Fetch memories, optionally filtered by type",
+    description="Fetch memories, optionally filtered by type and keyword query",
     permissions=[ToolPermission.READ],
-    examples=["fetch_memories(memory_type='episodic')"]
+    examples=[
+        "fetch_memories(memory_type='episodic')",
+        "fetch_memories(query='\"project kickoff\" sarah*', limit=5)"
+    ]
 )
-def fetch_memories(memory_type: str = None) -> List[Dict[str, Any]]:
-    """Fetch memories from the database."""
+def fetch_memories(memory_type: str = None, query: str = None, limit: int = 20) -> List[Dict[str, Any]]:
+    """Fetch memories from the database.
+
+    With a ``query`` this runs a ranked full-text search (terms, "quoted
+    phrases" and prefix* terms) and includes a highlighted snippet.
+    """
+    if query:
+        return [
+            {
+                "id": m.id,
+                "type": m.type,
+                "content": m.content,
+                "snippet": snippet,
+                "score": score,
+                "source": m.source,
+                "timestamp": m.timestamp.isoformat(),
+                "confidence": m.confidence
+            }
+            for m, score, snippet in search_fulltext(query, memory_type=memory_type, limit=limit)
+        ]
+
     memories = list_memories(memory_type)
     
     return [
@@ -60,12 +86,12 @@ def fetch_memories(memory_type: str = None) -> List[Dict[str, Any]]:
 )
 def search_memories(query: str, limit: int = 5) -> List[Dict[str, Any]]:
     """Search for memories using semantic similarity."""
-    from opera.backend.services.embeddings import EmbeddingService
-    from opera.backend.services.vector_store import VectorStore
+    from opera.backend.services.model_manager import get_model_manager
+    from opera.backend.services.vector_store import get_vector_store
     
     try:
-        embedding_service = EmbeddingService()
-        vector_store = VectorStore()
+        embedding_service = get_model_manager().get("embeddings")
+        vector_store = get_vector_store()
         
         query_embedding = embedding_service.generate_embedding(query)
         results = vector_store.search_similar(query_embedding, n_results=limit)
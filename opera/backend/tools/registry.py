@@ -62,12 +62,15 @@ class ToolRegistry:
     
     def __init__(self):
         self._tools: Dict[str, Tool] = {}
+        # Bumped on every change so caches built from the tool set can tell they are stale
+        self.version = 0
     
     def register(self, tool: Tool) -> None:
         """Register a tool in the registry."""
         if tool.name in self._tools:
             raise ValueError(f"Tool '{tool.name}' already registered")
         self._tools[tool.name] = tool
+        self.version += 1
     
     def get(self, name: str) -> Optional[Tool]:
         """Get a tool by name."""
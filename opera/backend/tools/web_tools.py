@@ -1,6 +1,4 @@
 """Web tools for Opera."""
-import requests
-from bs4 import BeautifulSoup
 from typing import Dict, Any
 from opera.backend.tools.registry import tool, ToolPermission
 
@@ -13,6 +11,9 @@ from opera.backend.tools.registry import tool, ToolPermission
 )
 def fetch_url(url: str) -> str:
     """Fetch and return the text content of a URL."""
+    import requests
+    from bs4 import BeautifulSoup
+    
     try:
         response = requests.get(url, timeout=10)
         response.raise_for_status()
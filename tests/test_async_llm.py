@@ -0,0 +1,234 @@
+import asyncio
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from opera.backend.models.memory import MemoryItem
+from opera.backend.services import background_reasoner
+from opera.backend.services.background_reasoner import BackgroundReasoner
+from opera.backend.services.llm_client import AsyncOpenAIClient, LLMClient, ThreadedAsyncLLMClient
+
+
+class FakeCompletions:
+    """Stands in for ``AsyncOpenAI().chat.completions``."""
+
+    def __init__(self, reply="", chunks=()):
+        self.reply = reply
+        self.chunks = chunks
+        self.calls = []
+
+    async def create(self, stream=False, **kwargs):
+        self.calls.append(dict(kwargs, stream=stream))
+        if not stream:
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.reply))])
+        return self._stream()
+
+    async def _stream(self):
+        for text in self.chunks:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class TestAsyncOpenAIClient(unittest.TestCase):
+    def make_client(self, completions):
+        client = AsyncOpenAIClient.__new__(AsyncOpenAIClient)
+        client.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        client.model = "gpt-test"
+        return client
+
+    def test_acomplete_returns_the_message(self):
+        """Test that acomplete forwards the request and returns the reply text."""
+        completions = FakeCompletions(reply="hello")
+        client = self.make_client(completions)
+        messages = [{"role": "user", "content": "hi"}]
+
+        reply = asyncio.run(client.acomplete(messages, temperature=0.2, max_tokens=5, top_p=0.9))
+
+        self.assertEqual(reply, "hello")
+        self.assertEqual(completions.calls, [{
+            "model": "gpt-test", "messages": messages, "temperature": 0.2,
+            "max_tokens": 5, "top_p": 0.9, "stream": False
+        }])
+
+    def test_astream_skips_empty_deltas(self):
+        """Test that astream yields each non-empty delta in order."""
+        client = self.make_client(FakeCompletions(chunks=["Hel", None, "lo", ""]))
+
+        async def collect():
+            return [chunk async for chunk in client.astream([{"role": "user", "content": "hi"}])]
+
+        self.assertEqual(asyncio.run(collect()), ["Hel", "lo"])
+
+
+class BlockingClient(LLMClient):
+    """Synchronous client whose stream can be held open by the test."""
+
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.closed = threading.Event()
+        self.threads = set()
+
+    def complete(self, messages, **kwargs):
+        self.threads.add(threading.current_thread().name)
+        if self.fail_at == "complete":
+            raise RuntimeError("model failed")
+        return f"{messages[-1]['content']} {kwargs}"
+
+    def stream(self, messages, **kwargs):
+        if self.fail_at == "start":
+            raise RuntimeError("model failed")
+        try:
+            for i in range(100):
+                if self.fail_at == i:
+                    raise RuntimeError("model failed")
+                yield str(i)
+        finally:
+            self.closed.set()
+
+
+class TestThreadedAsyncLLMClient(unittest.TestCase):
+    def setUp(self):
+        self.inner = BlockingClient()
+        self.client = ThreadedAsyncLLMClient(lambda: self.inner, max_workers=2)
+        self.addCleanup(lambda: asyncio.run(self.client.aclose()))
+
+    def collect(self, limit=None):
+        async def run():
+            chunks = []
+            stream = self.client.astream([{"role": "user", "content": "hi"}])
+            try:
+                async for chunk in stream:
+                    chunks.append(chunk)
+                    if len(chunks) == limit:
+                        break
+            finally:
+                await stream.aclose()
+            return chunks
+        return asyncio.run(run())
+
+    def test_acomplete_runs_on_a_worker_thread(self):
+        """Test that acomplete offloads complete() with its arguments."""
+        reply = asyncio.run(self.client.acomplete([{"role": "user", "content": "hi"}], max_tokens=3))
+
+        self.assertEqual(reply, "hi {'max_tokens': 3}")
+        self.assertTrue(all(name.startswith("llm-offload") for name in self.inner.threads))
+
+    def test_acomplete_raises_the_client_error(self):
+        """Test that an exception in complete() reaches the awaiting caller."""
+        self.inner.fail_at = "complete"
+        with self.assertRaisesRegex(RuntimeError, "model failed"):
+            asyncio.run(self.client.acomplete([{"role": "user", "content": "hi"}]))
+
+    def test_astream_relays_every_chunk(self):
+        """Test that astream yields the synchronous stream's chunks in order."""
+        self.assertEqual(self.collect(), [str(i) for i in range(100)])
+        self.assertTrue(self.inner.closed.is_set())
+
+    def test_astream_raises_errors_from_the_stream(self):
+        """Test that errors raised before or during the stream are re-raised."""
+        for fail_at in ("start", 3):
+            self.inner.fail_at = fail_at
+            with self.assertRaisesRegex(RuntimeError, "model failed"):
+                self.collect()
+
+    def test_breaking_out_closes_the_stream(self):
+        """Test that a consumer stopping early closes the worker's generator."""
+        self.assertEqual(self.collect(limit=2), ["0", "1"])
+        self.assertTrue(self.inner.closed.wait(1))
+
+
+class GatedLLM:
+    """Async client whose calls only return once ``expected`` are in flight."""
+
+    def __init__(self, expected):
+        self.expected = expected
+        self.in_flight = 0
+        self.peak = 0
+        self.all_started = asyncio.Event()
+
+    async def acomplete(self, messages, **kwargs):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        if self.in_flight == self.expected:
+            self.all_started.set()
+        try:
+            await asyncio.wait_for(self.all_started.wait(), timeout=1)
+        finally:
+            self.in_flight -= 1
+        return "insight"
+
+
+class TestBackgroundReasonerAnalyze(unittest.TestCase):
+    def setUp(self):
+        self.memories = [
+            MemoryItem(id=i + 1, type="episodic", content="morning running session")
+            for i in range(12)
+        ]
+        self.goals = [
+            MemoryItem(id=20, type="goal", content="run a marathon"),
+            MemoryItem(id=21, type="goal", content="learn Spanish"),
+        ]
+        self.preference = MemoryItem(id=30, type="preference", content="prefers mornings")
+
+        async def memories_after_id(after_id, limit=1000):
+            return [memory for memory in self.memories if memory.id > after_id][:limit]
+
+        async def memories_by_type(memory_type, limit=10):
+            return {"goal": self.goals, "preference": [self.preference]}[memory_type][:limit]
+
+        async def memories_since(since, limit=None):
+            return self.memories[:limit]
+
+        async def count_by_type():
+            return {"episodic": len(self.memories)}
+
+        async def latest_memories(limit):
+            return self.memories[-limit:]
+
+        for name, fake in [
+            ("memories_after_id", memories_after_id),
+            ("memories_by_type", memories_by_type),
+            ("memories_since", memories_since),
+            ("count_by_type", count_by_type),
+            ("latest_memories", latest_memories),
+        ]:
+            patcher = mock.patch.object(background_reasoner, name, fake)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_analyses_run_concurrently(self):
+        """Test that every analysis step and goal check is in flight at once."""
+        async def run():
+            # Pattern, two goal checks, connection and suggestion
+            llm = GatedLLM(expected=5)
+            with mock.patch.object(background_reasoner, "get_async_llm_client", return_value=llm):
+                reasoner = BackgroundReasoner()
+            return llm, await reasoner.analyze()
+
+        llm, insights = asyncio.run(run())
+
+        self.assertEqual(llm.peak, 5)
+        self.assertEqual(
+            sorted(insight["type"] for insight in insights),
+            ["connection", "goal_tracking", "goal_tracking", "pattern", "suggestion"]
+        )
+
+    def test_failed_step_keeps_the_others(self):
+        """Test that one step raising does not drop the other insights."""
+        async def broken(*args, **kwargs):
+            raise RuntimeError("database down")
+
+        async def run():
+            llm = GatedLLM(expected=2)
+            with mock.patch.object(background_reasoner, "get_async_llm_client", return_value=llm):
+                reasoner = BackgroundReasoner()
+            with mock.patch.object(background_reasoner, "memories_by_type", broken):
+                return await reasoner.analyze()
+
+        insights = asyncio.run(run())
+
+        self.assertEqual(sorted(insight["type"] for insight in insights), ["connection", "pattern"])
+
+
+if __name__ == "__main__":
+    unittest.main()
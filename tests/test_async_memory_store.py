@@ -0,0 +1,74 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from opera.backend.config import config
+from opera.backend.models.memory import MemoryItem
+from opera.backend.services import async_memory_store, fulltext, job_queue, memory_store
+
+
+class TestAsyncMemoryStore(unittest.TestCase):
+    def setUp(self):
+        # A file database, so the sync and async engines see the same rows
+        self.directory = tempfile.mkdtemp()
+        url = "sqlite:///" + os.path.join(self.directory, "opera.db")
+        engine = memory_store.build_engine(url)
+        for module in (memory_store, job_queue, fulltext):
+            patcher = mock.patch.object(module, "engine", engine)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(async_memory_store, "async_engine", async_memory_store.build_async_engine(url))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(config, "DEDUP_ENABLED", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        memory_store.init_db()
+
+        self.now = datetime(2024, 6, 1, 12)
+        stored, _, _ = memory_store.add_memories([
+            MemoryItem(type="goal", content="run a marathon", timestamp=self.now - timedelta(days=3)),
+            MemoryItem(type="episodic", content="went running", timestamp=self.now - timedelta(hours=5)),
+            MemoryItem(type="goal", content="learn Spanish", timestamp=self.now - timedelta(hours=2)),
+            MemoryItem(type="semantic", content="Madrid is in Spain", timestamp=self.now - timedelta(hours=1)),
+        ])
+        self.ids = [item.id for item in stored]
+        engine.dispose()
+
+    def tearDown(self):
+        asyncio.run(async_memory_store.dispose())
+        shutil.rmtree(self.directory)
+
+    def test_time_window_queries(self):
+        """Test that memories_since honors the window, type and ordering."""
+        since = self.now - timedelta(days=1)
+        oldest_first = asyncio.run(async_memory_store.memories_since(since))
+        self.assertEqual([m.id for m in oldest_first], self.ids[1:])
+
+        newest = asyncio.run(async_memory_store.memories_since(since, limit=2, newest_first=True))
+        self.assertEqual([m.id for m in newest], [self.ids[3], self.ids[2]])
+
+        goals = asyncio.run(async_memory_store.memories_since(since, memory_type="goal"))
+        self.assertEqual([m.content for m in goals], ["learn Spanish"])
+
+    def test_listing_queries(self):
+        """Test the type, latest, after-id and count queries against sync writes."""
+        goals = asyncio.run(async_memory_store.memories_by_type("goal", limit=1))
+        self.assertEqual([m.content for m in goals], ["learn Spanish"])
+
+        latest = asyncio.run(async_memory_store.latest_memories(2))
+        self.assertEqual([m.id for m in latest], [self.ids[3], self.ids[2]])
+
+        after = asyncio.run(async_memory_store.memories_after_id(self.ids[1]))
+        self.assertEqual([m.id for m in after], self.ids[2:])
+
+        counts = asyncio.run(async_memory_store.count_by_type())
+        self.assertEqual(counts, {"goal": 2, "episodic": 1, "semantic": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import json
+import unittest
+from unittest import mock
+
+from sqlmodel import select
+
+from opera.backend.config import config
+from opera.backend.models.memory import MemoryItem
+from opera.backend.services import dedup, fulltext, job_queue, memory_store
+from opera.backend.services.dedup import DEDUPE_JOB, MemoryOccurrence, MemorySignature
+from opera.backend.services.job_queue import Job
+
+
+LUNCH = "Had lunch with Sarah at the noodle place on Main Street today"
+LUNCH_EDITED = "had lunch with sarah at the noodle place on main street today!"
+MEETING = "Quarterly planning notes for the platform team"
+
+
+class DedupTestCase(unittest.TestCase):
+    def setUp(self):
+        engine = memory_store.build_engine("sqlite://")
+        for module in (memory_store, job_queue, fulltext):
+            self.patch(mock.patch.object(module, "engine", engine))
+        self.patch(mock.patch.object(dedup, "_remove_vectors"))
+        memory_store.init_db()
+
+    def patch(self, patcher):
+        value = patcher.start()
+        self.addCleanup(patcher.stop)
+        return value
+
+    def signatures(self):
+        with memory_store.get_session() as session:
+            return {row.memory_id: row for row in session.exec(select(MemorySignature))}
+
+    def occurrences(self):
+        with memory_store.get_session() as session:
+            rows = session.exec(select(MemoryOccurrence).order_by(MemoryOccurrence.id)).all()
+        return [(row.memory_id, row.timestamp, row.source) for row in rows]
+
+
+class TestIngestDedup(DedupTestCase):
+    def setUp(self):
+        super().setUp()
+        self.patch(mock.patch.object(config, "DEDUP_ENABLED", True))
+
+    def test_merge_returns_the_existing_memory(self):
+        """Test that a near-duplicate is folded into the memory already stored."""
+        with mock.patch.object(config, "DEDUP_MODE", "merge"):
+            first = memory_store.add_memory(MemoryItem(type="episodic", content=LUNCH, confidence=0.6))
+            duplicate = MemoryItem(type="episodic", content=LUNCH_EDITED, confidence=0.9, source="chat")
+            again = memory_store.add_memory(duplicate)
+            other_type = memory_store.add_memory(MemoryItem(type="semantic", content=LUNCH_EDITED))
+            stored, _, merged = memory_store.add_memories([
+                MemoryItem(type="episodic", content=MEETING),
+                MemoryItem(type="episodic", content=LUNCH),
+            ])
+
+        self.assertEqual(again.id, first.id)
+        self.assertEqual(again.confidence, 0.9)
+        self.assertNotEqual(other_type.id, first.id)
+        self.assertEqual([item.content for item in stored], [MEETING])
+        self.assertEqual([(index, memory.id) for index, memory in merged], [(1, first.id)])
+        self.assertEqual(len(memory_store.list_memories()), 3)
+        self.assertEqual(self.occurrences()[0], (first.id, duplicate.timestamp, "chat"))
+        self.assertEqual([row[0] for row in self.occurrences()], [first.id, first.id])
+
+    def test_flag_keeps_both_and_marks_the_copy(self):
+        """Test that flag mode inserts the copy with duplicate_of set."""
+        with mock.patch.object(config, "DEDUP_MODE", "flag"):
+            first = memory_store.add_memory(MemoryItem(type="episodic", content=LUNCH))
+            copy = memory_store.add_memory(MemoryItem(type="episodic", content=LUNCH_EDITED))
+
+        signatures = self.signatures()
+        self.assertNotEqual(copy.id, first.id)
+        self.assertIsNone(signatures[first.id].duplicate_of)
+        self.assertEqual(signatures[copy.id].duplicate_of, first.id)
+        self.assertEqual(signatures[copy.id].similarity, 1.0)
+
+
+class TestCorpusDedup(DedupTestCase):
+    def setUp(self):
+        super().setUp()
+        # Memories stored before deduplication was turned on
+        with mock.patch.object(config, "DEDUP_ENABLED", False):
+            stored, _, _ = memory_store.add_memories([
+                MemoryItem(type="episodic", content=LUNCH),
+                MemoryItem(type="episodic", content=MEETING),
+                MemoryItem(type="semantic", content="Sarah likes noodles"),
+                MemoryItem(type="episodic", content=LUNCH_EDITED, confidence=0.5),
+                MemoryItem(type="episodic", content=MEETING + "."),
+            ])
+        self.ids = [item.id for item in stored]
+        self.patch(mock.patch.object(dedup, "DEDUPE_RANGE_SIZE", 2))
+        self.patch(mock.patch.dict(job_queue._handlers, {DEDUPE_JOB: job_queue._handlers[DEDUPE_JOB]}, clear=True))
+
+    def jobs(self):
+        with memory_store.get_session() as session:
+            return session.exec(select(Job).where(Job.kind == DEDUPE_JOB).order_by(Job.id)).all()
+
+    def test_merge_runs_one_job_per_range(self):
+        """Test that the corpus is deduplicated in chained jobs, keeping the earliest copy."""
+        with mock.patch.object(config, "DEDUP_MODE", "merge"):
+            dedup.queue_dedupe()
+            while job_queue.run_pending():
+                pass
+
+        jobs = self.jobs()
+        ranges = [(json.loads(job.payload)["after_id"], json.loads(job.payload)["through_id"]) for job in jobs]
+        self.assertEqual(ranges, [(0, self.ids[1]), (self.ids[1], self.ids[3]), (self.ids[3], None)])
+        self.assertEqual({job.status for job in jobs}, {"done"})
+        self.assertEqual(json.loads(jobs[-1].payload)["counts"], {"scanned": 4, "merged": 1, "flagged": 0})
+
+        remaining = sorted(memory.id for memory in memory_store.list_memories())
+        self.assertEqual(remaining, self.ids[:3])
+        self.assertEqual(sorted(self.signatures()), remaining)
+        self.assertEqual(memory_store.get_memories([self.ids[0]])[0].confidence, 1.0)
+        self.assertEqual(
+            [(memory_id, source) for memory_id, _, source in self.occurrences()],
+            [(self.ids[0], "manual"), (self.ids[1], "manual")]
+        )
+        dedup._remove_vectors.assert_has_calls([mock.call([self.ids[3]]), mock.call([self.ids[4]])])
+
+    def test_flag_mode_marks_later_copies(self):
+        """Test that flag mode keeps every memory and points copies at the original."""
+        with mock.patch.object(config, "DEDUP_MODE", "flag"):
+            counts = dedup.deduplicate_corpus(batch_size=2)
+
+        self.assertEqual(counts, {"scanned": 5, "merged": 0, "flagged": 2})
+        signatures = self.signatures()
+        self.assertEqual(signatures[self.ids[3]].duplicate_of, self.ids[0])
+        self.assertEqual(signatures[self.ids[4]].duplicate_of, self.ids[1])
+        self.assertIsNone(signatures[self.ids[2]].duplicate_of)
+
+    def test_retried_range_does_not_fork_the_chain(self):
+        """Test that rerunning a committed range queues no second successor."""
+        dedup.queue_dedupe()
+        first = job_queue.claim(DEDUPE_JOB, limit=1)
+        payload = json.loads(first[0].payload)
+        dedup.run_dedupe_job([payload])
+        # The lease expired before the worker could mark the job done
+        dedup.run_dedupe_job([payload])
+
+        self.assertEqual(len(self.jobs()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
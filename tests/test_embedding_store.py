@@ -0,0 +1,112 @@
+import json
+import unittest
+from unittest import mock
+
+import numpy as np
+from sqlalchemy import inspect, text
+from sqlmodel import select
+
+from opera.backend.config import config
+from opera.backend.models.memory import MemoryItem
+from opera.backend.services import fulltext, job_queue, memory_store
+from opera.backend.services.embedding_store import (
+    MemoryEmbedding, iter_embeddings, migrate_json_embeddings, save_embeddings,
+    unpack_embedding, upgrade_embedding_table
+)
+
+
+class TestEmbeddingStore(unittest.TestCase):
+    def setUp(self):
+        engine = memory_store.build_engine("sqlite://")
+        for module in (memory_store, job_queue, fulltext):
+            patcher = mock.patch.object(module, "engine", engine)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        memory_store.init_db()
+        self.engine = engine
+
+    def test_iter_embeddings_by_model(self):
+        """Test that stored vectors stream back per model as read-only views."""
+        stored, _, _ = memory_store.add_memories(
+            [MemoryItem(type="semantic", content=f"fact {i}") for i in range(3)]
+        )
+        ids = [item.id for item in stored]
+        save_embeddings([(ids[0], [1.0, 2.0]), (ids[2], [3.0, 4.0])], model="model-a")
+        save_embeddings([(ids[1], [5.0, 6.0])], dtype="float16", model="model-b")
+
+        vectors = list(iter_embeddings(model="model-a", batch_size=1))
+        self.assertEqual([memory_id for memory_id, _ in vectors], [ids[0], ids[2]])
+        np.testing.assert_array_equal(vectors[1][1], [3.0, 4.0])
+        self.assertFalse(vectors[1][1].flags.writeable)
+
+        everything = dict(iter_embeddings())
+        self.assertEqual(sorted(everything), ids)
+        self.assertEqual(everything[ids[1]].dtype, np.float16)
+
+    def test_upgrade_adds_the_model_column(self):
+        """Test that a table created before the model column gets it added."""
+        with self.engine.begin() as conn:
+            conn.execute(text("DROP TABLE memory_embedding"))
+            conn.execute(text(
+                "CREATE TABLE memory_embedding (memory_id INTEGER PRIMARY KEY, "
+                "dtype VARCHAR NOT NULL, dim INTEGER NOT NULL, vector BLOB NOT NULL)"
+            ))
+
+        upgrade_embedding_table(self.engine)
+        upgrade_embedding_table(self.engine)
+
+        columns = {column["name"] for column in inspect(self.engine).get_columns("memory_embedding")}
+        self.assertIn("model", columns)
+
+
+class TestMigrateJsonEmbeddings(unittest.TestCase):
+    def setUp(self):
+        engine = memory_store.build_engine("sqlite://")
+        for module in (memory_store, job_queue, fulltext):
+            patcher = mock.patch.object(module, "engine", engine)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(config, "DEDUP_ENABLED", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        memory_store.init_db()
+
+    def test_moves_json_into_blobs(self):
+        """Test that JSON vectors become blobs across batches and the column is cleared."""
+        vectors = [[0.5, -1.0, float(i)] for i in range(5)]
+        stored, _, _ = memory_store.add_memories([
+            MemoryItem(type="semantic", content=f"fact {i}", embedding=json.dumps(vector))
+            for i, vector in enumerate(vectors)
+        ] + [MemoryItem(type="semantic", content="never embedded")])
+
+        self.assertEqual(migrate_json_embeddings(batch_size=2), 5)
+
+        with memory_store.get_session() as session:
+            rows = {row.memory_id: row for row in session.exec(select(MemoryEmbedding))}
+            remaining = session.exec(select(MemoryItem).where(MemoryItem.embedding.is_not(None))).all()
+        self.assertEqual(remaining, [])
+        self.assertEqual(sorted(rows), [item.id for item in stored[:5]])
+        for item, vector in zip(stored, vectors):
+            row = rows[item.id]
+            self.assertEqual(row.dim, 3)
+            np.testing.assert_array_equal(unpack_embedding(row.vector, row.dtype), vector)
+
+        # Rerunning finds nothing left to move
+        self.assertEqual(migrate_json_embeddings(), 0)
+
+    def test_skips_unparseable_json(self):
+        """Test that a corrupt value is left in place without blocking the rest."""
+        bad, good = memory_store.add_memories([
+            MemoryItem(type="semantic", content="bad", embedding="[1.0, "),
+            MemoryItem(type="semantic", content="good", embedding="[1.0, 2.0]"),
+        ])[0]
+
+        self.assertEqual(migrate_json_embeddings(), 1)
+        with memory_store.get_session() as session:
+            self.assertEqual(session.get(MemoryItem, bad.id).embedding, "[1.0, ")
+            self.assertIsNone(session.get(MemoryItem, good.id).embedding)
+            self.assertIsNotNone(session.get(MemoryEmbedding, good.id))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import threading
+import unittest
+from opera.backend.services.embedding_cache import EmbeddingCache
+from opera.backend.services.embeddings import BaseEmbeddingService, EmbeddingBatcher
+
+
+class CountingEmbeddingService(BaseEmbeddingService):
+    """Fake backend that records which texts reach it."""
+
+    def __init__(self, cache):
+        self.model_name = "fake-model"
+        self.cache = cache
+        self.calls = []
+
+    def _embed(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = EmbeddingCache(path=":memory:", max_entries=10)
+
+    def tearDown(self):
+        self.cache.close()
+
+    def test_round_trip_and_counters(self):
+        """Test that stored vectors come back and hits/misses are counted."""
+        self.assertIsNone(self.cache.get("m", "hello"))
+        self.cache.put("m", "hello", [0.5, 0.25])
+        self.assertEqual(self.cache.get("m", "  hello  "), [0.5, 0.25])
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_keys_are_scoped_by_model(self):
+        """Test that the same text under another model is a miss."""
+        self.cache.put("a", "text", [1.0])
+        self.assertIsNone(self.cache.get("b", "text"))
+
+    def test_lru_eviction(self):
+        """Test that the cache stays bounded and keeps recently used rows."""
+        self.cache.put("m", "keep", [1.0])
+        for i in range(20):
+            self.cache.put("m", f"text {i}", [float(i)])
+            self.cache.get("m", "keep")
+        self.assertLessEqual(self.cache.stats()["entries"], 10)
+        self.assertEqual(self.cache.get("m", "keep"), [1.0])
+
+    def test_service_only_embeds_misses(self):
+        """Test that batch calls send only uncached, de-duplicated texts to the backend."""
+        service = CountingEmbeddingService(self.cache)
+        service.generate_embedding("alpha")
+        vectors = service.generate_embeddings_batch(["alpha", "beta", "beta"])
+        self.assertEqual(service.calls, [["alpha"], ["beta"]])
+        self.assertEqual(vectors[1], vectors[2])
+
+
+class TestEmbeddingBatcher(unittest.TestCase):
+    def test_concurrent_requests_are_coalesced(self):
+        """Test that simultaneous single-text calls share backend batches."""
+        service = CountingEmbeddingService(cache=None)
+        service.batcher = EmbeddingBatcher(service._embed_and_store, max_batch_size=8, max_wait_ms=50)
+        results = {}
+
+        def worker(i):
+            results[i] = service.generate_embedding("x" * i)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(1, 9)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        service.batcher.close()
+
+        self.assertEqual(results[3], [3.0, 1.0])
+        self.assertLess(len(service.calls), 8)
+
+    def test_backend_errors_reach_every_caller(self):
+        """Test that a failed batch raises in the waiting callers."""
+        def failing(texts):
+            raise RuntimeError("backend down")
+
+        batcher = EmbeddingBatcher(failing, max_wait_ms=1)
+        with self.assertRaises(RuntimeError):
+            batcher.embed("hello")
+        batcher.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import shutil
+import tempfile
+import unittest
+from opera.backend.services.flat_vector_store import FlatVectorStore
+
+
+class TestFlatVectorStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = FlatVectorStore(self.directory)
+        self.store.add_memories(
+            memory_ids=[1, 2, 3],
+            contents=["apples", "bananas", "meeting notes"],
+            embeddings=[[1.0, 0.0, 0.0], [0.9, 0.1, 0.0], [0.0, 0.0, 1.0]],
+            metadatas=[
+                {"type": "semantic", "source": "manual"},
+                {"type": "episodic", "source": "manual"},
+                {"type": "episodic", "source": "chat"},
+            ]
+        )
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def test_exact_top_k(self):
+        """Test that results are ordered by cosine similarity."""
+        results = self.store.search_similar([1.0, 0.0, 0.0], n_results=2)
+        self.assertEqual([r["id"] for r in results], [1, 2])
+        self.assertAlmostEqual(results[0]["distance"], 0.0, places=5)
+        self.assertEqual(results[0]["content"], "apples")
+
+    def test_metadata_filter(self):
+        """Test that type filters restrict the candidate set."""
+        results = self.store.search_similar([1.0, 0.0, 0.0], n_results=5, filter_dict={"type": "episodic"})
+        self.assertEqual([r["id"] for r in results], [2, 3])
+        self.assertEqual(self.store.search_similar([1.0, 0.0, 0.0], filter_dict={"type": "goal"}), [])
+
+    def test_delete_and_update(self):
+        """Test that deleted rows disappear and updates replace vectors in place."""
+        self.store.delete_memory(1)
+        self.store.update_memory(3, "apple pie", [1.0, 0.0, 0.0], {"type": "semantic", "source": "manual"})
+        results = self.store.search_similar([1.0, 0.0, 0.0], n_results=1)
+        self.assertEqual(results[0]["id"], 3)
+        self.assertEqual(self.store.count, 3)
+
+    def test_reopen_and_grow(self):
+        """Test that the index persists across instances and grows past its capacity."""
+        self.store.add_memories(
+            memory_ids=list(range(100, 2100)),
+            contents=["filler"] * 2000,
+            embeddings=[[0.0, 1.0, 0.0]] * 2000,
+            metadatas=[{"type": "semantic", "source": "bulk"}] * 2000
+        )
+        self.store.close()
+
+        self.store = FlatVectorStore(self.directory)
+        self.assertEqual(self.store.count, 2003)
+        results = self.store.search_similar([0.0, 0.0, 1.0], n_results=1, filter_dict={"source": "chat"})
+        self.assertEqual(results[0]["id"], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import unittest
+from unittest import mock
+
+from opera.backend.config import config
+from opera.backend.models.memory import MemoryItem
+from opera.backend.services import fulltext, job_queue, memory_store
+from opera.backend.services.fulltext import (
+    search_fulltext, to_fts5_query, to_like_patterns, to_tsquery
+)
+from opera.backend.services.memory_query import hybrid_search
+
+
+class TestFullTextQuery(unittest.TestCase):
+    def test_terms_phrases_and_prefixes(self):
+        """Test that the shared syntax maps onto both backends."""
+        query = '"kickoff meeting" sar* zx-4417'
+        self.assertEqual(to_fts5_query(query), '"kickoff meeting" "sar"* "zx" "4417"')
+        self.assertEqual(to_tsquery(query), "(kickoff <-> meeting) & sar:* & zx & 4417")
+
+    def test_match_any_ors_the_clauses(self):
+        """Test that match_any joins the same clauses with OR."""
+        query = '"kickoff meeting" sar*'
+        self.assertEqual(to_fts5_query(query, match_any=True), '"kickoff meeting" OR "sar"*')
+        self.assertEqual(to_tsquery(query, match_any=True), "(kickoff <-> meeting) | sar:*")
+
+    def test_operators_are_quoted(self):
+        """Test that backend query operators in user input are treated as words."""
+        self.assertEqual(to_fts5_query('NEAR(a b) OR -c'), '"NEAR" "a" "b" "OR" "c"')
+        self.assertEqual(to_tsquery("a & !b | c"), "a & b & c")
+        self.assertEqual(to_fts5_query('"" *'), "")
+
+    def test_bare_star_is_not_a_prefix(self):
+        """Test that only a '*' attached to a word makes a prefix search."""
+        self.assertEqual(to_fts5_query("foo *"), '"foo"')
+        self.assertEqual(to_tsquery("foo * bar"), "foo & bar")
+        self.assertEqual(to_fts5_query("foo-*"), '"foo"')
+        self.assertEqual(to_fts5_query("zx-44*"), '"zx" "44"*')
+
+    def test_like_patterns_escape_wildcards(self):
+        """Test that LIKE patterns come from parsed clauses with wildcards escaped."""
+        self.assertEqual(
+            to_like_patterns('"kickoff meeting" 100% file_name sar*'),
+            ["%kickoff meeting%", "%100%", "%file\\_name%", "%sar%"]
+        )
+        self.assertEqual(to_like_patterns("% _ *"), ["%\\_%"])
+
+
+class TestLikeFallback(unittest.TestCase):
+    def setUp(self):
+        engine = memory_store.build_engine("sqlite://")
+        for module in (memory_store, job_queue, fulltext):
+            patcher = mock.patch.object(module, "engine", engine)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(config, "DEDUP_ENABLED", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        memory_store.init_db()
+        patcher = mock.patch.object(fulltext, "_backend", "like")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        memory_store.add_memories([
+            MemoryItem(type="semantic", content="The kickoff meeting moved to Monday"),
+            MemoryItem(type="semantic", content="Meeting notes from the kickoff"),
+            MemoryItem(type="semantic", content="fileXname was renamed"),
+            MemoryItem(type="semantic", content="file_name is the config key"),
+        ])
+
+    def contents(self, query):
+        return sorted(memory.content for memory, _, _ in search_fulltext(query))
+
+    def test_clauses_are_anded(self):
+        """Test that every term must appear and phrases must appear in order."""
+        self.assertEqual(len(self.contents("kickoff meeting")), 2)
+        self.assertEqual(self.contents('"kickoff meeting"'), ["The kickoff meeting moved to Monday"])
+        self.assertEqual(self.contents("*"), [])
+
+    def test_underscore_is_literal(self):
+        """Test that '_' only matches itself, not any character."""
+        self.assertEqual(self.contents("file_name"), ["file_name is the config key"])
+
+
+
+class FakeVectorStore:
+    """Returns fixed hits regardless of the query."""
+
+    def __init__(self, hits):
+        self.hits = hits
+
+    def search_similar(self, query_embedding, n_results=10, filter_dict=None):
+        return self.hits[:n_results]
+
+
+class TestHybridSearch(unittest.TestCase):
+    def setUp(self):
+        engine = memory_store.build_engine("sqlite://")
+        for module in (memory_store, job_queue, fulltext):
+            patcher = mock.patch.object(module, "engine", engine)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(config, "DEDUP_ENABLED", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        memory_store.init_db()
+
+        self.stored, _, _ = memory_store.add_memories([
+            MemoryItem(type="episodic", content="Project ZX-4417 kickoff meeting"),
+            MemoryItem(type="preference", content="Sarah prefers morning meetings"),
+            MemoryItem(type="semantic", content="Quarterly planning notes"),
+        ])
+
+    def ids(self, results):
+        return [result["memory"].id for result in results]
+
+    def test_lexical_side_reads_the_database(self):
+        """Test that any query term matches, including rows written after startup."""
+        kickoff, sarah, _ = self.stored
+        results = hybrid_search("when did the zx kickoff happen", None, None)
+        self.assertEqual(self.ids(results), [kickoff.id])
+
+        # Written directly, as another worker process would
+        later = memory_store.add_memory(MemoryItem(type="episodic", content="Second kickoff for ZX"))
+        results = hybrid_search("zx kickoff", None, None, memory_type="episodic")
+        self.assertEqual(sorted(self.ids(results)), sorted([kickoff.id, later.id]))
+        self.assertEqual(hybrid_search("sarah", None, None, memory_type="semantic"), [])
+
+    def test_fuses_with_vector_hits(self):
+        """Test that lexical and vector rankings are merged and both ranks reported."""
+        kickoff, _, notes = self.stored
+        embeddings = mock.Mock()
+        embeddings.generate_embedding.return_value = [1.0, 0.0]
+        vectors = FakeVectorStore([{"id": notes.id, "distance": 0.2}, {"id": kickoff.id, "distance": 0.4}])
+
+        results = hybrid_search("kickoff", embeddings, vectors)
+
+        self.assertEqual(self.ids(results), [kickoff.id, notes.id])
+        self.assertEqual((results[0]["lexical_rank"], results[0]["vector_rank"]), (1, 2))
+        self.assertEqual(results[1]["lexical_rank"], None)
+        self.assertAlmostEqual(results[1]["similarity"], 0.8)
+
+
+if __name__ == '__main__':
+    unittest.main()
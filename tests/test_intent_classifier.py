@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+import zlib
+
+import numpy as np
+
+from opera.backend.services.intent_classifier import IntentClassifier
+
+
+def bag_of_words(texts):
+    """Hashed bag-of-words vectors standing in for a sentence embedding model."""
+    vectors = np.zeros((len(texts), 256), dtype=np.float32)
+    for i, text in enumerate(texts):
+        for word in text.lower().replace("?", " ").replace(",", " ").split():
+            vectors[i, zlib.crc32(word.encode()) % 256] += 1.0
+    return vectors.tolist()
+
+
+SEEDS = {
+    "information_retrieval": ["find my notes", "search for the contract", "find the tax documents"],
+    "memory_storage": ["remember my passport number", "remember that I parked outside", "save this note"],
+    "memory_management": ["delete all emails", "delete the old address", "remove the duplicates"],
+}
+
+
+class TestIntentClassifier(unittest.TestCase):
+    def setUp(self):
+        self.classifier = IntentClassifier(
+            bag_of_words, "bow", seeds=SEEDS, min_confidence=0.8, min_similarity=0.3
+        )
+
+    def test_confident_prediction(self):
+        """Test that routine phrasings are accepted and odd ones escalated."""
+        prediction = self.classifier.predict("find my old resume")
+        self.assertTrue(prediction.accepted)
+        self.assertEqual(prediction.category, "information_retrieval")
+
+        self.assertFalse(self.classifier.predict("what's the weather like").accepted)
+        self.assertEqual(self.classifier.stats()["accepted"], 1)
+        self.assertEqual(self.classifier.stats()["escalated"], 1)
+
+    def test_learns_from_labels(self):
+        """Test that learned examples make a new phrasing confident, including a new category."""
+        self.assertFalse(self.classifier.predict("jot down the wifi code").accepted)
+        for text in ["jot down the gate code", "jot down my locker number"]:
+            self.classifier.learn(self.classifier.predict(text).vector, "memory_storage")
+        prediction = self.classifier.predict("jot down the wifi code")
+        self.assertTrue(prediction.accepted)
+        self.assertEqual(prediction.category, "memory_storage")
+
+        self.classifier.learn(self.classifier.predict("summarize my week").vector, "summarization")
+        self.assertEqual(self.classifier.predict("summarize my week").category, "summarization")
+
+    def test_save_and_reload(self):
+        """Test that learned centroids persist, and are ignored for a different model."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "intent.npz")
+            self.classifier.path = path
+            self.classifier.learn(self.classifier.predict("summarize my week").vector, "summarization")
+            self.classifier.save()
+
+            reloaded = IntentClassifier(bag_of_words, "bow", seeds=SEEDS, path=path)
+            self.assertIn("summarization", reloaded.categories)
+            other = IntentClassifier(bag_of_words, "other-model", seeds=SEEDS, path=path)
+            self.assertNotIn("summarization", other.categories)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from sqlalchemy import update
+
+from opera.backend.config import config
+from opera.backend.services import fulltext, job_queue, memory_store
+from opera.backend.services.job_queue import (
+    Job, claim, complete, enqueue, enqueue_many, fail, purge_done_jobs, retry_delay
+)
+
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        engine = memory_store.build_engine("sqlite://")
+        for module in (memory_store, job_queue, fulltext):
+            patcher = mock.patch.object(module, "engine", engine)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        memory_store.init_db()
+
+    def get(self, job_id):
+        with memory_store.get_session() as session:
+            return session.get(Job, job_id)
+
+    def set(self, job_id, **values):
+        with memory_store.get_session() as session:
+            session.exec(update(Job).where(Job.id == job_id).values(**values))
+            session.commit()
+
+    def test_claim_leases_each_job_once(self):
+        """Test that claimed jobs are running under a lease and not handed out twice."""
+        jobs = enqueue_many("test", [({"n": i}, f"test:{i}") for i in range(3)])
+        self.assertEqual([job.status for job in jobs], ["pending"] * 3)
+
+        first = claim("test", limit=2)
+        self.assertEqual([job.id for job in first], [jobs[0].id, jobs[1].id])
+        self.assertTrue(all(job.status == "running" and job.attempts == 1 for job in first))
+        self.assertEqual([job.id for job in claim("test", limit=5)], [jobs[2].id])
+        self.assertEqual(claim("test", limit=5), [])
+        self.assertEqual(claim("other", limit=5), [])
+
+        complete(first)
+        self.assertEqual(self.get(jobs[0].id).status, "done")
+        self.assertIsNone(self.get(jobs[0].id).lease_owner)
+
+    def test_expired_lease_is_reclaimed(self):
+        """Test that a crashed worker's jobs are retried and its late result ignored."""
+        job = enqueue("test", {})
+        stale = claim("test", limit=1)
+        self.assertEqual(claim("test", limit=1), [])
+
+        self.set(job.id, lease_until=datetime.utcnow() - timedelta(seconds=1))
+        retried = claim("test", limit=1)
+        self.assertEqual(retried[0].attempts, 2)
+
+        # Only the current lease holder can finish the job
+        complete(stale)
+        self.assertEqual(self.get(job.id).status, "running")
+        complete(retried)
+        self.assertEqual(self.get(job.id).status, "done")
+
+    def test_expired_lease_without_attempts_left_fails(self):
+        """Test that a job whose last attempt's lease expired is marked failed."""
+        job = enqueue("test", {}, max_attempts=1)
+        claim("test", limit=1)
+        self.set(job.id, lease_until=datetime.utcnow() - timedelta(seconds=1))
+
+        self.assertEqual(claim("test", limit=1), [])
+        self.assertEqual(self.get(job.id).status, "failed")
+        self.assertEqual(self.get(job.id).last_error, "Lease expired")
+
+    def test_failures_back_off_until_max_attempts(self):
+        """Test that failed jobs are rescheduled with backoff, then marked failed."""
+        with mock.patch.object(config, "JOB_RETRY_BASE_SECONDS", 2), \
+                mock.patch.object(config, "JOB_RETRY_MAX_SECONDS", 10):
+            self.assertEqual([retry_delay(n) for n in range(1, 6)], [2, 4, 8, 10, 10])
+
+            job = enqueue("test", {}, max_attempts=2)
+            before = datetime.utcnow()
+            fail(claim("test", limit=1), "boom")
+
+            retried = self.get(job.id)
+            self.assertEqual(retried.status, "pending")
+            self.assertEqual(retried.last_error, "boom")
+            self.assertGreaterEqual(retried.run_at, before + timedelta(seconds=2))
+            # Not due until the backoff has passed
+            self.assertEqual(claim("test", limit=1), [])
+
+            self.set(job.id, run_at=datetime.utcnow())
+            fail(claim("test", limit=1), "boom again")
+            self.assertEqual(self.get(job.id).status, "failed")
+            self.assertEqual(claim("test", limit=1), [])
+
+    def test_run_pending_fails_the_batch_when_the_handler_raises(self):
+        """Test that a handler error records a retry for every job that fails on its own."""
+        handler = mock.Mock(side_effect=RuntimeError("handler down"))
+        with mock.patch.dict(job_queue._handlers, {"test": (handler, 10)}, clear=True):
+            jobs = enqueue_many("test", [({"n": 1}, None), ({"n": 2}, None)])
+            self.assertTrue(job_queue.run_pending())
+            self.assertFalse(job_queue.run_pending())
+
+        self.assertEqual(handler.call_args_list, [
+            mock.call([{"n": 1}, {"n": 2}]), mock.call([{"n": 1}]), mock.call([{"n": 2}])
+        ])
+        for job in jobs:
+            self.assertEqual(self.get(job.id).status, "pending")
+            self.assertEqual(self.get(job.id).attempts, 1)
+            self.assertEqual(self.get(job.id).last_error, "handler down")
+
+    def test_run_pending_only_charges_the_failing_job(self):
+        """Test that one bad payload doesn't cost the rest of its batch an attempt."""
+        def handler(payloads):
+            if any(payload["n"] == 2 for payload in payloads):
+                raise ValueError("bad payload")
+
+        with mock.patch.dict(job_queue._handlers, {"test": (handler, 10)}, clear=True):
+            good, bad, other = enqueue_many("test", [({"n": n}, None) for n in (1, 2, 3)])
+            self.assertTrue(job_queue.run_pending())
+
+        for job in (good, other):
+            self.assertEqual(self.get(job.id).status, "done")
+            self.assertIsNone(self.get(job.id).last_error)
+        self.assertEqual(self.get(bad.id).status, "pending")
+        self.assertEqual(self.get(bad.id).last_error, "bad payload")
+
+    def test_purge_keeps_recent_and_failed_jobs(self):
+        """Test that only done jobs older than the retention window are deleted."""
+        old_done, new_done, old_failed = enqueue_many("test", [({}, None)] * 3)
+        complete(claim("test", limit=2))
+        self.set(old_failed.id, status="failed")
+        long_ago = datetime.utcnow() - timedelta(hours=48)
+        self.set(old_done.id, updated_at=long_ago)
+        self.set(old_failed.id, updated_at=long_ago)
+
+        self.assertEqual(purge_done_jobs(older_than_hours=24), 1)
+        self.assertIsNone(self.get(old_done.id))
+        self.assertEqual(self.get(new_done.id).status, "done")
+        self.assertEqual(self.get(old_failed.id).status, "failed")
+
+
+if __name__ == "__main__":
+    unittest.main()
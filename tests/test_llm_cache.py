@@ -0,0 +1,77 @@
+import unittest
+from opera.backend.services.llm_cache import CachedLLMClient, CompletionCache
+from opera.backend.services.llm_client import LLMClient
+
+
+class CountingClient(LLMClient):
+    model_name = "test-model"
+
+    def __init__(self):
+        self.calls = 0
+
+    def complete(self, messages, **kwargs):
+        self.calls += 1
+        return f"reply {self.calls}"
+
+    def stream(self, messages, **kwargs):
+        self.calls += 1
+        yield "streamed "
+        yield f"reply {self.calls}"
+
+
+class TestCachedLLMClient(unittest.TestCase):
+    def setUp(self):
+        self.inner = CountingClient()
+        self.llm = CachedLLMClient(
+            self.inner, CompletionCache(path=":memory:", memory_entries=2), max_temperature=0.5
+        )
+        self.messages = [
+            {"role": "system", "content": "You derive intents."},
+            {"role": "user", "content": "what did I do today"},
+        ]
+
+    def test_repeated_prompts_hit_the_cache(self):
+        """Test that whitespace-equivalent prompts share an entry but other params don't."""
+        first = self.llm.complete(self.messages, temperature=0.3, max_tokens=300)
+        spaced = [dict(m, content=m["content"] + "  ") for m in self.messages]
+        self.assertEqual(self.llm.complete(spaced, temperature=0.3, max_tokens=300), first)
+        self.llm.complete(self.messages, temperature=0.3, max_tokens=500)
+        self.assertEqual(self.inner.calls, 2)
+        self.assertEqual(self.llm.stats()["hits"], 1)
+
+    def test_high_temperature_bypasses(self):
+        """Test that calls above the temperature ceiling always reach the model."""
+        self.llm.complete(self.messages, temperature=0.9)
+        self.llm.complete(self.messages, temperature=0.9)
+        self.assertEqual(self.inner.calls, 2)
+        self.assertEqual(self.llm.stats()["bypassed"], 2)
+
+    def test_forget_and_prefix_invalidation(self):
+        """Test that entries can be dropped singly or by shared prompt prefix."""
+        self.llm.complete(self.messages, temperature=0.3)
+        self.llm.forget(self.messages, temperature=0.3)
+        self.llm.complete(self.messages, temperature=0.3)
+        self.assertEqual(self.inner.calls, 2)
+        self.assertEqual(self.llm.invalidate_prefix(self.messages[:1]), 1)
+        self.llm.complete(self.messages, temperature=0.3)
+        self.assertEqual(self.inner.calls, 3)
+
+    def test_stream_is_stored_after_completion(self):
+        """Test that a fully consumed stream is replayed from the cache."""
+        text = "".join(self.llm.stream(self.messages, temperature=0.0))
+        self.assertEqual(list(self.llm.stream(self.messages, temperature=0.0)), [text])
+        self.assertEqual(self.inner.calls, 1)
+
+    def test_load_profile_is_part_of_the_key(self):
+        """Test that the same model loaded with another profile misses the cache."""
+        cache = CompletionCache(path=":memory:")
+        fp32, int8 = CountingClient(), CountingClient()
+        fp32.profile, int8.profile = "fp32", "int8"
+        CachedLLMClient(fp32, cache).complete(self.messages, temperature=0.3)
+        CachedLLMClient(int8, cache).complete(self.messages, temperature=0.3)
+        CachedLLMClient(fp32, cache).complete(self.messages, temperature=0.3)
+        self.assertEqual((fp32.calls, int8.calls), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
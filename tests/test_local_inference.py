@@ -0,0 +1,244 @@
+import threading
+import time
+import unittest
+
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers
+from transformers import (
+    DynamicCache, LlamaConfig, LlamaForCausalLM, PreTrainedTokenizerFast,
+    TemperatureLogitsWarper, TopKLogitsWarper, TopPLogitsWarper
+)
+
+from opera.backend.services.llm_client import HuggingFaceClient
+from opera.backend.services.local_inference import ContinuousBatcher, PrefixCache, _Request
+from opera.backend.services.model_profiles import model_memory_mb, resolve_profile
+
+
+def tiny_model():
+    """A randomly initialized Llama and word-level tokenizer; no downloads."""
+    words = ["<pad>", "<s>", "</s>"] + [f"w{i}" for i in range(197)]
+    tokenizer = Tokenizer(models.WordLevel({w: i for i, w in enumerate(words)}, unk_token="w0"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, bos_token="<s>", eos_token="</s>", pad_token="<pad>"
+    )
+    torch.manual_seed(0)
+    model = LlamaForCausalLM(LlamaConfig(
+        vocab_size=len(words), hidden_size=64, intermediate_size=128,
+        num_hidden_layers=2, num_attention_heads=4, num_key_value_heads=2,
+        bos_token_id=1, eos_token_id=2, pad_token_id=0
+    )).eval()
+    return model, tokenizer
+
+
+class TestContinuousBatcher(unittest.TestCase):
+    def setUp(self):
+        self.model, self.tokenizer = tiny_model()
+        self.batcher = ContinuousBatcher(
+            self.model, self.tokenizer, "cpu", max_batch_size=4, max_wait_ms=5
+        )
+
+    def tearDown(self):
+        self.batcher.close()
+
+    def reference(self, prompt, max_new_tokens):
+        inputs = self.tokenizer(prompt, return_tensors="pt", return_token_type_ids=False)
+        output = self.model.generate(
+            **inputs, max_new_tokens=max_new_tokens, do_sample=False, pad_token_id=0
+        )
+        generated = output[0, inputs["input_ids"].shape[1]:]
+        return self.tokenizer.decode(generated, skip_special_tokens=True).strip()
+
+    def test_greedy_matches_generate(self):
+        """Test that batched greedy output equals unbatched generate, even for late arrivals."""
+        prompts = [" ".join(f"w{(i * 7 + j) % 190 + 3}" for j in range(3 + i % 5)) for i in range(10)]
+        limits = [5, 12, 3, 20, 8, 1, 15, 9, 4, 11]
+
+        futures = []
+        for i, (prompt, limit) in enumerate(zip(prompts, limits)):
+            futures.append(self.batcher.submit(prompt, limit, temperature=0.0))
+            if i % 3 == 2:
+                # Let the running batch advance so later prompts join mid-flight
+                time.sleep(0.02)
+
+        for prompt, limit, future in zip(prompts, limits, futures):
+            self.assertEqual(future.result(timeout=60), self.reference(prompt, limit))
+        self.assertEqual(self.batcher.stats()["active"], 0)
+
+    def test_mixed_temperatures(self):
+        """Test that a sampled neighbour doesn't change a greedy sequence in the same batch."""
+        sampled = self.batcher.submit("w5 w6", 6, temperature=0.9)
+        greedy = self.batcher.submit("w7 w8 w9", 6, temperature=0.0)
+        self.assertEqual(greedy.result(timeout=60), self.reference("w7 w8 w9", 6))
+        self.assertLessEqual(len(sampled.result(timeout=60).split()), 6)
+
+    def test_warp_matches_generate(self):
+        """Test that per-row temperature, top-k and top-p filter logits like generate()'s warpers."""
+        torch.manual_seed(1)
+        logits = torch.randn(4, 50) * 3
+        settings = [(0.7, 0, 1.0), (1.0, 5, 1.0), (0.5, 0, 0.8), (1.3, 10, 0.5)]
+        requests = [
+            _Request([], 1, temperature, top_k=top_k, top_p=top_p)
+            for temperature, top_k, top_p in settings
+        ]
+
+        warped = self.batcher._warp(logits, requests)
+
+        for row, (temperature, top_k, top_p) in enumerate(settings):
+            warpers = [TemperatureLogitsWarper(temperature)]
+            if top_k:
+                warpers.append(TopKLogitsWarper(top_k))
+            if top_p < 1.0:
+                warpers.append(TopPLogitsWarper(top_p))
+            expected = logits[row:row + 1]
+            for warper in warpers:
+                expected = warper(None, expected)
+            self.assertTrue(torch.equal(warped[row].isinf(), expected[0].isinf()))
+            kept = ~expected[0].isinf()
+            self.assertTrue(torch.allclose(warped[row][kept], expected[0][kept]))
+
+    def test_sampling_settings_reach_the_batch(self):
+        """Test that top_k/top_p from the call or the generation config limit sampling."""
+        greedy = self.reference("w7 w8 w9", 6)
+        self.assertEqual(self.batcher.generate("w7 w8 w9", 6, temperature=1.5, top_k=1), greedy)
+
+        self.model.generation_config.top_p = 1e-6
+        batcher = ContinuousBatcher(self.model, self.tokenizer, "cpu", max_batch_size=4)
+        try:
+            self.assertEqual(batcher.generate("w7 w8 w9", 6, temperature=1.5), greedy)
+        finally:
+            batcher.close()
+
+
+class TestPrefixCache(unittest.TestCase):
+    def setUp(self):
+        self.model, self.tokenizer = tiny_model()
+        self.cache = PrefixCache(self.model, "cpu", max_bytes=10 ** 8)
+        self.system = "w10 w11 w12 w13 w14 w15 w16 w17"
+        self.cache.add(self.tokenizer(self.system)["input_ids"])
+
+    def reference(self, prompt, max_new_tokens, **kwargs):
+        inputs = self.tokenizer(prompt, return_tensors="pt", return_token_type_ids=False)
+        output = self.model.generate(
+            **inputs, max_new_tokens=max_new_tokens, do_sample=False, pad_token_id=0, **kwargs
+        )
+        generated = output[0, inputs["input_ids"].shape[1]:]
+        return self.tokenizer.decode(generated, skip_special_tokens=True).strip()
+
+    def test_lookup_longest_prefix(self):
+        """Test that lookup returns the longest cached prefix and never the whole prompt."""
+        self.cache.add(self.tokenizer("w10 w11")["input_ids"])
+        length, _ = self.cache.lookup(self.tokenizer(self.system + " w40")["input_ids"])
+        self.assertEqual(length, 8)
+        self.assertIsNone(self.cache.lookup(self.tokenizer(self.system)["input_ids"][:2]))
+        self.assertIsNone(self.cache.lookup(self.tokenizer("w40 w41")["input_ids"]))
+
+    def test_eviction_respects_budget(self):
+        """Test that the least recently used prefix is evicted past the memory budget."""
+        size = self.cache.stats()["bytes"]
+        cache = PrefixCache(self.model, "cpu", max_bytes=int(size * 1.5))
+        first = self.tokenizer(self.system)["input_ids"]
+        second = self.tokenizer("w20 w21 w22 w23 w24 w25 w26 w27")["input_ids"]
+        cache.add(first)
+        cache.add(second)
+        self.assertNotIn(first, cache)
+        self.assertIn(second, cache)
+        self.assertLessEqual(cache.stats()["bytes"], cache.max_bytes)
+
+    def test_generate_from_prefix_matches(self):
+        """Test that resuming generate() from a cached prefix gives the same output."""
+        prompt = self.system + " w40 w41"
+        inputs = self.tokenizer(prompt, return_tensors="pt", return_token_type_ids=False)
+        _, past = self.cache.lookup(inputs["input_ids"][0].tolist())
+        self.assertEqual(
+            self.reference(prompt, 8, past_key_values=DynamicCache.from_legacy_cache(past)),
+            self.reference(prompt, 8)
+        )
+
+    def test_batched_prefill_with_prefixes(self):
+        """Test that batches mixing cached and uncached prompts match unbatched output."""
+        batcher = ContinuousBatcher(
+            self.model, self.tokenizer, "cpu", max_batch_size=4, prefix_cache=self.cache
+        )
+        prompts = [self.system + " w40", "w50 w51 w52", self.system + " w41 w42 w43", "w60"]
+        try:
+            futures = [batcher.submit(p, 6, temperature=0.0) for p in prompts]
+            for prompt, future in zip(prompts, futures):
+                self.assertEqual(future.result(timeout=60), self.reference(prompt, 6))
+        finally:
+            batcher.close()
+        self.assertEqual(self.cache.stats()["hits"], 2)
+
+
+class TestHuggingFaceClientStream(unittest.TestCase):
+    def setUp(self):
+        # Skip __init__, which downloads and loads the configured model
+        self.client = HuggingFaceClient.__new__(HuggingFaceClient)
+        self.client.model, self.client.tokenizer = tiny_model()
+        self.client.tokenizer.model_input_names = ["input_ids", "attention_mask"]
+        self.client.device = "cpu"
+        self.client.prefix_cache = None
+        self.client.batcher = None
+        self.messages = [{"role": "user", "content": "w5 w6 w7"}]
+
+    def reference(self, max_new_tokens):
+        prompt = self.client._format_messages(self.messages)
+        inputs = self.client.tokenizer(prompt, return_tensors="pt")
+        output = self.client.model.generate(
+            **inputs, max_new_tokens=max_new_tokens, do_sample=False, pad_token_id=2
+        )
+        generated = output[0, inputs["input_ids"].shape[1]:]
+        return self.client.tokenizer.decode(generated, skip_special_tokens=True)
+
+    def test_stream_matches_generate(self):
+        """Test that streamed chunks add up to the unstreamed greedy output."""
+        chunks = list(self.client.stream(self.messages, temperature=0.0, max_tokens=12))
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks).split(), self.reference(12).split())
+
+    def test_closing_the_stream_stops_generation(self):
+        """Test that a consumer that stops early ends the generate() thread."""
+        stream = self.client.stream(self.messages, temperature=0.0, max_tokens=200)
+        next(stream)
+        stream.close()
+        self.assertFalse(any(t.name == "hf-generate" for t in threading.enumerate()))
+
+    def test_requests_only_use_warmed_prefixes(self):
+        """Test that requests never add prefixes and reuse those warmed ahead of time."""
+        self.client.prefix_cache = PrefixCache(self.client.model, "cpu", max_bytes=10 ** 8)
+        self.messages = [
+            {"role": "system", "content": "w10 w11 w12 w13 w14 w15"},
+            {"role": "user", "content": "w5 w6 w7"}
+        ]
+        expected = self.reference(6).split()
+
+        chunks = list(self.client.stream(self.messages, temperature=0.0, max_tokens=6))
+        self.assertEqual("".join(chunks).split(), expected)
+        self.assertEqual(self.client.prefix_cache.stats()["entries"], 0)
+
+        self.client.warm_prefix(self.messages)
+        chunks = list(self.client.stream(self.messages, temperature=0.0, max_tokens=6))
+        self.assertEqual("".join(chunks).split(), expected)
+        self.assertEqual(self.client.prefix_cache.stats()["entries"], 1)
+        self.assertEqual(self.client.prefix_cache.stats()["hits"], 1)
+
+
+class TestModelProfiles(unittest.TestCase):
+    def test_resolve_profile(self):
+        """Test that auto keeps fp32 on CPU and MPS always uses float16."""
+        self.assertEqual(resolve_profile("auto", "cpu"), "fp32")
+        self.assertEqual(resolve_profile("int8", "cpu"), "int8")
+        self.assertEqual(resolve_profile("int8", "mps"), "fp16")
+        with self.assertRaises(ValueError):
+            resolve_profile("int4", "cpu")
+
+    def test_int8_shrinks_linear_weights(self):
+        """Test that dynamic quantization is counted and cuts weight memory."""
+        model, _ = tiny_model()
+        before = model_memory_mb(model)
+        quantized = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.assertLess(model_memory_mb(quantized), before / 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
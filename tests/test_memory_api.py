@@ -0,0 +1,257 @@
+import json
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import select
+
+from opera.backend.api import memory as memory_api
+from opera.backend.config import config
+from opera.backend.models.memory import MemoryItem
+from opera.backend.services import fulltext, job_queue, memory_store
+from opera.backend.services.embedding_store import MemoryEmbedding
+from opera.backend.tools.memory_tools import store_memory
+
+
+class FakeEmbeddingService:
+    """Embeds texts by length and can be told to fail on a text."""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.calls = []
+
+    def generate_embeddings_batch(self, texts):
+        self.calls.append(list(texts))
+        if self.fail_on in texts:
+            raise RuntimeError("embedding API down")
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+class FakeVectorStore:
+    """Records upserted ids per call."""
+
+    def __init__(self):
+        self.upserts = []
+
+    def add_memories(self, memory_ids, contents, embeddings, metadatas, batch_size=None):
+        self.upserts.append(list(memory_ids))
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Runs each test against a fresh in-memory database."""
+
+    def setUp(self):
+        engine = memory_store.build_engine("sqlite://")
+        for module in (memory_store, job_queue, fulltext):
+            self.patch(mock.patch.object(module, "engine", engine))
+        self.patch(mock.patch.object(config, "DEDUP_ENABLED", False))
+        memory_store.init_db()
+
+        app = FastAPI()
+        app.include_router(memory_api.router)
+        self.client = TestClient(app)
+
+    def patch(self, patcher):
+        value = patcher.start()
+        self.addCleanup(patcher.stop)
+        return value
+
+
+class TestAddMemories(DatabaseTestCase):
+    def test_bad_row_only_fails_itself(self):
+        """Test that a failing item is retried alone and the rest are stored."""
+        existing = memory_store.add_memory(MemoryItem(type="semantic", content="first"))
+        items = [
+            MemoryItem(type="semantic", content="second"),
+            MemoryItem(id=existing.id, type="semantic", content="clashing id"),
+            MemoryItem(type="goal", content="third"),
+        ]
+        stored, failures, merged = memory_store.add_memories(items)
+
+        self.assertEqual([item.content for item in stored], ["second", "third"])
+        self.assertEqual([index for index, _ in failures], [1])
+        self.assertEqual(merged, [])
+        self.assertEqual(len(memory_store.list_memories()), 3)
+
+    def test_on_insert_runs_in_the_transaction(self):
+        """Test that the hook sees flushed ids for every stored item."""
+        seen = []
+        stored, _, _ = memory_store.add_memories(
+            [MemoryItem(type="semantic", content=f"fact {i}") for i in range(3)],
+            on_insert=lambda session, items: seen.extend(item.id for item in items)
+        )
+        self.assertEqual(seen, [item.id for item in stored])
+
+
+class TestBulkEndpoint(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.vector_store = FakeVectorStore()
+        self.patch(mock.patch(
+            "opera.backend.services.vector_store.get_vector_store", return_value=self.vector_store
+        ))
+        self.patch(mock.patch.object(config, "EMBEDDING_BULK_CHUNK_SIZE", 2))
+        self.patch(mock.patch.object(config, "VECTOR_UPSERT_BATCH_SIZE", 4))
+
+    def post(self, embedding_service, contents):
+        manager = mock.Mock()
+        manager.get.return_value = embedding_service
+        with mock.patch("opera.backend.services.model_manager.get_model_manager", return_value=manager):
+            response = self.client.post(
+                "/memory/bulk", json=[{"type": "semantic", "content": c} for c in contents]
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_chunks_embeddings_and_batches_upserts(self):
+        """Test that items are embedded per chunk and upserted per upsert batch."""
+        service = FakeEmbeddingService()
+        body = self.post(service, ["a", "bb", "ccc", "dddd", "eeeee"])
+
+        self.assertEqual(body["stored"], 5)
+        self.assertEqual(body["indexed"], 5)
+        self.assertEqual([len(call) for call in service.calls], [2, 2, 1])
+        self.assertEqual([len(ids) for ids in self.vector_store.upserts], [4, 1])
+        with memory_store.get_session() as session:
+            self.assertEqual(len(session.exec(select(MemoryEmbedding)).all()), 5)
+
+    def test_failed_chunk_is_queued_for_retry(self):
+        """Test that items whose chunk failed to embed are stored and queued."""
+        body = self.post(FakeEmbeddingService(fail_on="ccc"), ["a", "bb", "ccc", "dddd"])
+
+        self.assertEqual(body["stored"], 4)
+        self.assertEqual(body["indexed"], 2)
+        statuses = [result["status"] for result in body["results"]]
+        self.assertEqual(statuses, ["indexed", "indexed", "queued", "queued"])
+        self.assertIn("embedding API down", body["results"][2]["error"])
+
+        queued = [result["id"] for result in body["results"][2:]]
+        jobs = job_queue.claim("embed_memory", limit=10)
+        self.assertEqual(sorted(job.key for job in jobs), sorted(f"memory:{i}" for i in queued))
+
+
+class TestIndexingStatus(DatabaseTestCase):
+    def status(self, memory_id):
+        return self.client.get(f"/memory/{memory_id}/status")
+
+    def test_status_follows_the_embed_job(self):
+        """Test that status moves from pending to running to indexed, or failed."""
+        memory_id = self.client.post("/memory", json={"type": "semantic", "content": "a fact"}).json()["id"]
+        self.assertEqual(self.status(memory_id).json()["status"], "pending")
+
+        jobs = job_queue.claim("embed_memory", limit=1)
+        body = self.status(memory_id).json()
+        self.assertEqual((body["status"], body["attempts"]), ("running", 1))
+
+        job_queue.complete(jobs)
+        self.assertEqual(self.status(memory_id).json()["status"], "indexed")
+
+        # A reindex that exhausts its attempts reports the last error
+        with mock.patch.object(config, "JOB_MAX_ATTEMPTS", 1):
+            self.assertEqual(self.client.post(f"/memory/{memory_id}/reindex").json()["status"], "pending")
+        job_queue.fail(job_queue.claim("embed_memory", limit=1), "model missing")
+        body = self.status(memory_id).json()
+        self.assertEqual((body["status"], body["error"]), ("failed", "model missing"))
+
+    def test_unknown_memory(self):
+        """Test that status for a missing memory is a 404."""
+        self.assertEqual(self.status(12345).status_code, 404)
+
+    def test_store_memory_tool_queues_embedding(self):
+        """Test that memories stored by the assistant's tool get indexed too."""
+        reply = store_memory(memory_type="semantic", content="a fact from chat")
+        memory_id = int(reply.rsplit(" ", 1)[1])
+        self.assertEqual(self.status(memory_id).json()["status"], "pending")
+
+
+class TestListAndExport(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        start = datetime(2024, 1, 1)
+        # Two memories share each timestamp, so ordering must fall back to id
+        items = [
+            MemoryItem(
+                type="goal" if i % 3 == 0 else "semantic",
+                content=f"memory {i}",
+                timestamp=start + timedelta(hours=i // 2),
+                confidence=0.5 if i % 2 else 0.9
+            )
+            for i in range(7)
+        ]
+        stored, _, _ = memory_store.add_memories(items)
+        # Newest first: later timestamp, then higher id
+        self.ids = [item.id for item in sorted(stored, key=lambda m: (m.timestamp, m.id), reverse=True)]
+
+    def page(self, **params):
+        response = self.client.get("/memory", params=params)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        return [item["id"] for item in body["items"]], body["next_cursor"], body["prev_cursor"]
+
+    def test_pages_walk_back_and_forth(self):
+        """Test that before/after cursors visit every memory once, in order."""
+        first, next_cursor, prev_cursor = self.page(limit=3)
+        self.assertEqual(first, self.ids[:3])
+        self.assertIsNone(prev_cursor)
+
+        second, next_cursor, prev_cursor = self.page(limit=3, before=next_cursor)
+        self.assertEqual(second, self.ids[3:6])
+        last, end_cursor, _ = self.page(limit=3, before=next_cursor)
+        self.assertEqual(last, self.ids[6:])
+        self.assertIsNone(end_cursor)
+
+        back, _, newest_cursor = self.page(limit=3, after=prev_cursor)
+        self.assertEqual(back, first)
+        self.assertIsNone(newest_cursor)
+
+    def test_ties_on_timestamp_break_on_id(self):
+        """Test that a page boundary between equal timestamps loses no rows."""
+        seen = []
+        cursor = None
+        while True:
+            ids, cursor, _ = self.page(limit=1, **({"before": cursor} if cursor else {}))
+            seen.extend(ids)
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.ids)
+
+    def test_filters_apply_to_pages(self):
+        """Test that type and confidence filters restrict every page."""
+        ids, next_cursor, _ = self.page(memory_type="semantic", min_confidence=0.8, limit=10)
+        expected = [
+            memory.id for memory in memory_store.get_memories(self.ids)
+            if memory.type == "semantic" and memory.confidence >= 0.8
+        ]
+        self.assertEqual(sorted(ids), sorted(expected))
+        self.assertEqual(ids, [i for i in self.ids if i in expected])
+        self.assertIsNone(next_cursor)
+
+    def test_cursor_encoding(self):
+        """Test that cursors round-trip and malformed or conflicting ones are rejected."""
+        memory = memory_store.get_memories([self.ids[0]])[0]
+        self.assertEqual(
+            memory_store.decode_cursor(memory_store.encode_cursor(memory)),
+            (memory.timestamp, memory.id)
+        )
+        self.assertEqual(self.client.get("/memory", params={"before": "not-a-cursor"}).status_code, 400)
+        cursor = memory_store.encode_cursor(memory)
+        self.assertEqual(
+            self.client.get("/memory", params={"before": cursor, "after": cursor}).status_code, 400
+        )
+
+    def test_export_streams_ndjson(self):
+        """Test that the export has one JSON object per line, newest first and filtered."""
+        response = self.client.get("/memory/export")
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual([row["id"] for row in rows], self.ids)
+
+        goals = self.client.get("/memory/export", params={"memory_type": "goal"}).text.splitlines()
+        self.assertEqual({json.loads(line)["type"] for line in goals}, {"goal"})
+        self.assertEqual(len(goals), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+from opera.backend.services.minhash import MinHasher, from_bytes, to_bytes
+
+
+class TestMinHasher(unittest.TestCase):
+    def setUp(self):
+        self.hasher = MinHasher(num_perm=128, bands=16)
+
+    def test_near_duplicates_share_a_bucket(self):
+        """Test that lightly edited texts collide in at least one LSH band."""
+        a = self.hasher.signature("Had lunch with Sarah at the noodle place on Main Street today")
+        b = self.hasher.signature("had lunch with sarah at the noodle place on main street today!")
+        self.assertEqual(self.hasher.similarity(a, b), 1.0)
+        self.assertTrue(set(self.hasher.band_keys(a)) & set(self.hasher.band_keys(b)))
+
+    def test_different_texts_score_low(self):
+        """Test that unrelated texts have a low estimated similarity."""
+        a = self.hasher.signature("Sarah prefers morning meetings on Tuesdays")
+        b = self.hasher.signature("Quarterly planning notes for the platform team")
+        self.assertLess(self.hasher.similarity(a, b), 0.2)
+
+    def test_signature_round_trip(self):
+        """Test that stored signatures decode to the same values."""
+        signature = self.hasher.signature("the quick brown fox")
+        self.assertTrue((from_bytes(to_bytes(signature)) == signature).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
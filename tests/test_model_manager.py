@@ -0,0 +1,93 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+from opera.backend.config import config
+from opera.backend.services.model_manager import ModelManager, ModelNotReady, retry_delay
+
+
+class TestModelManager(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+
+        def slow():
+            self.release.wait(5)
+            return "slow-model"
+
+        def broken():
+            raise ValueError("no weights")
+
+        self.manager = ModelManager({"slow": slow, "fast": lambda: "fast-model", "broken": broken})
+
+    def tearDown(self):
+        self.release.set()
+
+    def test_bounded_wait_while_loading(self):
+        """Test that a still-loading model raises ModelNotReady after the timeout, then loads."""
+        self.manager.start()
+        with self.assertRaises(ModelNotReady):
+            self.manager.get("slow", timeout=0.05)
+        self.assertEqual(self.manager.status()["slow"]["state"], "loading")
+        self.assertFalse(self.manager.ready())
+
+        self.release.set()
+        self.assertEqual(self.manager.get("slow", timeout=5), "slow-model")
+        self.assertEqual(self.manager.get("fast", timeout=5), "fast-model")
+        self.assertEqual(self.manager.status()["slow"]["state"], "ready")
+
+    def test_failed_load_reraises_and_is_not_ready(self):
+        """Test that a failed load re-raises its error and is reported, not ready."""
+        self.release.set()
+        with self.assertRaises(ValueError):
+            self.manager.get("broken", timeout=5)
+        self.assertEqual(self.manager.status()["broken"]["error"], "no weights")
+        self.manager.get("slow", timeout=5)
+        self.manager.get("fast", timeout=5)
+        self.assertFalse(self.manager.ready())
+        self.assertEqual(self.manager.failed(), ["broken"])
+
+    def test_failed_load_is_retried_after_backoff(self):
+        """Test that get() loads a failed model again once its backoff has passed."""
+        attempts = []
+
+        def flaky():
+            attempts.append(time.monotonic())
+            if len(attempts) < 3:
+                raise OSError("download interrupted")
+            return "flaky-model"
+
+        manager = ModelManager({"flaky": flaky})
+        with mock.patch.object(config, "MODEL_RETRY_BASE_SECONDS", 0.2), \
+                mock.patch.object(config, "MODEL_RETRY_MAX_SECONDS", 10):
+            self.assertEqual([retry_delay(n) for n in range(1, 4)], [0.2, 0.4, 0.8])
+            with self.assertRaises(OSError):
+                manager.get("flaky", timeout=5)
+            # Still backing off: the stored error is raised without a new attempt
+            with self.assertRaises(OSError):
+                manager.get("flaky", timeout=5)
+            self.assertEqual(len(attempts), 1)
+
+            time.sleep(0.25)
+            with self.assertRaises(OSError):
+                manager.get("flaky", timeout=5)
+            time.sleep(0.45)
+            self.assertEqual(manager.get("flaky", timeout=5), "flaky-model")
+
+        self.assertEqual(len(attempts), 3)
+        status = manager.status()["flaky"]
+        self.assertEqual((status["state"], status["error"], status["attempts"]), ("ready", None, 3))
+        self.assertTrue(manager.ready())
+
+    def test_on_ready_callbacks(self):
+        """Test that callbacks run after loading, or immediately if already loaded."""
+        seen = []
+        self.manager.on_ready("slow", seen.append)
+        self.release.set()
+        self.manager.get("slow", timeout=5)
+        self.manager.on_ready("slow", seen.append)
+        self.assertEqual(seen, ["slow-model", "slow-model"])
+
+
+if __name__ == "__main__":
+    unittest.main()
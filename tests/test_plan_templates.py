@@ -0,0 +1,134 @@
+import unittest
+from opera.backend.models.reasoning import Intent, Plan, PlanStep
+from opera.backend.services.plan_templates import PlanTemplateStore
+from opera.backend.tools.registry import Tool, ToolRegistry, ToolSchema
+
+
+def retrieval(query, confidence=0.9):
+    return Intent(
+        category="information_retrieval",
+        description=f"find {query}",
+        confidence=confidence,
+        parameters={"query": query, "limit": 5}
+    )
+
+
+def llm_plan(query, extra=""):
+    return Plan(
+        plan_id="llm",
+        steps=[
+            PlanStep(step_id=1, description=f"Embed '{query}'", tool_name="embedder", tool_arguments={"text": query}),
+            PlanStep(step_id=2, description="Search", tool_name="vector_db", tool_arguments={"op": "query" + extra, "n": 5})
+        ],
+        estimated_duration_seconds=3
+    )
+
+
+class TestPlanTemplateStore(unittest.TestCase):
+    def setUp(self):
+        self.registry = ToolRegistry()
+        self.store = PlanTemplateStore(
+            max_entries=2, min_observations=2, min_confidence=0.8, registry=self.registry
+        )
+
+    def test_instantiates_after_repeated_agreement(self):
+        """Test that a template is served only after matching plans, with new values substituted."""
+        self.store.record(retrieval("old resume"), llm_plan("old resume"))
+        self.assertIsNone(self.store.lookup(retrieval("tax forms")))
+        self.store.record(retrieval("wifi password"), llm_plan("wifi password"))
+
+        plan = self.store.lookup(retrieval("tax forms"))
+        self.assertEqual(plan.steps[0].description, "Embed 'tax forms'")
+        self.assertEqual(plan.steps[0].tool_arguments, {"text": "tax forms"})
+        # Numbers are never templated, even when equal to a parameter
+        self.assertEqual(plan.steps[1].tool_arguments, {"op": "query", "n": 5})
+        self.assertNotEqual(plan.plan_id, "llm")
+        self.assertIsNone(self.store.lookup(retrieval("tax forms", confidence=0.5)))
+
+    def test_disagreeing_plans_are_not_trusted(self):
+        """Test that plans with request-specific content never become a template."""
+        self.store.record(retrieval("old resume"), llm_plan("old resume", extra="-a"))
+        self.store.record(retrieval("wifi password"), llm_plan("wifi password", extra="-b"))
+        self.assertIsNone(self.store.lookup(retrieval("tax forms")))
+
+    def test_short_parameter_in_fixed_text(self):
+        """Test that a parameter value also found in fixed wording doesn't template that wording."""
+        def plan(query):
+            return Plan(plan_id="llm", steps=[PlanStep(
+                step_id=1, description=f"Find '{query}' in the notes",
+                tool_name="vector_db", tool_arguments={"query": query}
+            )])
+
+        self.store.record(retrieval("the"), plan("the"))
+        self.store.record(retrieval("tax forms"), plan("tax forms"))
+        self.store.record(retrieval("the"), plan("the"))
+        self.assertEqual(self.store.stats()["trusted"], 1)
+
+        for query in ("wifi password", "the"):
+            step = self.store.lookup(retrieval(query)).steps[0]
+            self.assertEqual(step.description, f"Find '{query}' in the notes")
+            self.assertEqual(step.tool_arguments, {"query": query})
+
+    def test_numbers_equal_to_a_parameter_stay_literal(self):
+        """Test that top_k: 1 isn't tied to a count parameter that was also 1."""
+        def intent(query, count):
+            return Intent(
+                category="information_retrieval", description="d", confidence=0.9,
+                parameters={"query": query, "count": count}
+            )
+
+        def plan(query):
+            return Plan(plan_id="llm", steps=[PlanStep(
+                step_id=1, description="Search", tool_name="vector_db",
+                tool_arguments={"query": query, "top_k": 1}
+            )])
+
+        self.store.record(intent("old resume", 1), plan("old resume"))
+        self.store.record(intent("tax forms", 1), plan("tax forms"))
+        self.assertEqual(
+            self.store.lookup(intent("wifi", 3)).steps[0].tool_arguments, {"query": "wifi", "top_k": 1}
+        )
+
+        # An LLM that does follow the count disagrees with the literal and starts over
+        self.store.record(intent("wifi", 3), Plan(plan_id="llm", steps=[PlanStep(
+            step_id=1, description="Search", tool_name="vector_db",
+            tool_arguments={"query": "wifi", "top_k": 3}
+        )]))
+        self.assertIsNone(self.store.lookup(intent("wifi", 3)))
+
+    def test_unchanged_parameters_are_not_evidence(self):
+        """Test that a repeat with the same values doesn't make the copied value a template."""
+        self.store.record(retrieval("old resume"), llm_plan("old resume"))
+        self.store.record(retrieval("old resume"), llm_plan("old resume"))
+        self.assertIsNone(self.store.lookup(retrieval("tax forms")))
+
+    def test_reworded_descriptions_disagree(self):
+        """Test that descriptions take part in the agreement check."""
+        reworded = llm_plan("wifi password")
+        reworded.steps[1].description = "Query the vector database"
+        self.store.record(retrieval("old resume"), llm_plan("old resume"))
+        self.store.record(retrieval("wifi password"), reworded)
+        self.assertIsNone(self.store.lookup(retrieval("tax forms")))
+
+    def test_lru_eviction_and_registry_invalidation(self):
+        """Test that the least recently used key is evicted and registry changes clear all."""
+        def summary(period):
+            return Intent(category="summarization", description="d", confidence=0.9, parameters={"period": period})
+
+        third = Intent(category="summarization", description="d", confidence=0.9, parameters={})
+        for period in ("week", "month"):
+            self.store.record(retrieval(f"a {period} query"), llm_plan(f"a {period} query"))
+            self.store.record(summary(period), llm_plan(period))
+        self.assertIsNotNone(self.store.lookup(retrieval("x")))
+        self.store.record(third, llm_plan("y"))
+        self.assertIsNone(self.store.lookup(summary("year")))
+        self.assertIsNotNone(self.store.lookup(retrieval("x")))
+
+        schema = ToolSchema(name="test_template_tool", description="", parameters=[], returns="None", permissions=[])
+        self.registry.register(Tool(lambda: None, schema))
+        self.assertIsNone(self.store.lookup(retrieval("x")))
+        self.assertEqual(self.store.stats()["templates"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
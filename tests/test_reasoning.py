@@ -1,6 +1,19 @@
+import json
 import unittest
-from opera.backend.services.reasoning_service import ReasoningService
+from unittest import mock
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from opera.backend.api import reasoning as reasoning_api
+from opera.backend.config import config
+from opera.backend.models.memory import MemoryItem
+from opera.backend.services import fulltext, job_queue, memory_store, reasoning_service
+from opera.backend.services.prompts import reasoning_pipeline_prompt
+from opera.backend.services.reasoning_service import ReasoningService, _json_field
 from opera.backend.models.reasoning import Intent, PlanStep
+from opera.backend.tools import memory_tools  # noqa: F401 - registers fetch_memories
+from opera.backend.tools.registry import Tool, ToolPermission, ToolRegistry, ToolSchema
 
 class TestReasoningService(unittest.TestCase):
     def setUp(self):
@@ -52,6 +65,38 @@ class TestReasoningService(unittest.TestCase):
         intent = self.service.derive_intent("Summarize today's events")
         self.assertEqual(intent.category, "summarization")
 
+    def test_reason_yields_intent_then_plan(self):
+        """Test that the combined pipeline yields the intent before the plan."""
+        events = list(self.service.reason("Find my old resume"))
+        self.assertEqual([event for event, _ in events], ["intent", "plan"])
+        self.assertEqual(events[0][1].category, "information_retrieval")
+        self.assertTrue(len(events[1][1].steps) > 0)
+
+    def test_reason_looks_up_the_llm_once(self):
+        """Test that a request waits on the model manager once, even through fallbacks."""
+        llm = mock.Mock()
+        llm.stream.side_effect = RuntimeError("stream dropped")
+        llm.complete.return_value = "not json"
+        manager = mock.Mock()
+        manager.get.return_value = llm
+        with mock.patch.object(reasoning_service, "get_model_manager", return_value=manager), \
+                mock.patch.object(ReasoningService, "intent_classifier", None):
+            service = ReasoningService()
+            events = list(service.reason("Find my old resume"))
+
+        self.assertEqual([event for event, _ in events], ["intent", "plan"])
+        self.assertEqual(events[0][1].category, "information_retrieval")
+        self.assertEqual(manager.get.call_count, 1)
+        self.assertEqual(llm.complete.call_count, 2)
+
+    def test_json_field_on_partial_stream(self):
+        """Test that a streamed field is only parsed once its value is complete."""
+        partial = '{"intent": {"category": "summarization", "confidence": 0.9'
+        self.assertIsNone(_json_field(partial, "intent"))
+        intent = _json_field(partial + '}, "plan": {"steps": [', "intent")
+        self.assertEqual(intent["category"], "summarization")
+        self.assertIsNone(_json_field(partial + '}, "plan": {"steps": [', "plan"))
+
     def test_preview_action_medium_risk(self):
         """Test that modification actions are flagged as medium risk."""
         step = PlanStep(step_id=1, description="Update the record", tool_name="db_updater")
@@ -64,5 +109,76 @@ class TestReasoningService(unittest.TestCase):
         preview = self.service.preview_action(step)
         self.assertEqual(preview.risk_level, "low")
 
+
+class TestPlannedToolsRun(unittest.TestCase):
+    def setUp(self):
+        engine = memory_store.build_engine("sqlite://")
+        for module in (memory_store, job_queue, fulltext):
+            self.patch(mock.patch.object(module, "engine", engine))
+        self.patch(mock.patch.object(config, "DEDUP_ENABLED", False))
+        memory_store.init_db()
+        self.kickoff = memory_store.add_memory(MemoryItem(type="episodic", content="Project kickoff with Sarah"))
+
+    def patch(self, patcher):
+        value = patcher.start()
+        self.addCleanup(patcher.stop)
+        return value
+
+    def test_prompt_lists_registered_tools(self):
+        """Test that the planner is offered the registry's tools with arguments and permissions."""
+        registry = ToolRegistry()
+        registry.register(Tool(lambda path: "", ToolSchema(
+            name="read_file", description="Read a file", parameters=[], returns="str",
+            permissions=[ToolPermission.READ]
+        )))
+        prompt = reasoning_pipeline_prompt(registry)
+        self.assertIn("- read_file() [read]: Read a file", prompt)
+        self.assertNotIn("vector_db", prompt)
+
+        prompt = reasoning_pipeline_prompt()
+        self.assertIn("- fetch_memories(memory_type?, query?, limit?) [read]:", prompt)
+        self.assertIn("- store_memory(memory_type, content, source?, confidence?) [write]:", prompt)
+
+    def test_planned_fetch_step_runs_during_reason(self):
+        """Test that a planned fetch_memories step is executed and streamed as a step event."""
+        reply = json.dumps({
+            "intent": {"category": "information_retrieval", "description": "Recall the kickoff",
+                       "confidence": 0.9, "parameters": {"query": "kickoff"}},
+            "plan": {"steps": [
+                {"step_id": 1, "description": "Find the kickoff", "tool_name": "fetch_memories",
+                 "tool_arguments": {"query": "kickoff"}},
+                {"step_id": 2, "description": "Save a note", "tool_name": "store_memory",
+                 "tool_arguments": {"memory_type": "semantic", "content": "x"}},
+            ]}
+        })
+
+        def stream(messages, **params):
+            yield reply
+
+        llm = mock.Mock()
+        llm.stream.side_effect = stream
+        manager = mock.Mock()
+        manager.get.return_value = llm
+        self.patch(mock.patch.object(reasoning_service, "get_model_manager", return_value=manager))
+        self.patch(mock.patch.object(ReasoningService, "intent_classifier", None))
+        self.patch(mock.patch.object(reasoning_service, "get_plan_template_store", return_value=None))
+        self.patch(mock.patch.object(reasoning_api, "get_reasoning_service", return_value=ReasoningService()))
+
+        app = FastAPI()
+        app.include_router(reasoning_api.router)
+        response = TestClient(app).post(
+            "/reason", json={"user_input": "What happened at the kickoff?", "execute_read_only": True}
+        )
+
+        events = [
+            (block.split("\n")[0][len("event: "):], json.loads(block.split("\n")[1][len("data: "):]))
+            for block in response.text.strip().split("\n\n")
+        ]
+        self.assertEqual([event for event, _ in events], ["intent", "plan", "step", "done"])
+        step = events[2][1]
+        self.assertEqual((step["step_id"], step["success"]), (1, True))
+        self.assertEqual([memory["id"] for memory in step["output"]], [self.kickoff.id])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,24 @@
+import unittest
+from opera.backend.startup_profile import APP_MODULE, _run, benchmark_startup, import_profile
+
+
+class TestStartup(unittest.TestCase):
+    def test_no_heavy_imports(self):
+        """Test that importing the app doesn't load model or client libraries."""
+        result = benchmark_startup(APP_MODULE, lifespan=False)
+        self.assertEqual(result["heavy"], [])
+
+    def test_import_profile(self):
+        """Test that the profile lists the app module with its cumulative cost."""
+        profile = dict(import_profile(APP_MODULE))
+        self.assertIn(APP_MODULE, profile)
+        self.assertGreater(profile[APP_MODULE], 0)
+
+    def test_measurements_run_without_model_preload(self):
+        """Test that the profiled interpreter doesn't start loading models in the background."""
+        result = _run(["-c", "from opera.backend.config import config; print(config.MODEL_PRELOAD)"])
+        self.assertEqual(result.stdout.strip(), "False")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from opera.backend.config import config
+from opera.backend.models.memory import MemoryItem
+from opera.backend.services import fulltext, job_queue, memory_store
+from opera.backend.services.embedding_store import save_embeddings
+from opera.backend.services.flat_vector_store import FlatVectorStore
+from opera.backend.services.memory_indexing import EMBED_JOB, queue_reindex_all, sync_vector_index
+from opera.backend.services.vector_store import collection_name
+
+
+class TestCollectionName(unittest.TestCase):
+    def test_one_collection_per_model(self):
+        """Test that each embedding model gets its own valid Chroma collection name."""
+        local = collection_name("sentence-transformers/all-MiniLM-L6-v2")
+        self.assertEqual(local, "memories-sentence-transformers-all-minilm-l6-v2")
+        self.assertNotEqual(local, collection_name("text-embedding-3-small"))
+
+        long_name = collection_name("org/" + "very-long-model-name-" * 5)
+        self.assertLessEqual(len(long_name), 63)
+        self.assertTrue(long_name[-1].isalnum())
+
+    def test_flat_index_per_model(self):
+        """Test that switching models opens a new, empty flat index instead of the old one."""
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        with mock.patch.object(config, "FLAT_INDEX_DIR", root):
+            store = FlatVectorStore(embedding_model="text-embedding-3-small")
+            store.add_memory(1, "apples", [1.0, 0.0, 0.0], {"type": "semantic", "source": "manual"})
+            store.close()
+
+            store = FlatVectorStore(embedding_model="sentence-transformers/all-MiniLM-L6-v2")
+            self.addCleanup(store.close)
+            self.assertEqual(
+                store.directory,
+                os.path.join(root, "memories-sentence-transformers-all-minilm-l6-v2")
+            )
+            self.assertTrue(store.is_empty())
+            store.add_memory(1, "apples", [1.0, 0.0, 0.0, 0.0], {"type": "semantic", "source": "manual"})
+
+
+class TestQueueReindexAll(unittest.TestCase):
+    def setUp(self):
+        engine = memory_store.build_engine("sqlite://")
+        for module in (memory_store, job_queue, fulltext):
+            patcher = mock.patch.object(module, "engine", engine)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        memory_store.init_db()
+
+    def test_queues_memories_without_a_pending_job(self):
+        """Test that every memory is queued once, even if it was embedded before."""
+        stored, _, _ = memory_store.add_memories(
+            [MemoryItem(type="semantic", content=f"fact {i}") for i in range(3)]
+        )
+        ids = [item.id for item in stored]
+        job_queue.enqueue(EMBED_JOB, {"memory_id": ids[0]}, key=f"memory:{ids[0]}")
+
+        self.assertEqual(queue_reindex_all(batch_size=1), 2)
+        self.assertEqual(queue_reindex_all(), 0)
+
+        jobs = job_queue.claim(EMBED_JOB, limit=10)
+        self.assertEqual(sorted(job.key for job in jobs), sorted(f"memory:{i}" for i in ids))
+
+    def test_sync_only_fills_an_empty_index(self):
+        """Test that startup queues every memory for a new index and nothing for a filled one."""
+        memory_store.add_memories([MemoryItem(type="semantic", content=f"fact {i}") for i in range(2)])
+        store = mock.Mock()
+        with mock.patch("opera.backend.services.vector_store.get_vector_store", return_value=store):
+            store.is_empty.return_value = False
+            self.assertEqual(sync_vector_index(), (0, 0))
+            store.is_empty.return_value = True
+            self.assertEqual(sync_vector_index(), (0, 2))
+
+    def test_sync_restores_stored_embeddings_of_the_current_model(self):
+        """Test that an empty index is refilled from matching blobs and only the rest are queued."""
+        stored, _, _ = memory_store.add_memories(
+            [MemoryItem(type="semantic", content=f"fact {i}") for i in range(4)]
+        )
+        ids = [item.id for item in stored]
+        save_embeddings([(ids[0], [1.0, 0.0]), (ids[1], [0.0, 1.0])])
+        save_embeddings([(ids[2], [0.5, 0.5, 0.5])], model="some-old-model")
+
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        store = FlatVectorStore(root)
+        self.addCleanup(store.close)
+        with mock.patch("opera.backend.services.vector_store.get_vector_store", return_value=store):
+            self.assertEqual(sync_vector_index(batch_size=1), (2, 2))
+
+        results = store.search_similar([1.0, 0.0], n_results=5)
+        self.assertEqual([r["id"] for r in results], ids[:2])
+        self.assertEqual(results[0]["content"], "fact 0")
+        jobs = job_queue.claim(EMBED_JOB, limit=10)
+        self.assertEqual(sorted(job.key for job in jobs), [f"memory:{i}" for i in ids[2:]])
+
+if __name__ == "__main__":
+    unittest.main()